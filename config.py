@@ -2,19 +2,59 @@ from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).resolve().parent
 MODEL_PATH = PROJECT_ROOT / "models" / "model.tflite"
+MODEL_PROFILE_PATH = PROJECT_ROOT / "models" / "runtime_profile.json"
 DB_PATH = PROJECT_ROOT / "data" / "detections.db"
 LOG_DIR = PROJECT_ROOT / "logs"
 
 CLASSES = ["Aedes", "Culex", "No_Mosquito"]
 CONFIDENCE_THRESHOLD = 0.72
 INPUT_SIZE = (224, 224)
+# Pixel normalization the model was trained with: "mobilenetv2" ([-1, 1]) or "none" (0-255)
+INPUT_NORMALIZATION = "mobilenetv2"
 NO_MOSQUITO_CLASS_IDX = 2
 MIN_MOSQUITO_CONFIDENCE_MARGIN = 0.15
 
+# None: use models/runtime_profile.json (scripts/autotune_model.py), else TFLite defaults
+MODEL_NUM_THREADS = None
+# "xnnpack", "none", or the path of an external delegate library
+MODEL_DELEGATE = None
+
+# Worker processes for inference (0 runs the model in the detection loop).
+# Each worker loads its own interpreter; results are reassembled in capture order.
+INFERENCE_WORKERS = 0
+INFERENCE_WORKER_THREADS = 1
+
 PI_CAMERA_INDEX = 0
 PI_CAMERA_WIDTH = 640
 PI_CAMERA_HEIGHT = 480
 PI_CAMERA_TARGET_FPS = 10
+PI_CAMERA_BUFFER_SLOTS = 3
+# "full": capture PI_CAMERA_WIDTH x PI_CAMERA_HEIGHT BGR and resize on the CPU.
+# "model": let the ISP deliver INPUT_SIZE RGB frames directly (lores stream).
+PI_CAMERA_CAPTURE_MODE = "full"
+
+MOTION_GATE_ENABLED = False
+MOTION_GATE_SIZE = (64, 48)
+MOTION_GATE_PIXEL_THRESHOLD = 12
+MOTION_GATE_CHANGED_FRACTION = 0.01
+MOTION_GATE_BACKGROUND_ALPHA = 0.05
+MOTION_GATE_MAX_SKIP_SECONDS = 5.0
+
+# Run preprocess, inference and sinks (decision logic, DB, OLED) on separate
+# threads connected by bounded queues. Policies: "drop_oldest", "block", "skip".
+PIPELINE_ENABLED = False
+PIPELINE_INFER_QUEUE_SIZE = 1
+PIPELINE_INFER_POLICY = "drop_oldest"
+PIPELINE_SINK_QUEUE_SIZE = 32
+PIPELINE_SINK_POLICY = "block"
+
+# Database, OLED and log writes run on background sink workers. Queued
+# updates are coalesced when a sink falls behind; updates waiting longer than
+# SINK_LATE_SECONDS are counted as late.
+SINK_QUEUE_SIZE = 8
+SINK_LATE_SECONDS = 2.0
+SINK_FLUSH_TIMEOUT = 5.0
+LOG_QUEUE_SIZE = 1000
 
 TARGET_LATENCY_MS = 100
 MAX_LATENCY_MS = 150
@@ -25,6 +65,41 @@ OLED_WIDTH = 128
 OLED_HEIGHT = 64
 
 DB_ENABLED = True
+# WAL mode with synchronous=NORMAL fsyncs only at checkpoints, not on every
+# commit; the WAL file is truncated back to this size after a checkpoint.
+DB_SYNCHRONOUS = "NORMAL"
+DB_JOURNAL_SIZE_LIMIT = 4 * 1024 * 1024
+# Raw detections older than DB_RETENTION_DAYS are deleted (rollups keep the
+# aggregates), then the oldest rows until the data fits in DB_MAX_SIZE_MB.
+# The size limit never deletes rows younger than DB_MIN_RETENTION_DAYS.
+# Set either to None to disable it; DB_COMPACT_INTERVAL = 0 disables the job.
+DB_RETENTION_DAYS = 90
+DB_MAX_SIZE_MB = 1024
+DB_MIN_RETENTION_DAYS = 7
+DB_COMPACT_INTERVAL = 3600
+DB_COMPACT_BATCH_ROWS = 5000
+# Detections are appended to a small journal file and written to SQLite in
+# bulk every WRITE_BEHIND_FLUSH_INTERVAL seconds or WRITE_BEHIND_FLUSH_EVENTS
+# events; an unflushed journal is replayed on startup. Without fsync the
+# journal survives process crashes but a power cut can lose the last few
+# seconds the kernel had not written back; with fsync every append costs a
+# flash page write. Readers of the database (dashboard, manage_db.py) lag
+# the detector by up to WRITE_BEHIND_FLUSH_INTERVAL seconds, so it is off by
+# default; enable it where flash wear matters more than fresh dashboards.
+WRITE_BEHIND_ENABLED = False
+WRITE_BEHIND_JOURNAL = PROJECT_ROOT / "data" / "detections.journal"
+WRITE_BEHIND_FLUSH_INTERVAL = 30
+WRITE_BEHIND_FLUSH_EVENTS = 500
+WRITE_BEHIND_FSYNC = False
+# Archive every frame's full probability vector (one file pair per day) so a
+# new CONFIDENCE_THRESHOLD / MIN_DETECTION_INTERVAL can be replayed over past
+# data with scripts/replay_thresholds.py. "uint8" takes 1 byte per class and
+# frame (error <= 1/510), "float16" 2 bytes.
+PROB_ARCHIVE_ENABLED = False
+PROB_ARCHIVE_DIR = PROJECT_ROOT / "data" / "prob_archive"
+PROB_ARCHIVE_ENCODING = "uint8"
+PROB_ARCHIVE_RETENTION_DAYS = 30
+
 UPDATE_INTERVAL = 1.0
 MIN_DETECTION_INTERVAL = 3.0
 
@@ -33,4 +108,57 @@ LOG_LEVEL = "INFO"
 DASHBOARD_ENABLED = True
 DASHBOARD_HOST = "0.0.0.0"
 DASHBOARD_PORT = 5000
+# scripts/start_dashboard.py server: "waitress" (pip install waitress),
+# "werkzeug" (built in, fixed pool of DASHBOARD_THREADS worker threads),
+# "development" (Flask's app.run) or "auto" (waitress when installed).
+# Every open live stream (/api/stream, one per tab) or camera preview keeps a
+# thread busy, so up to DASHBOARD_STREAM_LIMIT of them get threads of their
+# own on top of DASHBOARD_THREADS; past that they get a 503 and the page falls
+# back to polling. A closed tab's slot is freed when a write to it fails, up to
+# two EVENTS_KEEPALIVE intervals later.
+DASHBOARD_SERVER = "auto"
+DASHBOARD_THREADS = 16
+DASHBOARD_STREAM_LIMIT = 48
+# Requests slower than this are logged; timings are shown in /api/status
+DASHBOARD_SLOW_REQUEST_MS = 500
+# Query results are cached until the detector commits new rows (SQLite
+# data_version), so polling browser tabs do not hit the SD card.
+DASHBOARD_CACHE_ENTRIES = 64
+DASHBOARD_CACHE_ROWS = 50000
+# /api/data responses are kept serialized and gzipped, rebuilt when the
+# database changes (checked every DASHBOARD_SNAPSHOT_REFRESH seconds), and
+# served with ETag / Last-Modified so unchanged polls get a 304.
+DASHBOARD_SNAPSHOT_REFRESH = 1.0
+DASHBOARD_SNAPSHOT_ENTRIES = 8
+# /api/data?days= must be a whole number of days >= 1 and is clamped to the
+# raw-row retention window
+DASHBOARD_MAX_DAYS = DB_RETENTION_DAYS or 365
+# Raw rows for analysts: /api/detections pages (at most
+# DASHBOARD_DETECTIONS_MAX_LIMIT rows each) and /api/detections/export streams
+# CSV or NDJSON, reading DASHBOARD_EXPORT_PAGE_ROWS rows per query.
+DASHBOARD_DETECTIONS_MAX_LIMIT = 1000
+DASHBOARD_EXPORT_PAGE_ROWS = 5000
+# The detector pushes detection events and per-window counts to the dashboard
+# over local UDP; the dashboard streams them to browsers (/api/stream).
+EVENTS_ENABLED = True
+EVENTS_HOST = "127.0.0.1"
+EVENTS_PORT = 5001
+# Recent events kept for stream clients that fall behind
+EVENTS_BACKLOG = 256
+EVENTS_KEEPALIVE = 15.0
+# Latest species, FPS, latency and counters are published every frame into a
+# shared memory segment that the dashboard reads for /api/live (no DB access).
+LIVE_STATE_ENABLED = True
+LIVE_STATE_NAME = "mosquito_live_state"
+# /api/live reports the detector as stopped when the state is older than this
+LIVE_STATE_STALE_SECONDS = 5.0
+# Live camera preview for the dashboard (/stream.mjpg). Frames are only
+# encoded while a viewer is connected, on a low-priority thread, at most
+# PREVIEW_MAX_FPS and within PREVIEW_CPU_BUDGET of one core.
+PREVIEW_ENABLED = True
+PREVIEW_NAME = "mosquito_preview"
+PREVIEW_WIDTH = 320
+PREVIEW_MAX_FPS = 5.0
+PREVIEW_QUALITY = 70
+PREVIEW_CPU_BUDGET = 0.1
 
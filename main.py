@@ -3,23 +3,50 @@ import time
 import signal
 import logging
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, deque
+from typing import Optional
+
+import numpy as np
 
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from config import (
     MODEL_PATH, DB_PATH, LOG_DIR, CLASSES, CONFIDENCE_THRESHOLD,
-    INPUT_SIZE, TARGET_LATENCY_MS, MAX_LATENCY_MS, UPDATE_INTERVAL,
-    OLED_ENABLED, DB_ENABLED, LOG_LEVEL,
+    MODEL_PROFILE_PATH, MODEL_NUM_THREADS, MODEL_DELEGATE,
+    INFERENCE_WORKERS, INFERENCE_WORKER_THREADS,
+    PIPELINE_ENABLED, PIPELINE_INFER_QUEUE_SIZE, PIPELINE_INFER_POLICY,
+    PIPELINE_SINK_QUEUE_SIZE, PIPELINE_SINK_POLICY,
+    SINK_QUEUE_SIZE, SINK_LATE_SECONDS, SINK_FLUSH_TIMEOUT, LOG_QUEUE_SIZE,
+    INPUT_SIZE, INPUT_NORMALIZATION, TARGET_LATENCY_MS, MAX_LATENCY_MS, UPDATE_INTERVAL,
+    OLED_ENABLED, DB_ENABLED, DB_SYNCHRONOUS, DB_JOURNAL_SIZE_LIMIT, LOG_LEVEL,
+    DB_RETENTION_DAYS, DB_MAX_SIZE_MB, DB_MIN_RETENTION_DAYS, DB_COMPACT_INTERVAL, DB_COMPACT_BATCH_ROWS,
+    WRITE_BEHIND_ENABLED, WRITE_BEHIND_JOURNAL, WRITE_BEHIND_FLUSH_INTERVAL,
+    WRITE_BEHIND_FLUSH_EVENTS, WRITE_BEHIND_FSYNC,
+    EVENTS_ENABLED, EVENTS_HOST, EVENTS_PORT, LIVE_STATE_ENABLED, LIVE_STATE_NAME,
+    PREVIEW_ENABLED, PREVIEW_NAME, PREVIEW_WIDTH, PREVIEW_MAX_FPS, PREVIEW_QUALITY, PREVIEW_CPU_BUDGET,
+    PROB_ARCHIVE_ENABLED, PROB_ARCHIVE_DIR, PROB_ARCHIVE_ENCODING, PROB_ARCHIVE_RETENTION_DAYS,
     PI_CAMERA_INDEX, PI_CAMERA_WIDTH, PI_CAMERA_HEIGHT, PI_CAMERA_TARGET_FPS,
-    NO_MOSQUITO_CLASS_IDX, MIN_DETECTION_INTERVAL, MIN_MOSQUITO_CONFIDENCE_MARGIN
+    PI_CAMERA_BUFFER_SLOTS, PI_CAMERA_CAPTURE_MODE,
+    NO_MOSQUITO_CLASS_IDX, MIN_DETECTION_INTERVAL, MIN_MOSQUITO_CONFIDENCE_MARGIN,
+    MOTION_GATE_ENABLED, MOTION_GATE_SIZE, MOTION_GATE_PIXEL_THRESHOLD,
+    MOTION_GATE_CHANGED_FRACTION, MOTION_GATE_BACKGROUND_ALPHA, MOTION_GATE_MAX_SKIP_SECONDS
 )
 
 from src.pi_camera import PiCamera as Camera
-from src.preprocessing import preprocess
+from src.preprocessing import Preprocessor
 from src.model import Model
+from src.motion_gate import MotionGate
+from src.inference_pool import InferencePool
+from src.pipeline import Stage, StageQueue
+from src.sinks import SinkManager, keep_latest
 from src.oled_display import OLEDDisplay
 from src.database import Database
+from src.compactor import Compactor
+from src.write_behind import WriteBehindBuffer
+from src.prob_archive import ProbArchive, merge_blocks
+from src.events import EventPublisher
+from src.live_state import LiveStateWriter
+from src.preview import PreviewPublisher
 
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 logging.basicConfig(
@@ -33,23 +60,139 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def merge_database_updates(pending: dict, update: dict) -> dict:
+    # Fold a newer window into one still waiting for the database sink.
+    detections = {species: dict(data) for species, data in pending['detections'].items()}
+    for species, data in update['detections'].items():
+        current = detections.setdefault(species, {'quantity': 0, 'confidence': 0.0})
+        total = current['quantity'] + data['quantity']
+        if total > 0:
+            current['confidence'] = (
+                current['confidence'] * current['quantity'] + data['confidence'] * data['quantity']
+            ) / total
+        current['quantity'] = total
+    return {
+        'detections': detections,
+        'fps': update['fps'],
+        'timestamp': update['timestamp']
+    }
+
+
 class DetectionSystem:
     def __init__(self):
         self.running = False
         
         logger.info("Initializing components...")
-        self.model = Model(MODEL_PATH)
+        self.model = None
+        self.pool = None
+        self.pool_dropped = 0
+        if INFERENCE_WORKERS > 0:
+            self.pool = InferencePool(
+                MODEL_PATH,
+                workers=INFERENCE_WORKERS,
+                num_threads=INFERENCE_WORKER_THREADS,
+                delegate=MODEL_DELEGATE,
+                profile_path=None if INFERENCE_WORKER_THREADS else MODEL_PROFILE_PATH
+            )
+            input_details = self.pool.input_details
+        else:
+            self.model = Model(
+                MODEL_PATH,
+                num_threads=MODEL_NUM_THREADS,
+                delegate=MODEL_DELEGATE,
+                profile_path=MODEL_PROFILE_PATH
+            )
+            input_details = self.model.input_details
         
         logger.info(f"Using Raspberry Pi Camera Module 3 (CSI)")
         self.camera = Camera(
             camera_index=PI_CAMERA_INDEX,
             width=PI_CAMERA_WIDTH,
             height=PI_CAMERA_HEIGHT,
-            target_fps=PI_CAMERA_TARGET_FPS
+            target_fps=PI_CAMERA_TARGET_FPS,
+            buffer_slots=PI_CAMERA_BUFFER_SLOTS,
+            capture_mode=PI_CAMERA_CAPTURE_MODE,
+            model_size=INPUT_SIZE
         )
         
+        self.preprocessor = Preprocessor(
+            target_size=INPUT_SIZE,
+            input_dtype=input_details['dtype'],
+            quantization=input_details['quantization'],
+            normalization=INPUT_NORMALIZATION,
+            rgb_input=self.camera.frame_is_rgb
+        )
+        
+        self.motion_gate = None
+        if MOTION_GATE_ENABLED:
+            self.motion_gate = MotionGate(
+                size=MOTION_GATE_SIZE,
+                pixel_threshold=MOTION_GATE_PIXEL_THRESHOLD,
+                changed_fraction=MOTION_GATE_CHANGED_FRACTION,
+                background_alpha=MOTION_GATE_BACKGROUND_ALPHA,
+                max_skip_seconds=MOTION_GATE_MAX_SKIP_SECONDS,
+                rgb_input=self.camera.frame_is_rgb
+            )
+            logger.info("Motion gate enabled")
+        self.last_prediction = None
+        self.last_probs = None
+        self.stages = []
+        
         self.display = OLEDDisplay() if OLED_ENABLED else None
-        self.database = Database(DB_PATH) if DB_ENABLED else None
+        self.database = None
+        if DB_ENABLED:
+            self.database = Database(
+                DB_PATH,
+                synchronous=DB_SYNCHRONOUS,
+                journal_size_limit=DB_JOURNAL_SIZE_LIMIT
+            )
+        
+        self.writer = None
+        if self.database and WRITE_BEHIND_ENABLED:
+            self.writer = WriteBehindBuffer(
+                self.database,
+                WRITE_BEHIND_JOURNAL,
+                flush_interval=WRITE_BEHIND_FLUSH_INTERVAL,
+                flush_events=WRITE_BEHIND_FLUSH_EVENTS,
+                fsync=WRITE_BEHIND_FSYNC
+            )
+        
+        self.archive = None
+        if PROB_ARCHIVE_ENABLED:
+            # Filled blocks are written (and old days pruned) by the archive sink
+            self.archive = ProbArchive(
+                PROB_ARCHIVE_DIR,
+                CLASSES,
+                encoding=PROB_ARCHIVE_ENCODING,
+                retention_days=PROB_ARCHIVE_RETENTION_DAYS,
+                submit=lambda blocks: self.sinks.submit("archive", blocks)
+            )
+            logger.info(f"Probability archive: {PROB_ARCHIVE_DIR} ({self.archive.encoding})")
+        
+        self.compactor = None
+        if self.database and DB_COMPACT_INTERVAL:
+            self.compactor = Compactor(
+                self.database,
+                max_age_days=DB_RETENTION_DAYS,
+                max_size_mb=DB_MAX_SIZE_MB,
+                min_age_days=DB_MIN_RETENTION_DAYS,
+                interval=DB_COMPACT_INTERVAL,
+                batch_rows=DB_COMPACT_BATCH_ROWS
+            )
+            self.compactor.start()
+        
+        self.sinks = SinkManager(late_after=SINK_LATE_SECONDS, flush_timeout=SINK_FLUSH_TIMEOUT)
+        self.sinks.capture_logging(LOG_QUEUE_SIZE)
+        if self.database:
+            self.sinks.add("database", self._write_database, maxsize=SINK_QUEUE_SIZE, merge=merge_database_updates)
+        if self.display:
+            self.sinks.add("display", self._refresh_display, maxsize=1, merge=keep_latest)
+        if self.archive:
+            self.sinks.add("archive", self.archive.write, maxsize=SINK_QUEUE_SIZE, merge=merge_blocks)
+        self.events = None
+        if EVENTS_ENABLED:
+            self.events = EventPublisher(EVENTS_HOST, EVENTS_PORT)
+            self.sinks.add("events", self.events.publish, maxsize=SINK_QUEUE_SIZE)
         
         self.detections = defaultdict(lambda: {'quantity': 0, 'confidence': 0.0})
         self.current_species = None
@@ -61,6 +204,20 @@ class DetectionSystem:
         self.last_update = time.time()
         self.last_detection_time = {species: 0.0 for species in CLASSES}
         
+        self.live_state = LiveStateWriter(LIVE_STATE_NAME) if LIVE_STATE_ENABLED else None
+        self.preview = None
+        if PREVIEW_ENABLED:
+            self.preview = PreviewPublisher(
+                PREVIEW_NAME,
+                width=PREVIEW_WIDTH,
+                max_fps=PREVIEW_MAX_FPS,
+                quality=PREVIEW_QUALITY,
+                cpu_budget=PREVIEW_CPU_BUDGET
+            )
+        self.total_frames = 0
+        self.total_detections = 0
+        self.class_counts = [0] * len(CLASSES)
+        
         signal.signal(signal.SIGINT, self._shutdown)
         signal.signal(signal.SIGTERM, self._shutdown)
         
@@ -84,22 +241,76 @@ class DetectionSystem:
             return
         
         if self.display:
-            self.display.show_detection_results(
-                species=self.current_species,
-                confidence=self.current_confidence,
-                fps=self.fps,
-                stats=None
-            )
+            self.sinks.submit("display", {
+                'species': self.current_species,
+                'confidence': self.current_confidence,
+                'fps': self.fps
+            })
         
         if self.database:
-            self.database.log(self.detections, self.fps)
-            if int(now) % 60 == 0:
-                self.database.update_summary()
+            self.sinks.submit("database", self._database_update(now))
+        
+        if self.events:
+            # Counts since the last window; the dashboard adds them to its charts
+            self.sinks.submit("events", {
+                'type': 'stats',
+                'timestamp': now,
+                'fps': self.fps,
+                'species': self.current_species,
+                'confidence': self.current_confidence,
+                'detections': {
+                    species: dict(data) for species, data in self.detections.items() if data['quantity']
+                }
+            })
         
         avg_latency = sum(self.latencies) / len(self.latencies) if self.latencies else 0
         max_latency = max(self.latencies) if self.latencies else 0
         
-        logger.info(f"FPS: {self.fps:.1f} | Latency: {avg_latency:.1f}ms (max: {max_latency:.1f}ms)")
+        status = f"FPS: {self.fps:.1f} | Latency: {avg_latency:.1f}ms (max: {max_latency:.1f}ms)"
+        if self.motion_gate:
+            gate = self.motion_gate.stats()
+            status += f" | Gate skip: {gate['hit_rate']:.0%}"
+            # Inference CPU is measured on the calling thread, which covers the
+            # whole invoke only for a single-threaded in-process interpreter
+            if self.model and self.model.num_threads == 1:
+                status += f" (CPU saved: {gate['cpu_saved_s']:.1f}s)"
+            elif self.model:
+                status += " (CPU saved: not measured, interpreter uses several threads)"
+        if self.stages:
+            stage_stats = [(stage.name, stage.stats()) for stage in self.stages]
+            timings = ", ".join(f"{name} {st['avg_ms']:.1f}ms" for name, st in stage_stats)
+            drops = sum(st['dropped'] for _, st in stage_stats)
+            status += f" | Stages: {timings} (queue drops: {drops})"
+        if self.pool:
+            pool = self.pool.metrics()
+            utilization = " ".join(f"{u:.0%}" for u in pool['utilization'])
+            status += (
+                f" | Pool util: {utilization}, queue: {pool['queue_depth']} "
+                f"(max {pool['max_queue_depth']}), dropped: {self.pool_dropped}"
+            )
+        sink_stats = self.sinks.stats()
+        if sink_stats:
+            timings = ", ".join(
+                f"{name} {st['avg_ms']:.1f}ms" for name, st in sink_stats.items() if 'avg_ms' in st
+            )
+            dropped = sum(st['dropped'] for st in sink_stats.values())
+            late = sum(st.get('late', 0) for st in sink_stats.values())
+            status += f" | Sinks: {timings} (dropped: {dropped}, late: {late})"
+        if self.database:
+            db = self.database.write_stats()
+            status += f" | DB: {db['rows_per_s']:.1f} rows/s, commit {db['avg_commit_ms']:.1f}ms"
+        if self.writer:
+            writer = self.writer.stats()
+            status += f" | Write-behind: {writer['pending']} pending, {writer['flushes']} flushes"
+            if writer['write_amplification'] is not None:
+                status += f", amplification {writer['write_amplification']:.1f}x"
+        if self.preview and self.preview.encoded:
+            preview = self.preview.stats()
+            status += (
+                f" | Preview: {preview['encoded']} frames, {preview['avg_encode_ms']:.1f}ms encode, "
+                f"limit {preview['fps_limit']:.1f} FPS"
+            )
+        logger.info(status)
         
         for species in CLASSES:
             qty = self.detections[species]['quantity']
@@ -112,6 +323,102 @@ class DetectionSystem:
         self.latencies.clear()
         self.last_update = now
     
+    def _database_update(self, now: float) -> dict:
+        return {
+            'detections': {species: dict(data) for species, data in self.detections.items()},
+            'fps': self.fps,
+            'timestamp': now
+        }
+    
+    def _write_database(self, update: dict):
+        target = self.writer or self.database
+        target.log(update['detections'], update['fps'], timestamp=update['timestamp'])
+    
+    def _refresh_display(self, state: dict):
+        self.display.show_detection_results(
+            species=state['species'],
+            confidence=state['confidence'],
+            fps=state['fps'],
+            stats=None
+        )
+    
+    def _record_latency(self, latency_ms: float):
+        self.latencies.append(latency_ms)
+        if latency_ms > MAX_LATENCY_MS:
+            logger.warning(f"High latency: {latency_ms:.1f}ms")
+    
+    def _submit_to_pool(self, frame, capture_time: float, infer: bool):
+        if not infer:
+            self.camera.release_frame()
+            self.pool.submit_repeat(capture_time)
+            return
+        
+        slot = self.pool.acquire_slot()
+        if slot is None:
+            # Every slot is in flight: drop this frame rather than queue stale work
+            self.camera.release_frame()
+            self.pool_dropped += 1
+            return
+        
+        self.preprocessor(frame, out=self.pool.inputs[slot:slot + 1])
+        self.camera.release_frame()
+        self.pool.submit(slot, capture_time)
+    
+    def _handle_prediction(
+        self, class_idx: int, confidence: float, current_time: float, probs: Optional[np.ndarray] = None
+    ):
+        species = CLASSES[class_idx]
+        if self.archive and probs is not None:
+            # Repeated predictions are archived too, so replays count like the live loop
+            self.archive.append(current_time, probs)
+        
+        if class_idx == NO_MOSQUITO_CLASS_IDX:
+            self.current_species = None
+            self.current_confidence = 0.0
+        elif confidence >= CONFIDENCE_THRESHOLD:
+            time_since_last = current_time - self.last_detection_time[species]
+            
+            if time_since_last >= MIN_DETECTION_INTERVAL:
+                self.detections[species]['quantity'] += 1
+                old_conf = self.detections[species]['confidence']
+                count = self.detections[species]['quantity']
+                self.detections[species]['confidence'] = (
+                    (old_conf * (count - 1) + confidence) / count if count > 1 else confidence
+                )
+                self.last_detection_time[species] = current_time
+                self.total_detections += 1
+                self.class_counts[class_idx] += 1
+                if self.events:
+                    self.sinks.submit("events", {
+                        'type': 'detection',
+                        'timestamp': current_time,
+                        'species': species,
+                        'confidence': confidence
+                    })
+                logger.debug(f"Counted {species} detection (time since last: {time_since_last:.1f}s)")
+            else:
+                logger.debug(f"Skipped {species} detection (only {time_since_last:.1f}s since last)")
+            
+            self.current_species = species
+            self.current_confidence = confidence
+        else:
+            self.current_species = None
+            self.current_confidence = confidence
+        
+        self._update_fps()
+        self.total_frames += 1
+        if self.live_state:
+            self.live_state.publish(
+                class_idx=class_idx if self.current_species is not None else None,
+                confidence=self.current_confidence,
+                fps=self.fps,
+                latencies=self.latencies,
+                frames=self.total_frames,
+                detections=self.total_detections,
+                dropped=self.pool_dropped,
+                counts=self.class_counts
+            )
+    
     def run(self):
         logger.info("Starting detection system...")
         logger.info(f"Target: {PI_CAMERA_TARGET_FPS} FPS, Latency < {TARGET_LATENCY_MS}ms")
@@ -120,53 +427,10 @@ class DetectionSystem:
         self.running = True
         
         try:
-            while self.running:
-                ret, frame = self.camera.read()
-                if not ret:
-                    time.sleep(0.01)
-                    continue
-                
-                start_time = time.time()
-                is_quantized = self.model.is_quantized if hasattr(self.model, 'is_quantized') else None
-                input_data = preprocess(frame, INPUT_SIZE, quantized=is_quantized)
-                
-                class_idx, confidence = self.model.predict(input_data)
-                latency_ms = (time.time() - start_time) * 1000
-                
-                self.latencies.append(latency_ms)
-                if latency_ms > MAX_LATENCY_MS:
-                    logger.warning(f"High latency: {latency_ms:.1f}ms")
-                
-                species = CLASSES[class_idx]
-                current_time = time.time()
-                
-                if class_idx == NO_MOSQUITO_CLASS_IDX:
-                    self.current_species = None
-                    self.current_confidence = 0.0
-                elif confidence >= CONFIDENCE_THRESHOLD:
-                    time_since_last = current_time - self.last_detection_time[species]
-                    
-                    if time_since_last >= MIN_DETECTION_INTERVAL:
-                        self.detections[species]['quantity'] += 1
-                        old_conf = self.detections[species]['confidence']
-                        count = self.detections[species]['quantity']
-                        self.detections[species]['confidence'] = (
-                            (old_conf * (count - 1) + confidence) / count if count > 1 else confidence
-                        )
-                        self.last_detection_time[species] = current_time
-                        logger.debug(f"Counted {species} detection (time since last: {time_since_last:.1f}s)")
-                    else:
-                        logger.debug(f"Skipped {species} detection (only {time_since_last:.1f}s since last)")
-                    
-                    self.current_species = species
-                    self.current_confidence = confidence
-                else:
-                    self.current_species = None
-                    self.current_confidence = confidence
-                
-                self._update_fps()
-                self._update_components()
-        
+            if PIPELINE_ENABLED:
+                self._run_pipelined()
+            else:
+                self._run_sequential()
         except KeyboardInterrupt:
             logger.info("Interrupted by user")
         except Exception as e:
@@ -174,12 +438,209 @@ class DetectionSystem:
         finally:
             self.cleanup()
     
+    def _run_sequential(self):
+        while self.running:
+            ret, frame = self.camera.read()
+            if not ret:
+                time.sleep(0.01)
+                continue
+            
+            capture_time = time.time()
+            if self.preview:
+                self.preview.offer(frame, self.camera.frame_is_rgb, capture_time)
+            infer = self.last_prediction is None
+            if self.motion_gate:
+                infer = self.motion_gate.should_infer(frame, capture_time) or infer
+            
+            if self.pool:
+                self._submit_to_pool(frame, capture_time, infer)
+                for result in self.pool.collect():
+                    self.last_prediction = (result.class_idx, result.confidence)
+                    self._record_latency(result.latency_ms)
+                    # Results can arrive in bursts; debounce on capture time
+                    self._handle_prediction(
+                        result.class_idx, result.confidence, result.capture_time, result.probs
+                    )
+            elif infer:
+                cpu_start = time.thread_time()
+                self.preprocessor(frame, out=self.model.input_view())
+                self.camera.release_frame()
+                
+                class_idx, confidence = self.model.predict_in_place()
+                self.last_prediction = (class_idx, confidence)
+                if self.archive:
+                    self.last_probs = self.model.probs[0].copy()
+                if self.motion_gate:
+                    self.motion_gate.record_inference(time.thread_time() - cpu_start)
+                
+                self._record_latency((time.time() - capture_time) * 1000)
+                self._handle_prediction(class_idx, confidence, time.time(), self.last_probs)
+            else:
+                # Static scene: reuse the last prediction without touching the model
+                self.camera.release_frame()
+                class_idx, confidence = self.last_prediction
+                self._handle_prediction(class_idx, confidence, time.time(), self.last_probs)
+            
+            self._update_components()
+    
+    def _run_pipelined(self):
+        # Capture already runs on the camera thread and hands over through the
+        # frame ring (drop-oldest); the remaining stages get their own threads.
+        shape = (1,) + self.preprocessor.output.shape[1:]
+        slots = PIPELINE_INFER_QUEUE_SIZE + 2
+        self.input_buffers = np.empty((slots,) + shape, dtype=self.preprocessor.output.dtype)
+        self.free_buffers = deque(range(slots))
+        
+        infer_queue = StageQueue(
+            PIPELINE_INFER_QUEUE_SIZE, PIPELINE_INFER_POLICY,
+            on_drop=lambda item: self._release_input_buffer(item['buffer'])
+        )
+        sink_queue = StageQueue(PIPELINE_SINK_QUEUE_SIZE, PIPELINE_SINK_POLICY)
+        self.stages = [
+            Stage("preprocess", self._preprocess_stage, outbox=infer_queue),
+            Stage("infer", self._infer_stage, inbox=infer_queue, outbox=sink_queue),
+            Stage("sink", self._sink_stage, inbox=sink_queue)
+        ]
+        for stage in self.stages:
+            stage.start()
+        logger.info(
+            f"Pipeline started (infer queue: {PIPELINE_INFER_QUEUE_SIZE}/{PIPELINE_INFER_POLICY}, "
+            f"sink queue: {PIPELINE_SINK_QUEUE_SIZE}/{PIPELINE_SINK_POLICY})"
+        )
+        
+        try:
+            while self.running:
+                time.sleep(0.2)
+                for stage in self.stages:
+                    if stage.error is not None:
+                        raise RuntimeError(f"Pipeline stage '{stage.name}' stopped: {stage.error}")
+        finally:
+            for stage in self.stages:
+                stage.stop()
+    
+    def _release_input_buffer(self, buffer: Optional[int]):
+        if buffer is not None:
+            self.free_buffers.append(buffer)
+    
+    def _preprocess_stage(self, _):
+        ret, frame = self.camera.read()
+        if not ret:
+            return ()
+        
+        capture_time = time.time()
+        if self.preview:
+            self.preview.offer(frame, self.camera.frame_is_rgb, capture_time)
+        infer = self.last_prediction is None
+        if self.motion_gate:
+            infer = self.motion_gate.should_infer(frame, capture_time) or infer
+        if not infer:
+            self.camera.release_frame()
+            return ({'capture_time': capture_time, 'buffer': None},)
+        
+        if not self.free_buffers:
+            self.camera.release_frame()
+            return ()
+        buffer = self.free_buffers.popleft()
+        cpu_start = time.thread_time()
+        self.preprocessor(frame, out=self.input_buffers[buffer])
+        preprocess_cpu = time.thread_time() - cpu_start
+        self.camera.release_frame()
+        return ({'capture_time': capture_time, 'buffer': buffer, 'preprocess_cpu': preprocess_cpu},)
+    
+    def _infer_stage(self, item):
+        buffer = item['buffer']
+        if self.pool:
+            return self._infer_with_pool(item)
+        
+        if buffer is None:
+            # Motion gate skipped this frame
+            if self.last_prediction is None:
+                return ()
+            class_idx, confidence = self.last_prediction
+        else:
+            cpu_start = time.thread_time()
+            view = self.model.input_view()
+            np.copyto(view, self.input_buffers[buffer])
+            del view
+            self._release_input_buffer(buffer)
+            
+            class_idx, confidence = self.model.predict_in_place()
+            self.last_prediction = (class_idx, confidence)
+            if self.archive:
+                # Copied: the model reuses its output buffer on the next frame
+                self.last_probs = self.model.probs[0].copy()
+            if self.motion_gate:
+                # Preprocessing ran on the capture thread
+                self.motion_gate.record_inference(time.thread_time() - cpu_start + item['preprocess_cpu'])
+        
+        return ({
+            'capture_time': item['capture_time'],
+            'class_idx': class_idx,
+            'confidence': confidence,
+            'probs': self.last_probs
+        },)
+    
+    def _infer_with_pool(self, item):
+        results = []
+        if item['buffer'] is None:
+            self.pool.submit_repeat(item['capture_time'])
+        else:
+            slot = self.pool.acquire_slot()
+            while slot is None:
+                results.extend(self.pool.collect(timeout=0.05))
+                slot = self.pool.acquire_slot()
+            np.copyto(self.pool.inputs[slot], self.input_buffers[item['buffer']][0])
+            self._release_input_buffer(item['buffer'])
+            self.pool.submit(slot, item['capture_time'])
+        results.extend(self.pool.collect())
+        
+        outputs = []
+        for result in results:
+            self.last_prediction = (result.class_idx, result.confidence)
+            outputs.append({
+                'capture_time': result.capture_time,
+                'class_idx': result.class_idx,
+                'confidence': result.confidence,
+                'probs': result.probs
+            })
+        return outputs
+    
+    def _sink_stage(self, result):
+        self._record_latency((time.time() - result['capture_time']) * 1000)
+        # Results may wait in the sink queue; debounce on capture time
+        self._handle_prediction(
+            result['class_idx'], result['confidence'], result['capture_time'], result['probs']
+        )
+        self._update_components()
+        return ()
+    
     def cleanup(self):
         logger.info("Cleaning up...")
         self.camera.release()
+        if self.pool:
+            self.pool.close()
+        if self.database and any(data['quantity'] for data in self.detections.values()):
+            # Detections counted since the last update window
+            self.sinks.submit("database", self._database_update(time.time()))
+        if self.archive:
+            # Last partial block, written when the sinks drain below
+            self.archive.close()
+        logger.info("Shutdown complete")
+        self.sinks.close()
+        if self.events:
+            self.events.close()
+        if self.live_state:
+            self.live_state.close()
+        if self.preview:
+            self.preview.close()
+        if self.writer:
+            self.writer.close()
+        if self.compactor:
+            self.compactor.stop()
+        if self.database:
+            self.database.close()
         if self.display:
             self.display.clear()
-        logger.info("Shutdown complete")
 
 
 def main():
@@ -0,0 +1,93 @@
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import MODEL_PATH, MODEL_PROFILE_PATH, MODEL_DELEGATE
+from src.model import Model
+
+
+def time_configuration(model_path: Path, num_threads: int, delegate: str, runs: int) -> float:
+    model = Model(model_path, num_threads=num_threads, delegate=delegate)
+    
+    view = model.input_view()
+    if np.issubdtype(view.dtype, np.integer):
+        info = np.iinfo(view.dtype)
+        view[:] = np.random.randint(info.min, info.max + 1, view.shape)
+    else:
+        view[:] = np.random.uniform(-1.0, 1.0, view.shape)
+    del view
+    
+    for _ in range(5):
+        model.predict_in_place()
+    
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        model.predict_in_place()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the fastest interpreter settings on this device")
+    parser.add_argument("--model", type=Path, default=MODEL_PATH, help="TFLite model path")
+    parser.add_argument("--output", type=Path, default=MODEL_PROFILE_PATH, help="Runtime profile to write")
+    parser.add_argument("--runs", type=int, default=50, help="Timed inferences per configuration")
+    parser.add_argument("--max-threads", type=int, default=os.cpu_count() or 4, help="Highest thread count to try")
+    parser.add_argument("--delegate", action="append", default=[], help="Extra external delegate library to try")
+    args = parser.parse_args()
+    
+    delegates = ["xnnpack", "none"]
+    for extra in [MODEL_DELEGATE] + args.delegate:
+        if extra and extra not in delegates:
+            delegates.append(extra)
+    
+    results = []
+    for delegate in delegates:
+        for num_threads in range(1, args.max_threads + 1):
+            try:
+                ms = time_configuration(args.model, num_threads, delegate, args.runs)
+            except Exception as e:
+                print(f"  {delegate} x{num_threads}: failed ({e})")
+                break
+            results.append((ms, num_threads, delegate))
+    
+    if not results:
+        print("No configuration could be run")
+        sys.exit(1)
+    
+    results.sort()
+    print("\n" + "=" * 70)
+    print(f"{'Delegate':<30} {'Threads':<10} {'ms/inference':<15}")
+    print("-" * 70)
+    for ms, num_threads, delegate in results:
+        print(f"{delegate:<30} {num_threads:<10} {ms:<15.2f}")
+    print("=" * 70)
+    
+    best_ms, best_threads, best_delegate = results[0]
+    profile = {
+        'model': args.model.name,
+        'model_size': args.model.stat().st_size,
+        'num_threads': best_threads,
+        'delegate': best_delegate,
+        'ms_per_inference': round(best_ms, 3),
+        'tuned_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(profile, f, indent=2)
+    
+    print(f"Fastest: {best_delegate} with {best_threads} thread(s), {best_ms:.2f} ms")
+    print(f"Profile written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import MODEL_PATH
+from src.model import Model
+
+
+def measure(model: Model, batch_size: int, seconds: float) -> float:
+    _, h, w, c = model.input_details['shape']
+    dtype = model.input_details['dtype']
+    if np.issubdtype(dtype, np.integer):
+        info = np.iinfo(dtype)
+        frames = np.random.randint(info.min, info.max + 1, (batch_size, h, w, c)).astype(dtype)
+    else:
+        frames = np.random.uniform(-1.0, 1.0, (batch_size, h, w, c)).astype(dtype)
+    
+    model.predict_batch(frames)
+    
+    processed = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        model.predict_batch(frames)
+        processed += batch_size
+    return processed / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure inference throughput versus batch size")
+    parser.add_argument("--model", type=Path, default=MODEL_PATH, help="TFLite model path")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="Batch sizes to test")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Measurement time per batch size")
+    args = parser.parse_args()
+    
+    model = Model(args.model)
+    
+    print("=" * 70)
+    print(f"Batch throughput ({args.seconds:g}s per batch size)")
+    print("=" * 70)
+    print(f"{'Batch':<10} {'Frames/s':<12} {'ms/frame':<12} {'Speedup':<10}")
+    print("-" * 70)
+    
+    baseline = None
+    for batch_size in args.batch_sizes:
+        fps = measure(model, batch_size, args.seconds)
+        baseline = baseline or fps
+        print(f"{batch_size:<10} {fps:<12.1f} {1000 / fps:<12.2f} {fps / baseline:<10.2f}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import sys
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.database import Database
+from src.visualization import DensityAnalyzer, GRANULARITIES, bucket_start
+from src import dashboard
+from tests.test_bucketing import baseline_api_data, window_start_dates
+
+
+def build(db_path: Path, rows: int, history_days: int, windows: tuple, seed: int = 0):
+    random.seed(seed)
+    db = Database(db_path)
+    now = int(time.time())
+    # Leave some days empty so zero-filling is exercised, and the first
+    # (partial) day of each window, which the old row-level queries cut at
+    # now - days while the rollups count it whole
+    empty_days = set(random.sample(range(history_days), history_days // 10))
+    skip = window_start_dates(windows)
+    batch = []
+    for _ in range(rows):
+        age = random.randint(0, history_days * 86400)
+        if age // 86400 in empty_days or datetime.fromtimestamp(now - age).date() in skip:
+            continue
+        batch.append((now - age, random.choice(("Aedes", "Culex")), random.uniform(0.72, 1.0), 10.0))
+        if len(batch) == 100000:
+            db.insert_rows(batch)
+            batch = []
+    if batch:
+        db.insert_rows(batch)
+    db.close()
+
+
+def compare(legacy, current) -> list:
+    errors = []
+    # Averages are SUM/SUM over rollups now, AVG over rows before
+    if legacy['stats'].keys() != current['stats'].keys() or any(
+        abs(value - current['stats'][species][key]) > 1e-9
+        for species, stats in legacy['stats'].items() for key, value in stats.items()
+    ):
+        errors.append("stats differ")
+    if legacy['weekly'] != current['weekly']:
+        errors.append("weekly differs")
+    current_daily = {day['date']: day for day in current['daily']}
+    for day in legacy['daily']:
+        if current_daily.get(day['date']) != day:
+            errors.append(f"daily {day['date']} differs")
+    legacy_dates = {day['date'] for day in legacy['daily']}
+    for date_str, day in current_daily.items():
+        if date_str not in legacy_dates and day['total'] != 0:
+            errors.append(f"daily {date_str} missing from the old output but not empty")
+    return errors
+
+
+def check_granularities(db_path: Path, analyzer: DensityAnalyzer, history_days: int) -> list:
+    # Every granularity must add up to the raw rows in the same buckets
+    errors = []
+    end = datetime.now()
+    start = end - timedelta(days=history_days)
+    db = Database(db_path)
+    for granularity in GRANULARITIES:
+        series = analyzer.bucketed(start, end, granularity)
+        since = int(bucket_start(start, granularity).timestamp())
+        with db.lock:
+            raw = db.conn.execute(
+                "SELECT COUNT(*) FROM detections WHERE timestamp >= ?", (since,)
+            ).fetchone()[0]
+        total = sum(row['total'] for row in series)
+        gaps = [b['start'] for a, b in zip(series, series[1:]) if b['start'] <= a['start']]
+        if total != raw or gaps:
+            errors.append(f"{granularity}: {total} counted vs {raw} raw rows, {len(gaps)} ordering errors")
+    db.close()
+    return errors
+
+
+def timed(fn, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare /api/data before and after SQL-side bucketing")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Detections to generate")
+    parser.add_argument("--history-days", type=int, default=365, help="Time span the rows cover")
+    parser.add_argument("--repeat", type=int, default=20, help="Calls per measurement")
+    parser.add_argument("--dir", type=Path, default=None, help="Directory for the test database")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        db_path = Path(tmp) / "detections.db"
+
+        print("=" * 70)
+        print(f"Bucketing benchmark: {args.rows:,} rows over {args.history_days} days")
+        print("=" * 70)
+        start = time.perf_counter()
+        windows = (7, 30, 90, args.history_days)
+        build(db_path, args.rows, args.history_days, windows)
+        print(f"Generated database in {time.perf_counter() - start:.1f}s")
+
+        # Time the queries and the Python around them, not the result cache
+        analyzer = DensityAnalyzer(db_path, cache_entries=0)
+        dashboard.analyzer = analyzer
+
+        ok = True
+        print("-" * 70)
+        print(f"{'Days':<8} {'Old (ms)':<12} {'New (ms)':<12} {'Speedup':<10} {'Output':<20}")
+        print("-" * 70)
+        for days in windows:
+            old_s, legacy = timed(lambda: baseline_api_data(db_path, days), args.repeat)
+            new_s, response = timed(lambda: dashboard.build_data(days), args.repeat)
+            errors = compare(legacy, response)
+            ok = ok and not errors
+            print(f"{days:<8} {old_s * 1000:<12.2f} {new_s * 1000:<12.2f} {old_s / new_s:<10.1f} "
+                  f"{'same' if not errors else errors[0]:<20}")
+
+        errors = check_granularities(db_path, analyzer, args.history_days)
+        for error in errors:
+            print(f"  {error}")
+        ok = ok and not errors
+        analyzer.close()
+
+        print("=" * 70)
+        print("PASS" if ok else "FAIL")
+        print("=" * 70)
+        sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
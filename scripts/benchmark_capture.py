@@ -0,0 +1,97 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import (
+    INPUT_SIZE, PI_CAMERA_INDEX, PI_CAMERA_WIDTH, PI_CAMERA_HEIGHT, PI_CAMERA_TARGET_FPS
+)
+from src.preprocessing import preprocess
+
+
+def bench_full_path(frames: int) -> float:
+    # picamera2 RGB888 main stream -> BGR -> resize -> RGB (current path)
+    rgb888 = np.random.randint(0, 256, (PI_CAMERA_HEIGHT, PI_CAMERA_WIDTH, 3), dtype=np.uint8)
+    slot = np.empty_like(rgb888)
+    
+    start = time.process_time()
+    for _ in range(frames):
+        cv2.cvtColor(rgb888, cv2.COLOR_RGB2BGR, dst=slot)
+        preprocess(slot, INPUT_SIZE, quantized=True)
+    return (time.process_time() - start) / frames
+
+
+def bench_model_path(frames: int) -> float:
+    # picamera2 YUV420 lores stream at INPUT_SIZE -> RGB (model capture mode)
+    w, h = INPUT_SIZE
+    yuv = np.random.randint(0, 256, (h * 3 // 2, w), dtype=np.uint8)
+    slot = np.empty((h, w, 3), dtype=np.uint8)
+    
+    start = time.process_time()
+    for _ in range(frames):
+        cv2.cvtColor(yuv, cv2.COLOR_YUV2RGB_I420, dst=slot)
+        preprocess(slot, INPUT_SIZE, quantized=True, rgb_input=True)
+    return (time.process_time() - start) / frames
+
+
+def bench_live(mode: str, frames: int) -> float:
+    from src.pi_camera import PiCamera
+    
+    camera = PiCamera(
+        camera_index=PI_CAMERA_INDEX,
+        width=PI_CAMERA_WIDTH,
+        height=PI_CAMERA_HEIGHT,
+        target_fps=PI_CAMERA_TARGET_FPS,
+        capture_mode=mode,
+        model_size=INPUT_SIZE
+    )
+    try:
+        camera.read()
+        count = 0
+        start = time.process_time()
+        while count < frames:
+            ret, frame = camera.read()
+            if not ret:
+                continue
+            preprocess(frame, INPUT_SIZE, quantized=True, rgb_input=camera.frame_is_rgb)
+            camera.release_frame()
+            count += 1
+        # Includes the capture thread, since process_time covers all threads.
+        return (time.process_time() - start) / frames
+    finally:
+        camera.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-frame CPU cost of capture modes")
+    parser.add_argument("--frames", type=int, default=500, help="Frames per measurement")
+    parser.add_argument("--live", action="store_true", help="Measure the real camera instead of synthetic frames")
+    args = parser.parse_args()
+    
+    if args.live:
+        full = bench_live("full", args.frames)
+        model = bench_live("model", args.frames)
+    else:
+        full = bench_full_path(args.frames)
+        model = bench_model_path(args.frames)
+    
+    print("=" * 70)
+    print(f"Capture benchmark ({'live camera' if args.live else 'synthetic frames'}, {args.frames} frames)")
+    print("=" * 70)
+    print(f"{'Mode':<10} {'CPU ms/frame':<15}")
+    print("-" * 70)
+    print(f"{'full':<10} {full * 1000:<15.3f}")
+    print(f"{'model':<10} {model * 1000:<15.3f}")
+    print("-" * 70)
+    if model > 0:
+        print(f"Speedup: {full / model:.1f}x")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import DB_SYNCHRONOUS, DB_JOURNAL_SIZE_LIMIT
+from src.database import Database
+
+
+def make_window(rows: int) -> dict:
+    half = rows // 2
+    return {
+        'Aedes': {'quantity': half, 'confidence': 0.91},
+        'Culex': {'quantity': rows - half, 'confidence': 0.84}
+    }
+
+
+def legacy_log(db_path: Path, detections: dict, fps: float):
+    # Connection per flush and one INSERT per row, as Database.log used to do
+    conn = sqlite3.connect(str(db_path))
+    cursor = conn.cursor()
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for species, data in detections.items():
+        for _ in range(data['quantity']):
+            cursor.execute("""
+                INSERT INTO detections (timestamp, species, confidence, fps)
+                VALUES (?, ?, ?, ?)
+            """, (timestamp, species, data['confidence'], fps))
+    conn.commit()
+    conn.close()
+
+
+def run_legacy(db_path: Path, flushes: int, rows: int) -> float:
+    # Same schema, default rollback journal
+    Database(db_path).close()
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.close()
+
+    window = make_window(rows)
+    start = time.perf_counter()
+    for _ in range(flushes):
+        legacy_log(db_path, window, 10.0)
+    return time.perf_counter() - start
+
+
+def run_persistent(db_path: Path, flushes: int, rows: int) -> float:
+    db = Database(db_path, synchronous=DB_SYNCHRONOUS, journal_size_limit=DB_JOURNAL_SIZE_LIMIT)
+    window = make_window(rows)
+    start = time.perf_counter()
+    for _ in range(flushes):
+        db.log(window, 10.0)
+    elapsed = time.perf_counter() - start
+    db.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare legacy and persistent WAL database writes")
+    parser.add_argument("--flushes", type=int, default=500, help="Number of log() flushes")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 5, 20], help="Rows per flush")
+    parser.add_argument("--dir", type=Path, default=None,
+                        help="Directory for the test databases (use the SD card to see fsync cost)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        tmp = Path(tmp)
+
+        print("=" * 70)
+        print(f"Database write throughput ({args.flushes} flushes, {tmp})")
+        print("=" * 70)
+        print(f"{'Rows/flush':<12} {'Legacy rows/s':<16} {'WAL rows/s':<16} {'Legacy ms':<12} {'WAL ms':<10}")
+        print("-" * 70)
+
+        for rows in args.rows:
+            legacy = run_legacy(tmp / f"legacy_{rows}.db", args.flushes, rows)
+            persistent = run_persistent(tmp / f"wal_{rows}.db", args.flushes, rows)
+            total = args.flushes * rows
+            print(
+                f"{rows:<12} {total / legacy:<16.0f} {total / persistent:<16.0f} "
+                f"{legacy / args.flushes * 1000:<12.2f} {persistent / args.flushes * 1000:<10.2f}"
+            )
+        print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
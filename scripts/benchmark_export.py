@@ -0,0 +1,155 @@
+import os
+import sys
+import json
+import time
+import signal
+import sqlite3
+import argparse
+import resource
+import subprocess
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import DASHBOARD_EXPORT_PAGE_ROWS
+from src.database import Database
+from src.raw_detections import COLUMNS, RawDetections
+
+
+def build(db_path: Path, rows: int, days: int):
+    # Schema from Database, rows generated inside SQLite (rollups are not
+    # needed for raw exports)
+    Database(db_path).close()
+    conn = sqlite3.connect(str(db_path))
+    start = int(time.time()) - days * 86400
+    step = days * 86400 / rows
+    conn.execute("""
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i + 1 < ?)
+        INSERT INTO detections (timestamp, species, confidence, fps)
+        SELECT ? + CAST(i * ? AS INTEGER), CASE i % 3 WHEN 0 THEN 'Culex' ELSE 'Aedes' END,
+               0.5 + (i % 50) / 100.0, 9.5 + (i % 7) / 10.0
+        FROM n
+    """, (rows, start, step))
+    conn.commit()
+    conn.close()
+
+
+def export(db_path: Path, fmt: str, page_rows: int, oneshot: bool):
+    # Runs in its own process so peak RSS belongs to this export alone
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    raw = RawDetections(db_path, page_size=page_rows)
+    out = open(os.devnull, "wb")
+    total = 0
+    lines = 0
+    start_time = time.perf_counter()
+    if oneshot:
+        # Naive dump for comparison: one query, one read transaction throughout
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        cursor = conn.execute("SELECT id, timestamp, species, confidence, fps FROM detections ORDER BY timestamp, id")
+        for row in cursor:
+            lines += 1
+            total += out.write((json.dumps(dict(zip(COLUMNS, row))) + "\n").encode())
+        conn.close()
+    else:
+        chunks = raw.export_csv(0, 2 ** 62) if fmt == "csv" else raw.export_ndjson(0, 2 ** 62)
+        for chunk in chunks:
+            lines += chunk.count(b"\n")
+            total += out.write(chunk)
+        if fmt == "csv":
+            lines -= 1
+    elapsed = time.perf_counter() - start_time
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'rows': lines, 'bytes': total, 'seconds': elapsed, 'rss_growth_kb': peak - baseline}))
+
+
+def writer(db_path: Path, interval: float):
+    # Stands in for the detector: small commits through Database
+    db = Database(db_path)
+    latencies = []
+    try:
+        while True:
+            start = time.perf_counter()
+            db.insert_rows([(int(time.time()), "Aedes", 0.9, 10.0)])
+            latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    latencies.sort()
+    print(json.dumps({'commits': len(latencies), 'max_ms': latencies[-1] if latencies else 0.0}), flush=True)
+    db.close()
+
+
+def run(db_path: Path, fmt: str, page_rows: int, oneshot: bool, interval: float):
+    wal = Path(f"{db_path}-wal")
+    write = subprocess.Popen(
+        [sys.executable, __file__, "--writer", str(db_path), str(interval)],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    time.sleep(1.0)
+    reader = subprocess.Popen(
+        [sys.executable, __file__, "--export", str(db_path), fmt, str(page_rows), "1" if oneshot else "0"],
+        stdout=subprocess.PIPE, text=True
+    )
+    wal_peak = 0
+    while reader.poll() is None:
+        wal_peak = max(wal_peak, wal.stat().st_size if wal.exists() else 0)
+        time.sleep(0.2)
+    result = json.loads(reader.communicate()[0])
+    write.send_signal(signal.SIGINT)
+    result.update(json.loads(write.communicate()[0]))
+    result['wal_peak'] = wal_peak
+    return result
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--export":
+        export(Path(sys.argv[2]), sys.argv[3], int(sys.argv[4]), sys.argv[5] == "1")
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "--writer":
+        writer(Path(sys.argv[2]), float(sys.argv[3]))
+        return
+
+    parser = argparse.ArgumentParser(description="Measure raw detection export throughput and memory")
+    parser.add_argument("--db", type=Path, default=Path("/tmp/export_benchmark.db"), help="Benchmark database (reused)")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Rows to generate if the database is new")
+    parser.add_argument("--days", type=int, default=180, help="Time span of the generated rows")
+    parser.add_argument("--page-rows", type=int, default=DASHBOARD_EXPORT_PAGE_ROWS, help="Rows per query")
+    parser.add_argument("--write-interval", type=float, default=0.05, help="Seconds between concurrent writer commits")
+    parser.add_argument("--oneshot", action="store_true", help="Also run a single-query json.dumps export")
+    args = parser.parse_args()
+
+    if not args.db.exists():
+        print(f"Generating {args.rows:,} rows in {args.db}...")
+        start = time.perf_counter()
+        build(args.db, args.rows, args.days)
+        print(f"  done in {time.perf_counter() - start:.1f}s")
+    conn = sqlite3.connect(str(args.db))
+    rows = conn.execute("SELECT COUNT(*) FROM detections").fetchone()[0]
+    conn.close()
+    ok = True
+
+    modes = [("csv", False), ("ndjson", False)] + ([("ndjson", True)] if args.oneshot else [])
+    print("=" * 70)
+    print(f"Export benchmark: {rows:,} rows, {args.page_rows} rows/page, writer every {args.write_interval}s")
+    print("=" * 70)
+    print(f"{'Mode':<18} {'Rows/s':<11} {'MB/s':<7} {'Time (s)':<9} {'RSS +MB':<8} "
+          f"{'Max commit':<11} {'WAL peak':<8}")
+    print("-" * 70)
+    for fmt, oneshot in modes:
+        result = run(args.db, fmt, args.page_rows, oneshot, args.write_interval)
+        label = f"{fmt} ({'one query' if oneshot else 'paged'})"
+        # Every pre-existing row plus whatever the writer added meanwhile
+        ok = ok and result['rows'] >= rows
+        print(f"{label:<18} {result['rows'] / result['seconds']:<11,.0f} "
+              f"{result['bytes'] / result['seconds'] / 1e6:<7.1f} {result['seconds']:<9.1f} "
+              f"{result['rss_growth_kb'] / 1024:<8.1f} {result['max_ms']:<8.1f} ms "
+              f"{result['wal_peak'] / 1e6:<5.1f} MB")
+    print("=" * 70)
+    print("RSS +MB: peak resident memory growth of the exporting process")
+    print("Max commit: slowest concurrent detector commit during the export")
+    print("PASS" if ok else "FAIL: rows missing from an export")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import MODEL_PATH, INPUT_SIZE, INPUT_NORMALIZATION
+from src.model import Model
+from src.preprocessing import Preprocessor, preprocess
+
+
+def legacy_overhead(model: Model, frame: np.ndarray, runs: int) -> Tuple[float, float]:
+    # The pre-zero-copy path: preprocess into new arrays, set_tensor, get_tensor, dequantize.
+    interpreter = model.interpreter
+    input_details = model.input_details
+    output_details = model.output_details
+    
+    prep_total = 0.0
+    io_total = 0.0
+    for _ in range(runs):
+        start = time.perf_counter()
+        input_data = preprocess(frame, INPUT_SIZE, quantized=model.is_quantized)
+        if input_details['dtype'] == np.int8:
+            input_data = np.subtract(input_data, 128, dtype=np.int16).astype(np.int8)
+        elif input_details['dtype'] == np.float32:
+            input_data = (input_data.astype(np.float32) - 127.5) / 127.5
+        prepared = time.perf_counter()
+        interpreter.set_tensor(input_details['index'], input_data)
+        before_invoke = time.perf_counter()
+        
+        interpreter.invoke()
+        
+        after_invoke = time.perf_counter()
+        output = interpreter.get_tensor(output_details['index'])[0]
+        if output_details['dtype'] in [np.int8, np.uint8]:
+            scale, zero_point = output_details['quantization']
+            output = (output.astype(np.float32) - zero_point) * scale
+        if output.min() < 0 or output.sum() > 1.1:
+            exp_output = np.exp(output - np.max(output))
+            output = exp_output / exp_output.sum()
+        int(np.argmax(output))
+        end = time.perf_counter()
+        
+        prep_total += prepared - start
+        io_total += (before_invoke - prepared) + (end - after_invoke)
+    return prep_total / runs, io_total / runs
+
+
+def zero_copy_overhead(model: Model, frame: np.ndarray, runs: int) -> Tuple[float, float]:
+    preprocessor = Preprocessor(
+        target_size=INPUT_SIZE,
+        input_dtype=model.input_details['dtype'],
+        quantization=model.input_details['quantization'],
+        normalization=INPUT_NORMALIZATION
+    )
+    interpreter = model.interpreter
+    
+    prep_total = 0.0
+    io_total = 0.0
+    for _ in range(runs):
+        start = time.perf_counter()
+        preprocessor(frame, out=model.input_view())
+        prepared = time.perf_counter()
+        interpreter.invoke()
+        invoked = time.perf_counter()
+        output = model._read_output()
+        int(np.argmax(output))
+        end = time.perf_counter()
+        
+        prep_total += prepared - start
+        io_total += end - invoked
+    return prep_total / runs, io_total / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-inference overhead outside invoke()")
+    parser.add_argument("--model", type=Path, default=MODEL_PATH, help="TFLite model path")
+    parser.add_argument("--runs", type=int, default=200, help="Inferences per measurement")
+    args = parser.parse_args()
+    
+    model = Model(args.model)
+    frame = np.random.randint(0, 256, (480, 640, 3), dtype=np.uint8)
+    
+    # Warm up both paths
+    legacy_overhead(model, frame, 5)
+    zero_copy_overhead(model, frame, 5)
+    
+    before = legacy_overhead(model, frame, args.runs)
+    after = zero_copy_overhead(model, frame, args.runs)
+    
+    print("=" * 70)
+    print(f"Overhead outside invoke() ({args.runs} runs)")
+    print("=" * 70)
+    print(f"{'Path':<20} {'Preprocess ms':<15} {'Tensor I/O ms':<15} {'Total ms':<15}")
+    print("-" * 70)
+    for name, (prep, io) in (("set/get_tensor", before), ("zero-copy views", after)):
+        print(f"{name:<20} {prep * 1000:<15.3f} {io * 1000:<15.4f} {(prep + io) * 1000:<15.3f}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import sys
+import time
+import argparse
+import subprocess
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import (
+    INPUT_SIZE, PI_CAMERA_WIDTH, PI_CAMERA_HEIGHT,
+    PREVIEW_WIDTH, PREVIEW_MAX_FPS, PREVIEW_QUALITY, PREVIEW_CPU_BUDGET
+)
+from src.preprocessing import preprocess
+from src.preview import PreviewPublisher, PreviewHub
+
+SEGMENT = "mosquito_preview_bench"
+
+
+def viewer(duration: float):
+    # Stands in for the dashboard with one /stream.mjpg client
+    hub = PreviewHub(SEGMENT)
+    position = hub.subscribe()
+    print("ready", flush=True)
+    frames = 0
+    end = time.time() + duration
+    while time.time() < end:
+        frame, position = hub.wait(position, timeout=0.5)
+        if frame is not None:
+            frames += 1
+    hub.unsubscribe()
+    print(frames, flush=True)
+
+
+def calibrate(work_ms: float):
+    # CPU-bound stand-in for model inference (no model file needed)
+    a = np.random.rand(128, 128).astype(np.float32)
+    for _ in range(200):
+        a @ a
+    start = time.perf_counter()
+    for _ in range(1000):
+        a @ a
+    per_op = (time.perf_counter() - start) / 1000
+    return a, max(1, round(work_ms / 1000 / per_op))
+
+
+def detection_loop(frames, work, ops: int, duration: float, publisher=None):
+    latencies = []
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        frame = frames[count % len(frames)]
+        frame_start = time.perf_counter()
+        if publisher:
+            publisher.offer(frame, False, time.time())
+        preprocess(frame, INPUT_SIZE, quantized=True)
+        for _ in range(ops):
+            work @ work
+        latencies.append((time.perf_counter() - frame_start) * 1000)
+        count += 1
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return count / elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)]
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--viewer":
+        viewer(float(sys.argv[2]))
+        return
+
+    parser = argparse.ArgumentParser(description="Measure detection FPS with the MJPEG preview off and on")
+    parser.add_argument("--duration", type=float, default=8.0, help="Seconds per run")
+    parser.add_argument("--work-ms", type=float, default=50.0, help="Simulated inference time per frame")
+    parser.add_argument("--rounds", type=int, default=3, help="Interleaved rounds per mode (median is shown)")
+    args = parser.parse_args()
+
+    # Textured frames so JPEG encoding costs what a real scene would
+    rng = np.random.default_rng(0)
+    base = np.linspace(0, 255, PI_CAMERA_WIDTH, dtype=np.float32)[None, :, None]
+    frames = [
+        np.clip(base + rng.normal(0, 40, (PI_CAMERA_HEIGHT, PI_CAMERA_WIDTH, 3)), 0, 255).astype(np.uint8)
+        for _ in range(8)
+    ]
+    work, ops = calibrate(args.work_ms)
+
+    print("=" * 70)
+    print(f"Preview benchmark: {PI_CAMERA_WIDTH}x{PI_CAMERA_HEIGHT} frames, ~{args.work_ms:.0f} ms simulated "
+          f"inference, preview {PREVIEW_WIDTH}px at <= {PREVIEW_MAX_FPS:.0f} FPS")
+    print("=" * 70)
+    print(f"{'Mode':<22} {'FPS':<9} {'p50 (ms)':<10} {'p95 (ms)':<10} {'Preview frames':<16}")
+    print("-" * 70)
+
+    # Modes are interleaved over several rounds and the median kept, so
+    # background noise on the device does not land on one mode.
+    modes = ("off", "on, no viewer", "on, 1 viewer")
+    runs = {mode: [] for mode in modes}
+    delivered = {mode: [] for mode in modes}
+    for _ in range(args.rounds):
+        for mode in modes:
+            publisher = None
+            view = None
+            if mode != "off":
+                publisher = PreviewPublisher(
+                    SEGMENT, width=PREVIEW_WIDTH, max_fps=PREVIEW_MAX_FPS,
+                    quality=PREVIEW_QUALITY, cpu_budget=PREVIEW_CPU_BUDGET
+                )
+            if mode == "on, 1 viewer":
+                view = subprocess.Popen(
+                    [sys.executable, __file__, "--viewer", str(args.duration + 0.5)],
+                    stdout=subprocess.PIPE, text=True
+                )
+                # Keep the viewer's interpreter startup out of the measurement
+                view.stdout.readline()
+                time.sleep(0.5)
+            runs[mode].append(detection_loop(frames, work, ops, args.duration, publisher))
+            if view:
+                delivered[mode].append((int(view.communicate()[0]), publisher.stats()['avg_encode_ms']))
+            if publisher:
+                publisher.close()
+
+    results = {}
+    for mode in modes:
+        fps, p50, p95 = sorted(runs[mode])[len(runs[mode]) // 2]
+        results[mode] = fps
+        shown = "-"
+        if delivered[mode]:
+            frames_seen = sum(d[0] for d in delivered[mode]) / len(delivered[mode])
+            encode_ms = sum(d[1] for d in delivered[mode]) / len(delivered[mode])
+            shown = f"{frames_seen / args.duration:.1f}/s ({encode_ms:.1f} ms)"
+        print(f"{mode:<22} {fps:<9.2f} {p50:<10.1f} {p95:<10.1f} {shown:<16}")
+
+    print("=" * 70)
+    drop = 1 - results["on, 1 viewer"] / results["off"]
+    print(f"FPS change with a viewer connected: {-drop:+.1%}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
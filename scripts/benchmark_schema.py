@@ -0,0 +1,146 @@
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.database import Database
+from src.visualization import DensityAnalyzer
+
+SPECIES = ["Aedes", "Culex"]
+
+
+def build_legacy(db_path: Path, rows: int, days: int):
+    # v1 layout: text timestamps, no index
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("""
+        CREATE TABLE detections (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME NOT NULL,
+            species TEXT NOT NULL,
+            confidence REAL NOT NULL,
+            fps REAL
+        )
+    """)
+    start = datetime.now() - timedelta(days=days)
+    step = days * 86400 / rows
+    rng = random.Random(0)
+    
+    def generate():
+        for i in range(rows):
+            when = start + timedelta(seconds=i * step)
+            yield (when.strftime("%Y-%m-%d %H:%M:%S"), SPECIES[i % 2], rng.uniform(0.7, 1.0), 10.0)
+    
+    with conn:
+        conn.executemany(
+            "INSERT INTO detections (timestamp, species, confidence, fps) VALUES (?, ?, ?, ?)",
+            generate()
+        )
+    conn.close()
+
+
+def legacy_queries(db_path: Path, days: int):
+    # The v1 query shapes: the column is wrapped in datetime(), so every row is scanned
+    conn = sqlite3.connect(str(db_path))
+    since = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    hour = datetime.now().strftime("%Y-%m-%d %H:00:00")
+    timings = {}
+    
+    start = time.perf_counter()
+    conn.execute("""
+        SELECT DATE(timestamp) as date, species, COUNT(*) FROM detections
+        WHERE datetime(timestamp) >= datetime(?) GROUP BY DATE(timestamp), species
+    """, (since,)).fetchall()
+    timings['weekly'] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    conn.execute("""
+        SELECT species, COUNT(*), AVG(confidence), MIN(confidence), MAX(confidence) FROM detections
+        WHERE datetime(timestamp) >= datetime(?) GROUP BY species
+    """, (since,)).fetchall()
+    timings['statistics'] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    conn.execute("""
+        SELECT species, COUNT(*), AVG(confidence) FROM detections
+        WHERE datetime(timestamp) >= datetime(?) GROUP BY species
+    """, (hour,)).fetchall()
+    timings['hour'] = time.perf_counter() - start
+    
+    conn.close()
+    return timings
+
+
+def current_queries(db: Database, analyzer: DensityAnalyzer, days: int):
+    timings = {}
+    
+    start = time.perf_counter()
+    analyzer.get_weekly_data(days=days)
+    timings['weekly'] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    analyzer.get_statistics(days=days)
+    timings['statistics'] = time.perf_counter() - start
+    
+    hour_start = datetime.now().replace(minute=0, second=0, microsecond=0)
+    start = time.perf_counter()
+    with db.lock:
+        db.conn.execute("""
+            SELECT species, count, confidence_sum / count FROM rollup_hour WHERE bucket >= ?
+        """, (int(hour_start.timestamp()),)).fetchall()
+    timings['hour'] = time.perf_counter() - start
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark v1 queries against the current schema, including the migration")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Detections to generate")
+    parser.add_argument("--history-days", type=int, default=365, help="Time span the rows cover")
+    parser.add_argument("--query-days", type=int, default=7, help="Dashboard query window")
+    parser.add_argument("--dir", type=Path, default=None, help="Directory for the test database")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        db_path = Path(tmp) / "detections.db"
+        
+        print("=" * 70)
+        print(f"Schema benchmark: {args.rows:,} rows over {args.history_days} days, "
+              f"{args.query_days}-day queries")
+        print("=" * 70)
+        
+        start = time.perf_counter()
+        build_legacy(db_path, args.rows, args.history_days)
+        print(f"Generated v1 database in {time.perf_counter() - start:.1f}s")
+        
+        legacy = legacy_queries(db_path, args.query_days)
+        
+        start = time.perf_counter()
+        db = Database(db_path)
+        print(f"Migrated to v{db.schema_version()} (including rollups) in {time.perf_counter() - start:.1f}s")
+        
+        # Measure the queries themselves, not the result cache
+        analyzer = DensityAnalyzer(db_path, cache_entries=0)
+        current_queries(db, analyzer, args.query_days)
+        current = current_queries(db, analyzer, args.query_days)
+        
+        print("-" * 70)
+        print(f"{'Query':<14} {'v1 (ms)':<14} {'Current (ms)':<14} {'Speedup':<10}")
+        print("-" * 70)
+        for name in legacy:
+            print(f"{name:<14} {legacy[name] * 1000:<14.1f} {current[name] * 1000:<14.2f} "
+                  f"{legacy[name] / max(current[name], 1e-9):<10.0f}x")
+        print("=" * 70)
+        
+        analyzer.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
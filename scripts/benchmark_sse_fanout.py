@@ -0,0 +1,219 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import DASHBOARD_THREADS, DASHBOARD_STREAM_LIMIT, EVENTS_KEEPALIVE
+from src.events import EventPublisher
+from src.serving import WAITRESS_AVAILABLE
+
+
+def free_port(kind: int) -> int:
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(db_path: Path, http_port: int, events_port: int, server: str, threads: int, streams: int):
+    # The same server and thread budget the dashboard runs with
+    from src import dashboard
+    from src.database import Database
+    from src.events import EventHub
+    from src.serving import StreamSlots, serve as run
+    from src.visualization import DensityAnalyzer
+
+    db = Database(db_path)
+    now = int(time.time())
+    db.insert_rows([(now - i * 60, ("Aedes", "Culex")[i % 2], 0.9, 10.0) for i in range(7 * 1440)])
+    db.close()
+    dashboard.analyzer = DensityAnalyzer(db_path)
+    dashboard.events = EventHub("127.0.0.1", events_port)
+    dashboard.streams = StreamSlots(streams)
+    run(dashboard.app, "127.0.0.1", http_port, server=server, threads=threads, streams=streams)
+
+
+def cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def stream_client(
+    port: int, expected: int, latencies: list, rejected: list, ready: threading.Barrier, done: threading.Event
+):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.request("GET", "/api/stream")
+    response = conn.getresponse()
+    if response.status != 200:
+        # Past DASHBOARD_STREAM_LIMIT; the page would fall back to polling
+        rejected.append(response.status)
+        conn.close()
+        ready.wait()
+        return
+    response.readline()  # retry: line
+    response.readline()
+    ready.wait()
+    received = 0
+    while received < expected and not done.is_set():
+        line = response.readline()
+        if not line:
+            break
+        if line.startswith(b"data: "):
+            event = json.loads(line[6:])
+            latencies.append(time.time() - event['sent'])
+            received += 1
+    conn.close()
+
+
+def poll_client(port: int, interval: float, duration: float, ready: threading.Barrier, counter: list):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    ready.wait()
+    end = time.time() + duration
+    while time.time() < end:
+        conn.request("GET", "/api/data?days=7")
+        conn.getresponse().read()
+        counter.append(1)
+        time.sleep(interval)
+    conn.close()
+
+
+def wait_for_streams_closed(port: int):
+    # A closed viewer only frees its slot once a write fails, which can take
+    # two EVENTS_KEEPALIVE intervals, so let the previous run drain first
+    end = time.time() + 3 * EVENTS_KEEPALIVE
+    while time.time() < end:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        conn.request("GET", "/api/status")
+        active = json.loads(conn.getresponse().read())['streams']['active']
+        conn.close()
+        if active == 0:
+            return
+        time.sleep(0.5)
+
+
+def run_stream(port: int, events_port: int, server_pid: int, clients: int, events: int, rate: float):
+    latencies = []
+    rejected = []
+    ready = threading.Barrier(clients + 1)
+    done = threading.Event()
+    threads = [
+        threading.Thread(target=stream_client, args=(port, events, latencies, rejected, ready, done), daemon=True)
+        for _ in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    time.sleep(0.2)
+
+    publisher = EventPublisher("127.0.0.1", events_port)
+    cpu_start = cpu_seconds(server_pid)
+    start = time.time()
+    for i in range(events):
+        publisher.publish({'type': 'detection', 'seq': i, 'species': 'Aedes', 'confidence': 0.9, 'sent': time.time()})
+        time.sleep(max(0.0, start + (i + 1) / rate - time.time()))
+    for thread in threads:
+        thread.join(timeout=5.0)
+    done.set()
+    cpu = cpu_seconds(server_pid) - cpu_start
+    elapsed = time.time() - start
+    publisher.close()
+
+    latencies.sort()
+    accepted = clients - len(rejected)
+    delivered = len(latencies) / (accepted * events) if accepted else 0.0
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else float("nan")
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else float("nan")
+    return delivered, len(rejected), p50, p99, cpu / elapsed
+
+
+def run_poll(port: int, server_pid: int, clients: int, interval: float, duration: float):
+    counter = []
+    ready = threading.Barrier(clients + 1)
+    threads = [
+        threading.Thread(target=poll_client, args=(port, interval, duration, ready, counter), daemon=True)
+        for _ in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    cpu_start = cpu_seconds(server_pid)
+    start = time.time()
+    for thread in threads:
+        thread.join()
+    return len(counter), (cpu_seconds(server_pid) - cpu_start) / (time.time() - start)
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--serve":
+        serve(Path(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4]), sys.argv[5], int(sys.argv[6]), int(sys.argv[7]))
+        return
+
+    parser = argparse.ArgumentParser(description="Measure SSE fan-out to many dashboard viewers against polling")
+    parser.add_argument("--clients", default="1,10,50", help="Comma-separated viewer counts")
+    parser.add_argument("--events", type=int, default=20, help="Events published per run")
+    # The detector sends one stats event per UPDATE_INTERVAL plus one per counted detection
+    parser.add_argument("--rate", type=float, default=1.0, help="Events per second")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Polling interval for the comparison (s)")
+    parser.add_argument("--server", default="waitress" if WAITRESS_AVAILABLE else "werkzeug",
+                        help="Server mode passed to serving.serve()")
+    parser.add_argument("--threads", type=int, default=DASHBOARD_THREADS, help="Server worker threads")
+    parser.add_argument("--streams", type=int, default=DASHBOARD_STREAM_LIMIT, help="Extra threads for live streams")
+    args = parser.parse_args()
+
+    http_port = free_port(socket.SOCK_STREAM)
+    events_port = free_port(socket.SOCK_DGRAM)
+    with tempfile.TemporaryDirectory() as tmp:
+        server = subprocess.Popen(
+            [sys.executable, __file__, "--serve", str(Path(tmp) / "detections.db"), str(http_port), str(events_port),
+             args.server, str(args.threads), str(args.streams)],
+            stderr=subprocess.DEVNULL
+        )
+        try:
+            for _ in range(100):
+                try:
+                    socket.create_connection(("127.0.0.1", http_port), timeout=0.1).close()
+                    break
+                except OSError:
+                    time.sleep(0.1)
+
+            print("=" * 70)
+            print(f"SSE fan-out: {args.events} events at {args.rate:.0f}/s; polling every {args.poll_interval}s")
+            print(f"Server: {args.server}, {args.threads} threads + {args.streams} for streams")
+            print("=" * 70)
+            print(f"{'Viewers':<9} {'Delivered':<11} {'503':<5} {'p50 (ms)':<10} {'p99 (ms)':<10} "
+                  f"{'SSE CPU':<9} {'Poll CPU':<9} {'Polls':<6}")
+            print("-" * 70)
+            ok = True
+            for clients in (int(c) for c in args.clients.split(",")):
+                wait_for_streams_closed(http_port)
+                delivered, rejected, p50, p99, stream_cpu = run_stream(
+                    http_port, events_port, server.pid, clients, args.events, args.rate
+                )
+                polls, poll_cpu = run_poll(
+                    http_port, server.pid, clients, args.poll_interval, args.events / args.rate
+                )
+                # Every accepted viewer gets every event; only viewers past the cap are turned away
+                ok = ok and delivered == 1.0 and rejected == max(0, clients - args.streams)
+                print(f"{clients:<9} {delivered:<11.1%} {rejected:<5} {p50:<10.1f} {p99:<10.1f} "
+                      f"{stream_cpu:<9.1%} {poll_cpu:<9.1%} {polls:<6}")
+            print("=" * 70)
+            print("CPU: server process CPU time / wall time while the run was active; "
+                  "503: viewers past the stream limit")
+            print("PASS" if ok else "FAIL: some viewers missed events or were turned away below the limit")
+        finally:
+            server.terminate()
+            server.wait()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import DB_SYNCHRONOUS, DB_JOURNAL_SIZE_LIMIT
+from src.database import Database
+from src.write_behind import WriteBehindBuffer, encode_record, read_proc_write_bytes
+
+WINDOW = {'Aedes': {'quantity': 1, 'confidence': 0.91}}
+
+
+def run(db_path: Path, windows: int, write_behind: bool, flush_events: int, fsync: bool = True):
+    db = Database(db_path, synchronous=DB_SYNCHRONOUS, journal_size_limit=DB_JOURNAL_SIZE_LIMIT)
+    writer = None
+    if write_behind:
+        writer = WriteBehindBuffer(
+            db, db_path.with_suffix(".journal"), flush_interval=3600, flush_events=flush_events, fsync=fsync
+        )
+    target = writer or db
+
+    os.sync()
+    io_start = read_proc_write_bytes()
+    start = time.perf_counter()
+    base = int(time.time())
+    for i in range(windows):
+        target.log(WINDOW, 10.0, timestamp=base + i)
+    if writer:
+        writer.close()
+    # Checkpoint so WAL contents reach the main file in both runs
+    db.close()
+    os.sync()
+    elapsed = time.perf_counter() - start
+    io_bytes = read_proc_write_bytes() - io_start if io_start is not None else None
+    return elapsed, db.commits, io_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare SQLite writes with and without the write-behind journal")
+    parser.add_argument("--windows", type=int, default=3600, help="Update windows to log (one detection each)")
+    parser.add_argument("--flush-events", type=int, default=500, help="Write-behind flush threshold")
+    parser.add_argument("--dir", type=Path, default=None, help="Directory on the storage to measure (e.g. the SD card)")
+    args = parser.parse_args()
+
+    # Payload size of one detection, the denominator for write amplification
+    logical = len(encode_record((1, int(time.time()), "Aedes", 0.91, 10.0))) * args.windows
+
+    print("=" * 70)
+    print(f"Write-behind vs direct SQLite ({args.windows} windows, 1 detection each)")
+    print("=" * 70)
+    print(f"{'Mode':<16} {'Commits':<10} {'Disk writes':<16} {'Amplification':<16} {'Time (s)':<10}")
+    print("-" * 70)
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        modes = (("direct", False, True), ("write-behind", True, True), ("wb, no fsync", True, False))
+        for i, (mode, write_behind, fsync) in enumerate(modes):
+            elapsed, commits, io_bytes = run(
+                Path(tmp) / f"run{i}.db", args.windows, write_behind, args.flush_events, fsync
+            )
+            if io_bytes is None:
+                disk, amplification = "n/a", "n/a"
+            else:
+                disk, amplification = f"{io_bytes / 1e6:.2f} MB", f"{io_bytes / logical:.1f}x"
+            print(f"{mode:<16} {commits:<10} {disk:<16} {amplification:<16} {elapsed:<10.2f}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
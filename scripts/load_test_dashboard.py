@@ -0,0 +1,219 @@
+import sys
+import json
+import time
+import signal
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import DASHBOARD_THREADS, DASHBOARD_STREAM_LIMIT
+from src.database import Database
+from src.serving import WAITRESS_AVAILABLE
+
+TARGETS = (
+    ("/", "/", False),
+    ("/api/data", "/api/data?days=7", False),
+    ("/api/data (304)", "/api/data?days=7", True),
+    # Not snapshotted: every request queries SQLite on a pooled connection
+    ("/api/detections", "/api/detections?limit=100&species=Aedes", False),
+)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def fill(db_path: Path, days: int):
+    # One row a minute for `days` days, through Database so rollups exist
+    db = Database(db_path)
+    now = int(time.time())
+    db.insert_rows([(now - i * 60, ("Aedes", "Culex")[i % 2], 0.9, 10.0) for i in range(days * 1440)])
+    db.close()
+
+
+def serve(db_path: Path, port: int, server: str, threads: int, streams: int):
+    from src import dashboard
+    from src.raw_detections import RawDetections
+    from src.read_pool import ReadPool
+    from src.serving import StreamSlots, serve as run
+    from src.visualization import DensityAnalyzer
+
+    dashboard.pool = ReadPool(db_path)
+    dashboard.analyzer = DensityAnalyzer(db_path, pool=dashboard.pool)
+    dashboard.raw = RawDetections(db_path, pool=dashboard.pool)
+    dashboard.streams = StreamSlots(streams)
+    run(dashboard.app, "127.0.0.1", port, server=server, threads=threads, streams=streams)
+
+
+def writer(db_path: Path, interval: float):
+    # Stands in for the detector: a small commit every interval
+    db = Database(db_path)
+    latencies = []
+    try:
+        while True:
+            start = time.perf_counter()
+            db.insert_rows([(int(time.time()), "Aedes", 0.9, 10.0)])
+            latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps({'commits': len(latencies), 'max_ms': max(latencies, default=0.0)}), flush=True)
+    db.close()
+
+
+def client(port: int, path: str, conditional: bool, end: float, latencies: list, errors: list):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    etag = None
+    while time.time() < end:
+        headers = {"Accept-Encoding": "gzip"}
+        if conditional and etag:
+            headers["If-None-Match"] = etag
+        start = time.perf_counter()
+        try:
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors.append(1)
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status >= 400:
+            errors.append(1)
+        etag = response.getheader("ETag") or etag
+
+
+def open_streams(port: int, count: int) -> tuple:
+    """Open `count` /api/stream connections (like browser tabs left open) and
+    keep them reading; returns the sockets and how many were turned away."""
+    sockets = []
+    rejected = 0
+    for _ in range(count):
+        sock = socket.create_connection(("127.0.0.1", port), timeout=10)
+        sock.sendall(b"GET /api/stream HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        status = sock.recv(4096).split(b"\r\n", 1)[0]
+        if b" 200 " in status:
+            sockets.append(sock)
+            threading.Thread(target=drain, args=(sock,), daemon=True).start()
+        else:
+            rejected += 1
+            sock.close()
+    return sockets, rejected
+
+
+def drain(sock: socket.socket):
+    try:
+        while sock.recv(4096):
+            pass
+    except OSError:
+        pass
+
+
+def load(port: int, path: str, conditional: bool, clients: int, duration: float):
+    latencies = []
+    errors = []
+    end = time.time() + duration
+    threads = [
+        threading.Thread(target=client, args=(port, path, conditional, end, latencies, errors))
+        for _ in range(clients)
+    ]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] if latencies else float("nan")
+    p99 = latencies[int(len(latencies) * 0.99)] if latencies else float("nan")
+    return len(latencies) / elapsed, p50, p99, len(errors)
+
+
+def wait_for(port: int):
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Dashboard did not start on port {port}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--serve":
+        serve(Path(sys.argv[2]), int(sys.argv[3]), sys.argv[4], int(sys.argv[5]), int(sys.argv[6]))
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "--writer":
+        writer(Path(sys.argv[2]), float(sys.argv[3]))
+        return
+
+    parser = argparse.ArgumentParser(description="Load test the dashboard while a detector writes to the database")
+    default_servers = "development,werkzeug" + (",waitress" if WAITRESS_AVAILABLE else "")
+    parser.add_argument("--servers", default=default_servers, help="Comma-separated server modes to compare")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent keep-alive clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per target")
+    parser.add_argument("--threads", type=int, default=DASHBOARD_THREADS, help="Server worker threads")
+    parser.add_argument("--streams", type=int, default=DASHBOARD_STREAM_LIMIT, help="Extra threads for live streams")
+    parser.add_argument("--sse-clients", type=int, default=0,
+                        help="/api/stream connections held open during the test (open tabs)")
+    parser.add_argument("--days", type=int, default=30, help="Days of history in the test database")
+    parser.add_argument("--write-interval", type=float, default=0.5, help="Seconds between detector commits")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "detections.db"
+        fill(db_path, args.days)
+
+        print("=" * 70)
+        print(f"Dashboard load test: {args.clients} clients, {args.duration:.0f}s per target, "
+              f"detector commit every {args.write_interval}s, {args.sse_clients} open streams")
+        print("=" * 70)
+        print(f"{'Server':<13} {'Target':<17} {'Req/s':<9} {'p50 (ms)':<10} {'p99 (ms)':<10} {'Errors':<7}")
+        print("-" * 70)
+        for server in args.servers.split(","):
+            port = free_port()
+            dashboard = subprocess.Popen(
+                [sys.executable, __file__, "--serve", str(db_path), str(port), server,
+                 str(args.threads), str(args.streams)],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            write = subprocess.Popen(
+                [sys.executable, __file__, "--writer", str(db_path), str(args.write_interval)],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+            )
+            sockets = []
+            try:
+                wait_for(port)
+                sockets, rejected = open_streams(port, args.sse_clients)
+                for label, path, conditional in TARGETS:
+                    rate, p50, p99, errors = load(port, path, conditional, args.clients, args.duration)
+                    print(f"{server:<13} {label:<17} {rate:<9.0f} {p50:<10.1f} {p99:<10.1f} {errors:<7}")
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+                conn.request("GET", "/api/status")
+                status = json.loads(conn.getresponse().read())
+                conn.close()
+            finally:
+                for sock in sockets:
+                    sock.close()
+                write.send_signal(signal.SIGINT)
+                commits = json.loads(write.communicate()[0])
+                dashboard.terminate()
+                dashboard.wait()
+            print(f"{'':<13} detector: {commits['commits']} commits, max {commits['max_ms']:.1f} ms | "
+                  f"connections opened: {status['pool']['opened']}")
+            if args.sse_clients:
+                print(f"{'':<13} streams: {len(sockets)} open, {rejected} turned away (503)")
+        print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import sys
+import logging
+import argparse
+from pathlib import Path
+from datetime import datetime
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import DB_PATH, DB_RETENTION_DAYS, DB_MAX_SIZE_MB, DB_MIN_RETENTION_DAYS, DB_COMPACT_BATCH_ROWS
+from src.database import Database, SCHEMA_VERSION
+
+
+def cmd_info(db: Database, args):
+    with db.lock:
+        rows = db.conn.execute("SELECT COUNT(*), MIN(timestamp), MAX(timestamp) FROM detections").fetchone()
+    storage = db.storage_stats()
+    
+    print("=" * 70)
+    print(f"Database: {db.db_path}")
+    print("=" * 70)
+    print(f"Schema version: {db.schema_version()} (current: {SCHEMA_VERSION})")
+    print(f"Detections:     {rows[0]}")
+    print(f"Time range:     {rows[1]} .. {rows[2]}")
+    compacted = db.compacted_before()
+    print(f"Compacted:      {'before ' + str(datetime.fromtimestamp(compacted)) if compacted else 'never'}")
+    print(f"Size:           {storage['file_bytes'] / 1e6:.1f} MB ({storage['free_bytes'] / 1e6:.1f} MB free)")
+    print(f"Incr. vacuum:   {'on' if storage['incremental_vacuum'] else 'off (run compact --enable-incremental-vacuum)'}")
+    print("=" * 70)
+
+
+def cmd_migrate(db: Database, args):
+    # Opening the database already ran any pending migration.
+    print(f"Schema version {db.schema_version()} (current: {SCHEMA_VERSION})")
+
+
+def cmd_rebuild_rollups(db: Database, args):
+    since = datetime.strptime(args.since, "%Y-%m-%d").timestamp() if args.since else None
+    compacted = db.compacted_before()
+    if compacted:
+        print(f"Raw rows before {datetime.fromtimestamp(compacted)} were compacted; their rollups are kept as they are")
+    buckets = db.rebuild_rollups(since=since, batch_size=args.batch_size)
+    print(f"Rollups rebuilt: {buckets} hourly buckets")
+
+
+def cmd_compact(db: Database, args):
+    if args.enable_incremental_vacuum and not db.storage_stats()['incremental_vacuum']:
+        print("Enabling incremental vacuum (full VACUUM, may take a while)...")
+        db.enable_incremental_vacuum()
+    
+    report = db.compact(
+        max_age_seconds=args.max_age_days * 86400 if args.max_age_days else None,
+        max_size_bytes=int(args.max_size_mb * 1024 * 1024) if args.max_size_mb else None,
+        min_age_seconds=args.min_age_days * 86400,
+        batch_rows=args.batch_rows
+    )
+    print("=" * 70)
+    print(f"Rows deleted:     {report['rows_deleted']}")
+    print(f"Size:             {report['bytes_before'] / 1e6:.1f} MB -> {report['bytes_after'] / 1e6:.1f} MB "
+          f"({report['bytes_reclaimed'] / 1e6:.1f} MB reclaimed)")
+    print(f"Writer lock held: {report['lock_held_s'] * 1000:.0f} ms total, "
+          f"max {report['max_lock_ms']:.1f} ms over {report['batches']} batches")
+    print(f"Duration:         {report['duration_s']:.1f} s")
+    if report['size_floor_reached']:
+        print(f"Still above the size limit: the last {args.min_age_days:g} days of raw rows are always kept")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and maintain the detections database")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="Database path")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    subparsers.add_parser("info", help="Show schema version, row count and size")
+    
+    migrate = subparsers.add_parser("migrate", help="Migrate to the current schema in small batches")
+    migrate.add_argument("--batch-size", type=int, default=50000, help="Rows copied per transaction")
+    
+    rebuild = subparsers.add_parser("rebuild-rollups", help="Recompute hour/day/week rollups after a backfill")
+    rebuild.add_argument("--since", default=None, help="Only rebuild from the week containing this date (YYYY-MM-DD)")
+    rebuild.add_argument("--batch-size", type=int, default=50000, help="Rows folded per transaction")
+    
+    compact = subparsers.add_parser("compact", help="Delete old raw rows and reclaim space")
+    compact.add_argument("--max-age-days", type=float, default=DB_RETENTION_DAYS, help="Keep raw rows this long")
+    compact.add_argument("--max-size-mb", type=float, default=DB_MAX_SIZE_MB, help="Trim oldest rows above this size")
+    compact.add_argument("--min-age-days", type=float, default=DB_MIN_RETENTION_DAYS,
+                         help="Never trim rows younger than this for the size limit")
+    compact.add_argument("--batch-rows", type=int, default=DB_COMPACT_BATCH_ROWS, help="Rows deleted per transaction")
+    compact.add_argument("--enable-incremental-vacuum", action="store_true",
+                         help="Convert an older file to auto_vacuum=INCREMENTAL first (one-off full VACUUM)")
+    
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    
+    db = Database(args.db, migrate_batch_size=getattr(args, "batch_size", 50000))
+    try:
+        commands = {
+            "info": cmd_info,
+            "migrate": cmd_migrate,
+            "rebuild-rollups": cmd_rebuild_rollups,
+            "compact": cmd_compact
+        }
+        commands[args.command](db, args)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import (
+    CLASSES, CONFIDENCE_THRESHOLD, MIN_DETECTION_INTERVAL, NO_MOSQUITO_CLASS_IDX,
+    PROB_ARCHIVE_DIR, PROB_ARCHIVE_ENCODING
+)
+from src.prob_archive import ProbArchive
+
+
+def parse_list(value: str):
+    return [float(v) for v in value.split(",")]
+
+
+def fill_synthetic(archive: ProbArchive, days: float, fps: float, seed: int = 0):
+    """Write days of fake frames: mostly no-mosquito, with short visits."""
+    rng = np.random.default_rng(seed)
+    n = int(days * 86400 * fps)
+    start = time.time() - days * 86400
+    timestamps = start + np.arange(n) / fps
+
+    logits = rng.normal(0.0, 1.0, (n, len(CLASSES))).astype(np.float32)
+    logits[:, NO_MOSQUITO_CLASS_IDX] += 3.0
+    # About one visit per minute, each lasting a few seconds
+    visits = rng.choice(n, size=int(days * 1440), replace=False)
+    for offset in range(int(5 * fps)):
+        idx = np.minimum(visits + offset, n - 1)
+        logits[idx, rng.integers(0, NO_MOSQUITO_CLASS_IDX, len(idx))] += 5.0
+    probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+    probs /= probs.sum(axis=1, keepdims=True)
+
+    for ts, p in zip(timestamps, probs):
+        archive.append(float(ts), p)
+    archive.flush()
+    return start
+
+
+def reference_counts(timestamps, probs, threshold, interval):
+    # Frame-by-frame copy of DetectionSystem._handle_prediction
+    last = {species: 0.0 for species in CLASSES}
+    counts = {species: 0 for species in CLASSES}
+    for ts, p in zip(timestamps, probs):
+        idx = int(np.argmax(p))
+        if idx == NO_MOSQUITO_CLASS_IDX or p[idx] < threshold:
+            continue
+        species = CLASSES[idx]
+        if ts - last[species] >= interval:
+            counts[species] += 1
+            last[species] = ts
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay archived probabilities under other counting settings")
+    parser.add_argument("--archive", type=Path, default=PROB_ARCHIVE_DIR, help="Probability archive directory")
+    parser.add_argument("--days", type=float, default=7, help="Replay the last N days")
+    parser.add_argument("--thresholds", type=parse_list, default=[CONFIDENCE_THRESHOLD],
+                        help="Comma-separated confidence thresholds")
+    parser.add_argument("--intervals", type=parse_list, default=[MIN_DETECTION_INTERVAL],
+                        help="Comma-separated minimum detection intervals (s)")
+    parser.add_argument("--synthetic-days", type=float, default=None,
+                        help="Replay a temporary archive filled with N days of synthetic frames")
+    parser.add_argument("--fps", type=float, default=10.0, help="Frame rate of the synthetic data")
+    parser.add_argument("--verify", action="store_true", help="Check counts against a frame-by-frame loop")
+    args = parser.parse_args()
+
+    tmp = None
+    if args.synthetic_days:
+        tmp = tempfile.TemporaryDirectory()
+        archive = ProbArchive(Path(tmp.name), CLASSES, encoding=PROB_ARCHIVE_ENCODING)
+        print(f"Writing {args.synthetic_days} days of synthetic frames at {args.fps} FPS...")
+        fill_start = time.perf_counter()
+        fill_synthetic(archive, args.synthetic_days, args.fps)
+        print(f"  {archive.frames_written} frames in {time.perf_counter() - fill_start:.1f} s")
+        args.days = args.synthetic_days + 1
+    else:
+        archive = ProbArchive(args.archive, CLASSES)
+
+    start = time.time() - args.days * 86400
+    load_start = time.perf_counter()
+    timestamps, probs = archive.load(start)
+    load_s = time.perf_counter() - load_start
+    size = sum(path.stat().st_size for path in archive.directory.glob("*.*") if path.suffix in (".ts", ".probs"))
+    species = [s for i, s in enumerate(CLASSES) if i != NO_MOSQUITO_CLASS_IDX]
+
+    print("=" * 70)
+    print(f"Archive: {archive.directory} ({archive.encoding}, {size / 1e6:.1f} MB)")
+    print(f"Frames:  {len(timestamps)} over {len(archive.days())} days, loaded in {load_s * 1000:.0f} ms")
+    print("=" * 70)
+    print(f"{'Threshold':<11} {'Interval':<10} " + " ".join(f"{s:<12}" for s in species) + f" {'Replay (ms)':<12}")
+    print("-" * 70)
+
+    ok = True
+    for threshold in args.thresholds:
+        for interval in args.intervals:
+            replay_start = time.perf_counter()
+            results = archive.replay(
+                start,
+                confidence_threshold=threshold,
+                min_detection_interval=interval,
+                no_detection_idx=NO_MOSQUITO_CLASS_IDX
+            )
+            replay_ms = (time.perf_counter() - replay_start) * 1000
+            counts = " ".join(f"{results[s]['count']:<12}" for s in species)
+            print(f"{threshold:<11.2f} {interval:<10.1f} {counts} {replay_ms:<12.0f}")
+
+            if args.verify:
+                expected = reference_counts(timestamps, probs, threshold, interval)
+                if any(expected[s] != results[s]['count'] for s in species):
+                    print(f"  MISMATCH: frame-by-frame loop gives {expected}")
+                    ok = False
+    print("=" * 70)
+    if args.verify:
+        print("Replay matches frame-by-frame loop" if ok else "Replay MISMATCH")
+
+    if tmp:
+        tmp.cleanup()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
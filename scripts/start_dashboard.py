@@ -4,7 +4,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.dashboard import app
-from config import DASHBOARD_HOST, DASHBOARD_PORT
+from src.serving import serve
+from config import DASHBOARD_HOST, DASHBOARD_PORT, DASHBOARD_SERVER, DASHBOARD_THREADS, DASHBOARD_STREAM_LIMIT
 
 if __name__ == '__main__':
     print("=" * 70)
@@ -13,5 +14,8 @@ if __name__ == '__main__':
     print(f"Starting server on http://{DASHBOARD_HOST}:{DASHBOARD_PORT}")
     print("Press Ctrl+C to stop")
     print("=" * 70)
-    app.run(host=DASHBOARD_HOST, port=DASHBOARD_PORT, debug=False)
+    serve(
+        app, DASHBOARD_HOST, DASHBOARD_PORT,
+        server=DASHBOARD_SERVER, threads=DASHBOARD_THREADS, streams=DASHBOARD_STREAM_LIMIT
+    )
 
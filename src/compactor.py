@@ -0,0 +1,67 @@
+import threading
+import logging
+from typing import Dict, Optional
+
+from src.database import Database
+
+logger = logging.getLogger(__name__)
+
+
+class Compactor:
+    """Runs Database.compact() periodically on a background thread."""
+    
+    def __init__(
+        self,
+        database: Database,
+        max_age_days: Optional[float] = 90,
+        max_size_mb: Optional[float] = 1024,
+        min_age_days: float = 7,
+        interval: float = 3600.0,
+        batch_rows: int = 5000
+    ):
+        self.database = database
+        self.max_age_seconds = max_age_days * 86400 if max_age_days else None
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024) if max_size_mb else None
+        self.min_age_seconds = min_age_days * 86400
+        self.interval = interval
+        self.batch_rows = batch_rows
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.last_report: Optional[Dict[str, float]] = None
+    
+    def start(self):
+        self.thread = threading.Thread(target=self._loop, name="db-compactor", daemon=True)
+        self.thread.start()
+        logger.info(f"Database compactor started (every {self.interval:.0f}s)")
+    
+    def _loop(self):
+        # First pass shortly after startup, then every interval
+        delay = min(60.0, self.interval)
+        while not self.stop_event.wait(delay):
+            delay = self.interval
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Database compaction failed: {e}", exc_info=True)
+    
+    def run_once(self) -> Dict[str, float]:
+        report = self.database.compact(
+            max_age_seconds=self.max_age_seconds,
+            max_size_bytes=self.max_size_bytes,
+            min_age_seconds=self.min_age_seconds,
+            batch_rows=self.batch_rows,
+            cancel=self.stop_event
+        )
+        self.last_report = report
+        logger.info(
+            f"Compaction: {report['rows_deleted']} rows deleted, "
+            f"{report['bytes_reclaimed'] / 1e6:.1f} MB reclaimed, "
+            f"writer lock held {report['lock_held_s'] * 1000:.0f}ms total "
+            f"(max {report['max_lock_ms']:.1f}ms over {report['batches']} batches)"
+        )
+        return report
+    
+    def stop(self):
+        self.stop_event.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=5.0)
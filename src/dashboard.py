@@ -1,13 +1,38 @@
-from flask import Flask, render_template_string, jsonify
+from flask import Flask, Response, render_template, jsonify, request
 from pathlib import Path
+from datetime import datetime, timedelta
 import sys
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from config import DB_PATH, DASHBOARD_HOST, DASHBOARD_PORT
-from src.visualization import DensityAnalyzer
+from config import (
+    DB_PATH, DASHBOARD_HOST, DASHBOARD_PORT, DASHBOARD_CACHE_ENTRIES, DASHBOARD_CACHE_ROWS,
+    DASHBOARD_SERVER, DASHBOARD_THREADS, DASHBOARD_STREAM_LIMIT, DASHBOARD_SLOW_REQUEST_MS,
+    DASHBOARD_SNAPSHOT_REFRESH, DASHBOARD_SNAPSHOT_ENTRIES, DASHBOARD_MAX_DAYS,
+    DASHBOARD_DETECTIONS_MAX_LIMIT, DASHBOARD_EXPORT_PAGE_ROWS,
+    EVENTS_HOST, EVENTS_PORT, EVENTS_BACKLOG, EVENTS_KEEPALIVE,
+    CLASSES, LIVE_STATE_NAME, LIVE_STATE_STALE_SECONDS, PREVIEW_NAME
+)
+from src.visualization import DensityAnalyzer, SPECIES
+from src.events import EventHub
+from src.live_state import LiveStateReader
+from src.preview import PreviewHub
+from src.snapshots import Snapshot, SnapshotCache
+from src.raw_detections import RawDetections, encode_cursor, decode_cursor
+from src.read_pool import ReadPool
+from src.serving import RequestTimings, StreamSlots, serve
 
 app = Flask(__name__)
+timings = RequestTimings(app, slow_ms=DASHBOARD_SLOW_REQUEST_MS)
+streams = StreamSlots(DASHBOARD_STREAM_LIMIT)
+pool = ReadPool(DB_PATH)
+analyzer = DensityAnalyzer(
+    DB_PATH, cache_entries=DASHBOARD_CACHE_ENTRIES, cache_rows=DASHBOARD_CACHE_ROWS, pool=pool
+)
+events = EventHub(EVENTS_HOST, EVENTS_PORT, backlog=EVENTS_BACKLOG)
+live = LiveStateReader(LIVE_STATE_NAME, CLASSES)
+preview = PreviewHub(PREVIEW_NAME)
+raw = RawDetections(DB_PATH, page_size=DASHBOARD_EXPORT_PAGE_ROWS, pool=pool)
 
 DASHBOARD_HTML = """
 <!DOCTYPE html>
@@ -63,11 +88,41 @@ DASHBOARD_HTML = """
         .chart-container h2 {
             margin-bottom: 20px;
         }
+        .live {
+            margin: 10px 0;
+            color: #666;
+        }
+        .preview img {
+            max-width: 100%;
+            border-radius: 4px;
+        }
+        .heatmap {
+            display: grid;
+            grid-template-columns: 40px repeat(24, 1fr);
+            gap: 2px;
+            font-size: 11px;
+            color: #666;
+        }
+        .heatmap .cell {
+            height: 22px;
+            border-radius: 2px;
+            background-color: #eee;
+        }
+        .footer {
+            margin-top: 20px;
+            color: #999;
+            font-size: 12px;
+        }
     </style>
 </head>
 <body>
     <div class="container">
         <h1>Mosquito Density Dashboard</h1>
+        <div class="live">
+            <span id="live-status">Waiting for detector...</span>
+            <span id="live-latency"></span>
+            <span id="last-detection"></span>
+        </div>
         <div class="stats" id="stats">
             <div class="stat-card">
                 <h3>Aedes</h3>
@@ -85,6 +140,12 @@ DASHBOARD_HTML = """
             </div>
         </div>
         
+        <div class="preview">
+            <h2>Camera Preview</h2>
+            <button id="preview-toggle" onclick="togglePreview()">Show preview</button>
+            <div><img id="preview" alt=""></div>
+        </div>
+        
         <div class="chart-container">
             <h2>Daily Density</h2>
             <canvas id="dailyChart"></canvas>
@@ -94,11 +155,33 @@ DASHBOARD_HTML = """
             <h2>Weekly Summary</h2>
             <canvas id="weeklyChart"></canvas>
         </div>
+        
+        <div>
+            <h2>Activity by Hour and Weekday</h2>
+            <select id="heatmap-species" onchange="updateHeatmap()">
+                <option value="total">All species</option>
+                <option value="Aedes">Aedes</option>
+                <option value="Culex">Culex</option>
+            </select>
+            <div class="heatmap" id="heatmap"></div>
+        </div>
+        
+        <div class="footer" id="cache-stats"></div>
     </div>
     
     <script>
         const days = 7;
+        const datasetIndex = {Aedes: 0, Culex: 1};
         let dailyChart, weeklyChart;
+        let currentStats = {};
+        let streamOpened = false;
+        let heatmapData;
+        
+        function loadStatus() {
+            fetch('/api/status')
+                .then(response => response.json())
+                .then(status => updateCacheStats(status.cache, status.stream, status.snapshots));
+        }
         
         function loadData() {
             fetch(`/api/data?days=${days}`)
@@ -107,10 +190,158 @@ DASHBOARD_HTML = """
                     updateStats(data.stats);
                     updateDailyChart(data.daily);
                     updateWeeklyChart(data.weekly);
+                    loadStatus();
+                });
+        }
+        
+        function loadHeatmap() {
+            fetch('/api/heatmap')
+                .then(response => response.json())
+                .then(heatmap => {
+                    heatmapData = heatmap;
+                    updateHeatmap();
                 });
         }
         
+        function updateHeatmap() {
+            const heatmap = heatmapData;
+            if (!heatmap) {
+                return;
+            }
+            const selected = document.getElementById('heatmap-species').value;
+            const grid = selected === 'total' ? heatmap.total : heatmap.species[selected];
+            const max = Math.max(1, ...grid.flat());
+            const cells = ['<div></div>'].concat(heatmap.hours.map(h => `<div>${h}</div>`));
+            heatmap.days.forEach((day, d) => {
+                cells.push(`<div>${day}</div>`);
+                grid[d].forEach((count, h) => {
+                    const alpha = count ? 0.15 + 0.85 * count / max : 0;
+                    cells.push(
+                        `<div class="cell" title="${day} ${h}:00 - ${count}" ` +
+                        `style="background-color: rgba(76, 175, 80, ${alpha})"></div>`
+                    );
+                });
+            });
+            document.getElementById('heatmap').innerHTML = cells.join('');
+        }
+        
+        function updateCacheStats(cache, stream, snapshots) {
+            document.getElementById('cache-stats').textContent =
+                `Query cache: ${cache.hits} hits, ${cache.misses} misses ` +
+                `(${(cache.hit_rate * 100).toFixed(0)}%), ${cache.entries} entries | ` +
+                `Snapshots: ${snapshots.builds} builds, ${snapshots.not_modified}/${snapshots.served} not modified | ` +
+                `Live viewers: ${stream.clients}`;
+        }
+        
+        function localDate(timestamp) {
+            const d = new Date(timestamp * 1000);
+            const pad = n => String(n).padStart(2, '0');
+            return `${d.getFullYear()}-${pad(d.getMonth() + 1)}-${pad(d.getDate())}`;
+        }
+        
+        function applyStats(event) {
+            document.getElementById('live-status').textContent =
+                `Live: ${event.fps.toFixed(1)} FPS` +
+                (event.species ? ` | ${event.species} ${(event.confidence * 100).toFixed(0)}%` : '');
+            
+            const detections = Object.entries(event.detections);
+            if (!detections.length || !dailyChart || !weeklyChart) {
+                return;
+            }
+            const labels = dailyChart.data.labels;
+            if (labels[labels.length - 1] !== localDate(event.timestamp)) {
+                // New day: reload to get the new bucket
+                loadData();
+                return;
+            }
+            
+            for (const [species, data] of detections) {
+                const stat = currentStats[species] || {total_count: 0, avg_confidence: 0};
+                const count = stat.total_count + data.quantity;
+                stat.avg_confidence = (stat.avg_confidence * stat.total_count + data.confidence * data.quantity) / count;
+                stat.total_count = count;
+                currentStats[species] = stat;
+                
+                for (const chart of [dailyChart, weeklyChart]) {
+                    const datasets = chart.data.datasets;
+                    const last = datasets[0].data.length - 1;
+                    if (last < 0) {
+                        continue;
+                    }
+                    if (species in datasetIndex) {
+                        datasets[datasetIndex[species]].data[last] += data.quantity;
+                    }
+                    datasets[2].data[last] += data.quantity;
+                }
+            }
+            updateStats(currentStats);
+            dailyChart.update('none');
+            weeklyChart.update('none');
+        }
+        
+        function showDetection(event) {
+            const time = new Date(event.timestamp * 1000).toLocaleTimeString();
+            document.getElementById('last-detection').textContent =
+                ` | Last detection: ${event.species} (${(event.confidence * 100).toFixed(0)}%) at ${time}`;
+        }
+        
+        function loadLive() {
+            fetch('/api/live')
+                .then(response => response.json())
+                .then(live => {
+                    if (!live.running) {
+                        document.getElementById('live-status').textContent = 'Detector not running';
+                        document.getElementById('live-latency').textContent = '';
+                        return;
+                    }
+                    document.getElementById('live-latency').textContent =
+                        ` | Latency p50 ${live.latency_ms.p50.toFixed(0)}ms, ` +
+                        `p95 ${live.latency_ms.p95.toFixed(0)}ms | ${live.frames} frames`;
+                });
+        }
+        
+        function togglePreview() {
+            // The detector only encodes frames while this image is streaming
+            const img = document.getElementById('preview');
+            const button = document.getElementById('preview-toggle');
+            if (img.getAttribute('src')) {
+                img.removeAttribute('src');
+                button.textContent = 'Show preview';
+            } else {
+                img.onerror = () => {
+                    img.removeAttribute('src');
+                    button.textContent = 'Preview busy, retry';
+                };
+                img.src = '/stream.mjpg';
+                button.textContent = 'Hide preview';
+            }
+        }
+        
+        function connectStream() {
+            if (!window.EventSource) {
+                setInterval(loadData, 60000);
+                return;
+            }
+            const source = new EventSource('/api/stream');
+            source.onopen = () => {
+                // Events may have been missed while disconnected
+                if (streamOpened) {
+                    loadData();
+                }
+                streamOpened = true;
+            };
+            source.addEventListener('stats', e => applyStats(JSON.parse(e.data)));
+            source.addEventListener('detection', e => showDetection(JSON.parse(e.data)));
+            source.onerror = () => {
+                // Turned away (503, too many open streams): poll instead
+                if (source.readyState === EventSource.CLOSED) {
+                    setInterval(loadData, 60000);
+                }
+            };
+        }
+        
         function updateStats(stats) {
+            currentStats = stats;
             const aedes = stats.Aedes || {total_count: 0, avg_confidence: 0};
             const culex = stats.Culex || {total_count: 0, avg_confidence: 0};
             const total = aedes.total_count + culex.total_count;
@@ -122,18 +353,25 @@ DASHBOARD_HTML = """
             document.getElementById('total-count').textContent = total;
         }
         
+        function patchChart(chart, labels, series) {
+            // Update in place instead of rebuilding the chart
+            chart.data.labels = labels;
+            series.forEach((values, i) => { chart.data.datasets[i].data = values; });
+            chart.update('none');
+        }
+        
         function updateDailyChart(data) {
-            const ctx = document.getElementById('dailyChart').getContext('2d');
-            
-            if (dailyChart) {
-                dailyChart.destroy();
-            }
-            
             const dates = data.map(d => d.date);
             const aedes = data.map(d => d.aedes);
             const culex = data.map(d => d.culex);
             const total = data.map(d => d.total);
             
+            if (dailyChart) {
+                patchChart(dailyChart, dates, [aedes, culex, total]);
+                return;
+            }
+            const ctx = document.getElementById('dailyChart').getContext('2d');
+            
             dailyChart = new Chart(ctx, {
                 type: 'line',
                 data: {
@@ -175,17 +413,17 @@ DASHBOARD_HTML = """
         }
         
         function updateWeeklyChart(data) {
-            const ctx = document.getElementById('weeklyChart').getContext('2d');
-            
-            if (weeklyChart) {
-                weeklyChart.destroy();
-            }
-            
             const weeks = data.map(d => d.week);
             const aedes = data.map(d => d.aedes);
             const culex = data.map(d => d.culex);
             const total = data.map(d => d.total);
             
+            if (weeklyChart) {
+                patchChart(weeklyChart, weeks, [aedes, culex, total]);
+                return;
+            }
+            const ctx = document.getElementById('weeklyChart').getContext('2d');
+            
             weeklyChart = new Chart(ctx, {
                 type: 'bar',
                 data: {
@@ -221,82 +459,257 @@ DASHBOARD_HTML = """
         }
         
         loadData();
-        setInterval(loadData, 60000);
+        connectStream();
+        loadLive();
+        setInterval(loadLive, 5000);
+        // Revalidated with the ETag; usually a 304
+        loadHeatmap();
+        setInterval(loadHeatmap, 60000);
     </script>
 </body>
 </html>
 """
+# Compiled once; render_template_string would recompile it on every request
+DASHBOARD_TEMPLATE = app.jinja_env.from_string(DASHBOARD_HTML)
 
 
 @app.route('/')
 def dashboard():
-    return render_template_string(DASHBOARD_HTML)
+    return render_template(DASHBOARD_TEMPLATE)
 
 
-@app.route('/api/data')
-def api_data():
-    from flask import request
-    from datetime import datetime, timedelta
-    
-    days = int(request.args.get('days', 7))
-    analyzer = DensityAnalyzer(DB_PATH)
+def build_data(days: int) -> dict:
+    now = datetime.now()
     
     stats = analyzer.get_statistics(days=days)
-    weekly_data = analyzer.get_weekly_data(days=days)
-    
-    daily = []
-    aedes_dict = dict(weekly_data['Aedes'])
-    culex_dict = dict(weekly_data['Culex'])
-    total_dict = dict(weekly_data['Total'])
+    series = analyzer.bucketed(now - timedelta(days=days), now, granularity='day')
     
-    for date_str in sorted(aedes_dict.keys() | culex_dict.keys() | total_dict.keys()):
-        daily.append({
-            'date': date_str,
-            'aedes': aedes_dict.get(date_str, 0),
-            'culex': culex_dict.get(date_str, 0),
-            'total': total_dict.get(date_str, 0)
-        })
+    daily = [
+        {'date': row['bucket'], 'aedes': row['Aedes'], 'culex': row['Culex'], 'total': row['total']}
+        for row in series
+    ]
     
+    # Same windows as before: 7-day chunks starting the day after now - days
     weekly = []
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=days)
-    
-    current_date = start_date
-    week_num = 1
-    
-    while current_date < end_date:
-        week_start = current_date
-        week_end = min(current_date + timedelta(days=7), end_date)
-        
-        week_aedes = 0
-        week_culex = 0
-        
-        for date_str, count in weekly_data['Aedes']:
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-            if week_start <= date_obj < week_end:
-                week_aedes += count
-        
-        for date_str, count in weekly_data['Culex']:
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-            if week_start <= date_obj < week_end:
-                week_culex += count
-        
+    for week_num, first in enumerate(range(1, len(daily), 7), 1):
+        chunk = daily[first:first + 7]
+        aedes = sum(day['aedes'] for day in chunk)
+        culex = sum(day['culex'] for day in chunk)
         weekly.append({
             'week': f"Week {week_num}",
-            'aedes': week_aedes,
-            'culex': week_culex,
-            'total': week_aedes + week_culex
+            'aedes': aedes,
+            'culex': culex,
+            'total': aedes + culex
         })
-        
-        current_date = week_end
-        week_num += 1
     
-    return jsonify({
+    return {
         'stats': stats,
         'daily': daily,
         'weekly': weekly
+    }
+
+
+def build_heatmap(species: tuple) -> dict:
+    return analyzer.activity_heatmap(species or SPECIES)
+
+
+def data_version():
+    # Windows are hour-aligned, so the payload also changes on the hour
+    return analyzer.data_version(), datetime.now().strftime('%Y-%m-%d %H')
+
+
+snapshots = SnapshotCache(
+    build_data, data_version,
+    refresh_interval=DASHBOARD_SNAPSHOT_REFRESH, max_entries=DASHBOARD_SNAPSHOT_ENTRIES
+)
+heatmaps = SnapshotCache(
+    build_heatmap, data_version,
+    refresh_interval=DASHBOARD_SNAPSHOT_REFRESH, max_entries=DASHBOARD_SNAPSHOT_ENTRIES
+)
+
+
+def snapshot_response(cache: SnapshotCache, snapshot: Snapshot) -> Response:
+    compressed = 'gzip' in request.accept_encodings
+    response = Response(snapshot.gzipped if compressed else snapshot.body, mimetype='application/json')
+    if compressed:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    response.set_etag(snapshot.etag + ('-gz' if compressed else ''))
+    response.last_modified = snapshot.last_modified
+    # Browsers revalidate on every poll and usually get a 304
+    response.cache_control.no_cache = True
+    response = response.make_conditional(request)
+    cache.record(response.status_code)
+    return response
+
+
+@app.route('/api/data')
+def api_data():
+    try:
+        days = int(request.args.get('days', 7))
+        if days < 1:
+            raise ValueError(f"days must be at least 1, got {days}")
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    # Also bounds the number of distinct snapshots and the series length
+    days = min(days, int(DASHBOARD_MAX_DAYS))
+    return snapshot_response(snapshots, snapshots.get(days))
+
+
+@app.route('/api/heatmap')
+def api_heatmap():
+    species = tuple(request.args.getlist('species'))
+    return snapshot_response(heatmaps, heatmaps.get(species))
+
+
+@app.route('/api/status')
+def api_status():
+    return jsonify({
+        'cache': analyzer.cache_stats(),
+        'snapshots': snapshots.stats(),
+        'heatmap': heatmaps.stats(),
+        'stream': events.stats(),
+        'streams': streams.stats(),
+        'pool': pool.stats(),
+        'requests': timings.stats()
+    })
+
+
+# Times outside 1970 .. 9999 are rejected before they reach SQLite, which
+# only takes signed 64-bit integers
+MAX_TIME = int(datetime(9999, 12, 31).timestamp())
+
+
+def parse_time(value: str) -> int:
+    # Epoch seconds or a local ISO date/time (2024-06-01, 2024-06-01T18:00)
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = datetime.fromisoformat(value).timestamp()
+        except (OverflowError, OSError):
+            raise ValueError(f"Invalid time: {value}")
+    # Also false for nan
+    if not 0 <= seconds <= MAX_TIME:
+        raise ValueError(f"Invalid time: {value}")
+    return int(seconds)
+
+
+def detection_range():
+    # end is fixed when the request starts, so an export always terminates
+    start = parse_time(request.args['start']) if 'start' in request.args else 0
+    end = parse_time(request.args['end']) if 'end' in request.args else int(datetime.now().timestamp()) + 1
+    return start, end, request.args.getlist('species')
+
+
+@app.route('/api/detections')
+def api_detections():
+    try:
+        start, end, species = detection_range()
+        after = decode_cursor(request.args.get('after'))
+        limit = min(max(int(request.args.get('limit', 100)), 1), DASHBOARD_DETECTIONS_MAX_LIMIT)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    rows, following = raw.page(start, end, after=after, limit=limit, species=species)
+    return jsonify({'detections': rows, 'next': encode_cursor(following)})
+
+
+@app.route('/api/detections/export')
+def api_detections_export():
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({'error': f"unknown format: {fmt}"}), 400
+    try:
+        start, end, species = detection_range()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Streamed page by page; nothing beyond one page is held in memory
+    chunks = raw.export_csv(start, end, species) if fmt == 'csv' else raw.export_ndjson(start, end, species)
+    return Response(chunks, mimetype='text/csv' if fmt == 'csv' else 'application/x-ndjson', headers={
+        'Content-Disposition': f'attachment; filename=detections_{start}_{end}.{fmt}',
+        'Cache-Control': 'no-cache'
+    })
+
+
+@app.route('/api/live')
+def api_live():
+    # Straight from the detector's shared memory segment, no database access
+    state = live.read()
+    if state is None:
+        return jsonify({'running': False})
+    state['running'] = state['age'] < LIVE_STATE_STALE_SECONDS
+    return jsonify(state)
+
+
+def stream_response(body, mimetype: str, headers: dict) -> Response:
+    # Released when the server closes the response, even if the client left
+    # before the generator ever started
+    response = Response(body, mimetype=mimetype, headers=headers)
+    response.call_on_close(streams.release)
+    return response
+
+
+def streams_busy() -> Response:
+    response = jsonify({'error': 'Too many open streams'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '30'
+    return response
+
+
+@app.route('/stream.mjpg')
+def stream_mjpg():
+    if not streams.acquire():
+        return streams_busy()
+    
+    # Every viewer gets the same JPEG bytes, encoded once by the detector
+    def stream():
+        position = preview.subscribe()
+        last = None
+        try:
+            while True:
+                frame, position = preview.wait(position, timeout=5.0)
+                # Resend the last frame when idle so a closed viewer is noticed
+                frame = frame or last
+                if frame is not None:
+                    last = frame
+                    yield (
+                        b"--frame\r\nContent-Type: image/jpeg\r\n"
+                        b"Content-Length: " + str(len(frame)).encode() + b"\r\n\r\n" + frame + b"\r\n"
+                    )
+        finally:
+            preview.unsubscribe()
+    
+    return stream_response(stream(), 'multipart/x-mixed-replace; boundary=frame', {
+        'Cache-Control': 'no-cache'
+    })
+
+
+@app.route('/api/stream')
+def api_stream():
+    # Server-sent events: detections and per-window counts pushed by the detector
+    if not streams.acquire():
+        return streams_busy()
+    events.start()
+    
+    def stream():
+        position = events.subscribe()
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                payloads, position = events.wait(position, EVENTS_KEEPALIVE)
+                yield b"".join(payloads) if payloads else b": keepalive\n\n"
+        finally:
+            events.unsubscribe()
+    
+    return stream_response(stream(), 'text/event-stream', {
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
     })
 
 
 if __name__ == '__main__':
-    app.run(host=DASHBOARD_HOST, port=DASHBOARD_PORT, debug=False)
+    serve(
+        app, DASHBOARD_HOST, DASHBOARD_PORT,
+        server=DASHBOARD_SERVER, threads=DASHBOARD_THREADS, streams=DASHBOARD_STREAM_LIMIT
+    )
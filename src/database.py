@@ -1,100 +1,555 @@
+import os
 import sqlite3
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
-from typing import Dict
+from typing import Callable, Dict, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# v1: text timestamps ("YYYY-MM-DD HH:MM:SS", local time), no index.
+# v2: integer epoch seconds with a covering (timestamp, species, confidence) index.
+# v3: per-species hour/day/week rollups replace hourly_summary.
+# v4: per-species day-of-week x hour-of-day activity heatmap.
+SCHEMA_VERSION = 4
+
+DETECTIONS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY,
+        timestamp INTEGER NOT NULL,
+        species TEXT NOT NULL,
+        confidence REAL NOT NULL,
+        fps REAL
+    )
+"""
+
+DETECTIONS_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_detections_time_species
+    ON {table} (timestamp, species, confidence)
+"""
+
+META_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )
+"""
+
+# Bucket start (epoch seconds) of a row's local hour, day and week (Monday).
+ROLLUP_BUCKETS = {
+    'rollup_hour': "CAST(strftime('%s', strftime('%Y-%m-%d %H:00:00', timestamp, 'unixepoch', 'localtime'), 'utc') AS INTEGER)",
+    'rollup_day': "CAST(strftime('%s', date(timestamp, 'unixepoch', 'localtime'), 'utc') AS INTEGER)",
+    'rollup_week': "CAST(strftime('%s', date(timestamp, 'unixepoch', 'localtime', 'weekday 0', '-6 days'), 'utc') AS INTEGER)"
+}
+
+ROLLUP_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        bucket INTEGER NOT NULL,
+        species TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        confidence_sum REAL NOT NULL,
+        confidence_min REAL NOT NULL,
+        confidence_max REAL NOT NULL,
+        PRIMARY KEY (bucket, species)
+    ) WITHOUT ROWID
+"""
+
+# Adds the detections with id in (?, ?] and timestamp >= ? to a rollup table.
+ROLLUP_UPSERT = """
+    INSERT INTO {table} (bucket, species, count, confidence_sum, confidence_min, confidence_max)
+    SELECT {bucket} AS b, species, COUNT(*), SUM(confidence), MIN(confidence), MAX(confidence)
+    FROM detections
+    WHERE id > ? AND id <= ? AND timestamp >= ?
+    GROUP BY b, species
+    ON CONFLICT (bucket, species) DO UPDATE SET
+        count = count + excluded.count,
+        confidence_sum = confidence_sum + excluded.confidence_sum,
+        confidence_min = MIN(confidence_min, excluded.confidence_min),
+        confidence_max = MAX(confidence_max, excluded.confidence_max)
+"""
+
+
+# One row per (local weekday, local hour, species); weekday 0 is Sunday
+# (strftime %w). At most 7 * 24 rows per species, whatever the history length.
+HEATMAP_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS rollup_heatmap (
+        dow INTEGER NOT NULL,
+        hour INTEGER NOT NULL,
+        species TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        confidence_sum REAL NOT NULL,
+        PRIMARY KEY (dow, hour, species)
+    ) WITHOUT ROWID
+"""
+
+HEATMAP_UPSERT = """
+    INSERT INTO rollup_heatmap (dow, hour, species, count, confidence_sum)
+    SELECT CAST(strftime('%w', timestamp, 'unixepoch', 'localtime') AS INTEGER) AS d,
+           CAST(strftime('%H', timestamp, 'unixepoch', 'localtime') AS INTEGER) AS h,
+           species, COUNT(*), SUM(confidence)
+    FROM detections
+    WHERE id > ? AND id <= ? AND timestamp >= ?
+    GROUP BY d, h, species
+    ON CONFLICT (dow, hour, species) DO UPDATE SET
+        count = count + excluded.count,
+        confidence_sum = confidence_sum + excluded.confidence_sum
+"""
+
+# Hourly rollups survive compaction of raw rows, so the heatmap is rebuilt
+# from them rather than from detections.
+HEATMAP_REBUILD = """
+    INSERT INTO rollup_heatmap (dow, hour, species, count, confidence_sum)
+    SELECT CAST(strftime('%w', bucket, 'unixepoch', 'localtime') AS INTEGER) AS d,
+           CAST(strftime('%H', bucket, 'unixepoch', 'localtime') AS INTEGER) AS h,
+           species, SUM(count), SUM(confidence_sum)
+    FROM rollup_hour
+    GROUP BY d, h, species
+"""
+
 
 class Database:
     
-    def __init__(self, db_path: Path):
+    def __init__(
+        self,
+        db_path: Path,
+        synchronous: str = "NORMAL",
+        journal_size_limit: int = 4 * 1024 * 1024,
+        migrate_batch_size: int = 50000
+    ):
         self.db_path = db_path
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._init_db()
-    
-    def _init_db(self):
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS detections (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME NOT NULL,
-                species TEXT NOT NULL,
-                confidence REAL NOT NULL,
-                fps REAL
-            )
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS hourly_summary (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date_hour TEXT NOT NULL UNIQUE,
-                aedes_count INTEGER DEFAULT 0,
-                culex_count INTEGER DEFAULT 0,
-                total_count INTEGER DEFAULT 0,
-                avg_confidence REAL
+        
+        # One long-lived connection shared by the sink thread and the main
+        # thread; the lock serializes access.
+        self.lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        if self.conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] == 0:
+            # Only takes effect before the first table (and WAL switch) exists;
+            # older files need a one-off VACUUM, see enable_incremental_vacuum().
+            self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.synchronous = synchronous
+        self.conn.execute(f"PRAGMA synchronous={synchronous}")
+        self.conn.execute(f"PRAGMA journal_size_limit={int(journal_size_limit)}")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        
+        self.rows_written = 0
+        self.commits = 0
+        self.write_time = 0.0
+        self.max_write_time = 0.0
+        self.window_rows = 0
+        self.window_commits = 0
+        self.window_time = 0.0
+        self.window_start = time.time()
+        
+        self._init_db(migrate_batch_size)
+    
+    def _init_db(self, migrate_batch_size: int):
+        with self.lock:
+            version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+            has_detections = self._table_exists("detections")
+        
+        if version < 2 and has_detections:
+            logger.info(f"Migrating {self.db_path} to epoch timestamps...")
+            self.migrate(
+                batch_size=migrate_batch_size,
+                progress=lambda copied, total: logger.info(f"  migrated {copied}/{total} rows")
             )
-        """)
         
-        conn.commit()
-        conn.close()
-        logger.info(f"Database initialized: {self.db_path}")
+        with self.lock, self.conn:
+            cursor = self.conn.cursor()
+            cursor.execute(DETECTIONS_SCHEMA.format(table="detections"))
+            cursor.execute(DETECTIONS_INDEX.format(table="detections"))
+            for table in ROLLUP_BUCKETS:
+                cursor.execute(ROLLUP_SCHEMA.format(table=table))
+            cursor.execute(HEATMAP_SCHEMA)
+            cursor.execute(META_SCHEMA)
+        
+        if version < 3:
+            if has_detections:
+                logger.info("Building rollups...")
+                self.rebuild_rollups(batch_size=migrate_batch_size)
+            with self.lock, self.conn:
+                self.conn.execute("DROP TABLE IF EXISTS hourly_summary")
+        elif version < 4:
+            logger.info("Building activity heatmap...")
+            self.rebuild_heatmap()
+        if version < SCHEMA_VERSION:
+            with self.lock, self.conn:
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        logger.info(f"Database initialized: {self.db_path} (WAL, schema v{SCHEMA_VERSION})")
     
-    def log(self, detections: Dict[str, Dict], fps: float):
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
+    def _table_exists(self, name: str) -> bool:
+        return self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ).fetchone() is not None
+    
+    def schema_version(self) -> int:
+        with self.lock:
+            return self.conn.execute("PRAGMA user_version").fetchone()[0]
+    
+    def migrate(self, batch_size: int = 50000, progress: Optional[Callable[[int, int], None]] = None) -> int:
+        """Copy v1 rows (text timestamps) into the epoch layout in small batches.
+        
+        Each batch is its own short transaction, so readers and a still-running
+        writer are only held up for one batch at a time. Rows the writer adds
+        meanwhile are picked up in the final swap. An interrupted migration
+        resumes from the last copied id.
+        """
+        with self.lock:
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] >= 2:
+                return 0
+            with self.conn:
+                self.conn.execute(DETECTIONS_SCHEMA.format(table="detections_v2"))
+                self.conn.execute(DETECTIONS_INDEX.format(table="detections_v2"))
+            last_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM detections_v2").fetchone()[0]
+            total = self.conn.execute("SELECT COUNT(*) FROM detections").fetchone()[0]
         
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        copied = 0
+        while True:
+            with self.lock, self.conn:
+                upper = self.conn.execute(
+                    "SELECT MAX(id) FROM (SELECT id FROM detections WHERE id > ? ORDER BY id LIMIT ?)",
+                    (last_id, batch_size)
+                ).fetchone()[0]
+                if upper is None:
+                    break
+                copied += self._copy_legacy_rows(last_id, upper)
+                last_id = upper
+            if progress:
+                progress(copied, total)
         
-        for species, data in detections.items():
-            quantity = data.get('quantity', 0)
-            confidence = data.get('confidence', 0.0)
-            
-            for _ in range(quantity):
-                cursor.execute("""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                upper = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM detections").fetchone()[0]
+                copied += self._copy_legacy_rows(last_id, upper)
+                self.conn.execute("DROP TABLE detections")
+                self.conn.execute("ALTER TABLE detections_v2 RENAME TO detections")
+                self.conn.execute("PRAGMA user_version = 2")
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        logger.info(f"Migration complete: {copied} rows copied")
+        return copied
+    
+    def _copy_legacy_rows(self, after_id: int, upper_id: int) -> int:
+        # v1 stored local wall-clock text; the 'utc' modifier converts it to epoch.
+        # Rows whose timestamp cannot be parsed are skipped.
+        cursor = self.conn.execute("""
+            INSERT INTO detections_v2 (id, timestamp, species, confidence, fps)
+            SELECT id, CAST(strftime('%s', timestamp, 'utc') AS INTEGER), species, confidence, fps
+            FROM detections
+            WHERE id > ? AND id <= ? AND strftime('%s', timestamp, 'utc') IS NOT NULL
+        """, (after_id, upper_id))
+        return cursor.rowcount
+    
+    def log(self, detections: Dict[str, Dict], fps: float, timestamp: Optional[float] = None):
+        # Writes may run later on a sink thread; keep the time the window closed.
+        timestamp = int(timestamp if timestamp is not None else time.time())
+        
+        rows = [
+            (timestamp, species, data.get('confidence', 0.0), fps)
+            for species, data in detections.items()
+            for _ in range(data.get('quantity', 0))
+        ]
+        self.insert_rows(rows)
+    
+    def insert_rows(self, rows: List[tuple], journal_seq: Optional[int] = None, durable: bool = False):
+        """Insert (timestamp, species, confidence, fps) rows in one transaction.
+        
+        journal_seq records the last write-behind journal record these rows
+        cover, atomically with the rows, so a replay never inserts twice.
+        durable forces an fsync on commit (synchronous=FULL) for callers that
+        delete their own copy of the rows afterwards.
+        """
+        if not rows and journal_seq is None:
+            return
+        
+        with self.lock:
+            start = time.perf_counter()
+            if durable:
+                self.conn.execute("PRAGMA synchronous=FULL")
+            with self.conn:
+                last_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM detections").fetchone()[0]
+                self.conn.executemany("""
                     INSERT INTO detections (timestamp, species, confidence, fps)
                     VALUES (?, ?, ?, ?)
-                """, (timestamp, species, confidence, fps))
-        
-        conn.commit()
-        conn.close()
+                """, rows)
+                new_last_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM detections").fetchone()[0]
+                # Rollups move in the same transaction, so they never disagree with the raw rows
+                self._apply_rollups(last_id, new_last_id)
+                if journal_seq is not None:
+                    self._set_meta("journal_seq", journal_seq)
+            if durable:
+                self.conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            self._record_write(len(rows), time.perf_counter() - start)
+    
+    def _set_meta(self, key: str, value: int):
+        self.conn.execute("""
+            INSERT INTO meta (key, value) VALUES (?, ?)
+            ON CONFLICT (key) DO UPDATE SET value = excluded.value
+        """, (key, value))
     
-    def update_summary(self):
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
+    def get_meta(self, key: str, default: int = 0) -> int:
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+    
+    def _apply_rollups(self, after_id: int, upper_id: int, since: int = 0, heatmap: bool = True):
+        for table, bucket in ROLLUP_BUCKETS.items():
+            self.conn.execute(ROLLUP_UPSERT.format(table=table, bucket=bucket), (after_id, upper_id, since))
+        if heatmap:
+            self.conn.execute(HEATMAP_UPSERT, (after_id, upper_id, since))
+    
+    def rebuild_rollups(self, since: Optional[float] = None, batch_size: int = 50000) -> int:
+        """Recompute rollups from raw detections, e.g. after a backfill.
         
-        current_hour = datetime.now().strftime("%Y-%m-%d %H:00:00")
+        With since, only buckets from the start of that week onwards are
+        rebuilt. Buckets that compaction already removed raw rows from are
+        never rebuilt, since the rollups are all that is left of them: the
+        rebuild starts at the first week after compacted_before() at the
+        earliest. Rows are folded in id batches, each its own transaction, so
+        the writer is never held up for long; rows it logs meanwhile update
+        the rollups themselves.
+        """
+        week = f"SELECT {ROLLUP_BUCKETS['rollup_week']} FROM (SELECT ? AS timestamp)"
+        with self.lock, self.conn:
+            start_ts = 0 if since is None else self.conn.execute(week, (int(since),)).fetchone()[0]
+            compacted = self._compacted_before()
+            if compacted > start_ts:
+                safe_ts = self.conn.execute(week, (compacted,)).fetchone()[0]
+                if safe_ts < compacted:
+                    safe_ts = self.conn.execute(
+                        week.replace("'-6 days'", "'+1 day'"), (compacted,)
+                    ).fetchone()[0]
+                logger.warning(
+                    f"Raw rows before {datetime.fromtimestamp(compacted)} were compacted; "
+                    f"keeping rollups before {datetime.fromtimestamp(safe_ts)}"
+                )
+                start_ts = safe_ts
+            # Ids follow insertion order, not time order (backfills), so
+            # start from the lowest id in range and keep the time filter.
+            first_id = self.conn.execute(
+                "SELECT COALESCE(MIN(id), 1) - 1 FROM detections WHERE timestamp >= ?", (start_ts,)
+            ).fetchone()[0]
+            for table in ROLLUP_BUCKETS:
+                self.conn.execute(f"DELETE FROM {table} WHERE bucket >= ?", (start_ts,))
+            last_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM detections").fetchone()[0]
         
-        cursor.execute("""
-            SELECT species, COUNT(*) as count, AVG(confidence) as avg_conf
-            FROM detections
-            WHERE datetime(timestamp) >= datetime(?)
-            GROUP BY species
-        """, (current_hour,))
+        after_id = first_id
+        while after_id < last_id:
+            upper_id = min(after_id + batch_size, last_id)
+            with self.lock, self.conn:
+                # The heatmap has no time buckets to rebuild partially; it is
+                # recomputed from the hourly rollups below.
+                self._apply_rollups(after_id, upper_id, since=start_ts, heatmap=False)
+            after_id = upper_id
+        self.rebuild_heatmap()
         
-        results = cursor.fetchall()
+        with self.lock:
+            buckets = self.conn.execute("SELECT COUNT(*) FROM rollup_hour").fetchone()[0]
+        logger.info(f"Rollups rebuilt ({buckets} hourly buckets)")
+        return buckets
+    
+    def compacted_before(self) -> int:
+        """Raw rows older than this (epoch seconds) may have been deleted by
+        compact(); only the rollups still count them. 0 if nothing was."""
+        with self.lock:
+            return self._compacted_before()
+    
+    def _compacted_before(self) -> int:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'compacted_before'").fetchone()
+        watermark = row[0] if row else 0
+        # Files compacted before the watermark was recorded: rollup buckets
+        # older than the oldest raw row can only come from deleted rows.
+        oldest_raw = self.conn.execute("SELECT MIN(timestamp) FROM detections").fetchone()[0]
+        oldest_bucket, newest_bucket = self.conn.execute(
+            "SELECT MIN(bucket), MAX(bucket) FROM rollup_hour"
+        ).fetchone()
+        if oldest_bucket is not None:
+            if oldest_raw is None:
+                watermark = max(watermark, newest_bucket + 3600)
+            elif oldest_bucket < self.conn.execute(
+                f"SELECT {ROLLUP_BUCKETS['rollup_hour']} FROM (SELECT ? AS timestamp)", (oldest_raw,)
+            ).fetchone()[0]:
+                watermark = max(watermark, oldest_raw)
+        return watermark
+    
+    def rebuild_heatmap(self):
+        # At most a few thousand hourly rows per species and year: one short transaction
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM rollup_heatmap")
+            self.conn.execute(HEATMAP_REBUILD)
+    
+    def _record_write(self, rows: int, elapsed: float):
+        with self.stats_lock:
+            self.rows_written += rows
+            self.commits += 1
+            self.write_time += elapsed
+            self.max_write_time = max(self.max_write_time, elapsed)
+            self.window_rows += rows
+            self.window_commits += 1
+            self.window_time += elapsed
+    
+    def write_stats(self) -> Dict[str, float]:
+        # Rates cover the window since the previous call; totals are cumulative.
+        # Uses its own lock so reading stats never waits behind a commit.
+        with self.stats_lock:
+            now = time.time()
+            elapsed = max(now - self.window_start, 1e-6)
+            stats = {
+                'rows_written': self.rows_written,
+                'commits': self.commits,
+                'rows_per_s': self.window_rows / elapsed,
+                'commits_per_s': self.window_commits / elapsed,
+                'avg_commit_ms': self.window_time / self.window_commits * 1000 if self.window_commits else 0.0,
+                'max_commit_ms': self.max_write_time * 1000
+            }
+            self.window_rows = 0
+            self.window_commits = 0
+            self.window_time = 0.0
+            self.max_write_time = 0.0
+            self.window_start = now
+        return stats
+    
+    def storage_stats(self) -> Dict[str, int]:
+        with self.lock:
+            page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+            pages = self.conn.execute("PRAGMA page_count").fetchone()[0]
+            free = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+            auto_vacuum = self.conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        return {
+            'page_size': page_size,
+            'file_bytes': pages * page_size,
+            'used_bytes': (pages - free) * page_size,
+            'free_bytes': free * page_size,
+            'incremental_vacuum': auto_vacuum == 2
+        }
+    
+    def _disk_bytes(self) -> int:
+        paths = [self.db_path, Path(f"{self.db_path}-wal")]
+        return sum(os.path.getsize(path) for path in paths if path.exists())
+    
+    def compact(
+        self,
+        max_age_seconds: Optional[float] = None,
+        max_size_bytes: Optional[int] = None,
+        min_age_seconds: float = 7 * 86400,
+        batch_rows: int = 5000,
+        vacuum_pages: int = 2000,
+        pause: float = 0.05,
+        cancel: Optional[threading.Event] = None
+    ) -> Dict[str, float]:
+        """Delete old raw detections and give the space back.
         
-        counts = {'Aedes': 0, 'Culex': 0}
-        total = 0
-        total_conf = 0.0
+        Rollups already hold every logged row, so raw rows can go without
+        losing aggregates. Rows older than max_age_seconds are deleted first,
+        then the oldest remaining rows until the live data fits in
+        max_size_bytes. The size limit counts rollup and index pages too,
+        which deleting raw rows cannot shrink, so it never deletes rows
+        younger than min_age_seconds. Every batch is its own short transaction, with a
+        pause in between so the detector's writes get through. Setting cancel
+        stops after the current batch.
+        """
+        report = {
+            'rows_deleted': 0, 'batches': 0, 'lock_held_s': 0.0, 'max_lock_ms': 0.0, 'size_floor_reached': False
+        }
+        start = time.perf_counter()
+        bytes_before = self._disk_bytes()
         
-        for species, count, avg_conf in results:
-            if species in counts:
-                counts[species] = count
-                total += count
-                total_conf += avg_conf * count if avg_conf else 0
+        def cancelled() -> bool:
+            return cancel is not None and cancel.is_set()
         
-        avg_confidence = total_conf / total if total > 0 else 0.0
+        def locked(fn):
+            with self.lock:
+                held = time.perf_counter()
+                result = fn()
+                held = time.perf_counter() - held
+            report['batches'] += 1
+            report['lock_held_s'] += held
+            report['max_lock_ms'] = max(report['max_lock_ms'], held * 1000)
+            return result
         
-        cursor.execute("""
-            INSERT OR REPLACE INTO hourly_summary 
-            (date_hour, aedes_count, culex_count, total_count, avg_confidence)
-            VALUES (?, ?, ?, ?, ?)
-        """, (current_hour, counts['Aedes'], counts['Culex'], total, avg_confidence))
+        if max_age_seconds is not None:
+            cutoff = int(time.time() - max_age_seconds)
+            while True:
+                deleted = locked(lambda: self._delete_oldest(batch_rows, before=cutoff))
+                report['rows_deleted'] += deleted
+                if deleted < batch_rows or cancelled():
+                    break
+                time.sleep(pause)
         
-        conn.commit()
-        conn.close()
-
+        if max_size_bytes is not None:
+            floor = int(time.time() - min_age_seconds)
+            while self.storage_stats()['used_bytes'] > max_size_bytes:
+                deleted = locked(lambda: self._delete_oldest(batch_rows, before=floor))
+                report['rows_deleted'] += deleted
+                if deleted == 0:
+                    report['size_floor_reached'] = True
+                    logger.warning(
+                        f"Database still above {max_size_bytes / 1e6:.0f} MB with only the last "
+                        f"{min_age_seconds / 86400:.0f} days of raw rows left"
+                    )
+                    break
+                if cancelled():
+                    break
+                time.sleep(pause)
+        
+        if self.storage_stats()['incremental_vacuum']:
+            while self.storage_stats()['free_bytes'] > 0 and not cancelled():
+                locked(lambda: self.conn.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)})"))
+                time.sleep(pause)
+        # Truncation of the main file only happens once the WAL is checkpointed
+        locked(lambda: self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall())
+        
+        bytes_after = self._disk_bytes()
+        report.update({
+            'bytes_before': bytes_before,
+            'bytes_after': bytes_after,
+            'bytes_reclaimed': bytes_before - bytes_after,
+            'duration_s': time.perf_counter() - start
+        })
+        return report
+    
+    def _delete_oldest(self, limit: int, before: Optional[int] = None) -> int:
+        condition = "" if before is None else "WHERE timestamp < ?"
+        params = (limit,) if before is None else (before, limit)
+        with self.conn:
+            newest = self.conn.execute(f"""
+                SELECT MAX(timestamp) FROM (
+                    SELECT timestamp FROM detections {condition} ORDER BY timestamp LIMIT ?
+                )
+            """, params).fetchone()[0]
+            if newest is None:
+                return 0
+            cursor = self.conn.execute(f"""
+                DELETE FROM detections WHERE id IN (
+                    SELECT id FROM detections {condition} ORDER BY timestamp LIMIT ?
+                )
+            """, params)
+            # Raw rows before the watermark may be gone; rebuild_rollups() leaves
+            # those buckets alone. Recorded in the same transaction as the delete.
+            self.conn.execute("""
+                INSERT INTO meta (key, value) VALUES ('compacted_before', ?)
+                ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)
+            """, (newest + 1,))
+        return cursor.rowcount
+    
+    def enable_incremental_vacuum(self):
+        # Switching an existing file needs a full VACUUM, which rewrites the
+        # whole database and blocks writers for its duration.
+        with self.lock:
+            self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self.conn.execute("VACUUM")
+    
+    def close(self):
+        with self.lock:
+            # Fold the WAL back into the main file so it does not linger on disk
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.close()
+        logger.info("Database closed")
@@ -0,0 +1,134 @@
+import json
+import socket
+import logging
+import threading
+from collections import deque
+from itertools import islice
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def encode_sse(event: Dict) -> bytes:
+    return f"event: {event.get('type', 'message')}\ndata: {json.dumps(event)}\n\n".encode()
+
+
+class EventPublisher:
+    """Sends detector events to the dashboard process as UDP datagrams.
+
+    Fire-and-forget: nothing blocks when the dashboard is not running or
+    falls behind, the event is just lost.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.address = (host, port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.sent = 0
+        self.failed = 0
+
+    def publish(self, event: Dict):
+        try:
+            self.sock.sendto(json.dumps(event, separators=(",", ":")).encode(), self.address)
+            self.sent += 1
+        except OSError:
+            self.failed += 1
+
+    def close(self):
+        self.sock.close()
+
+
+class EventHub:
+    """Receives detector events and fans them out to server-sent-event streams.
+
+    Each event is encoded once into a shared ring of the last `backlog`
+    messages; clients wait on one condition and read everything newer than
+    the last sequence number they saw. A client that falls more than
+    `backlog` messages behind skips ahead and counts the gap as missed.
+    """
+
+    def __init__(self, host: str, port: int, backlog: int = 256):
+        self.address = (host, port)
+        self.cond = threading.Condition()
+        self.messages = deque(maxlen=backlog)
+        self.seq = 0
+        self.clients = 0
+        self.received = 0
+        self.invalid = 0
+        self.missed = 0
+        self.sock = None
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    def start(self):
+        # Started on first use so importing the dashboard does not bind the port
+        with self.cond:
+            if self.thread is not None:
+                return
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.sock.bind(self.address)
+            self.sock.settimeout(0.5)
+            self.thread = threading.Thread(target=self._loop, name="event-hub", daemon=True)
+            self.thread.start()
+        logger.info(f"Listening for detector events on {self.address[0]}:{self.address[1]}")
+
+    def _loop(self):
+        while not self.stop_event.is_set():
+            try:
+                data, _ = self.sock.recvfrom(65535)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            try:
+                event = json.loads(data)
+            except ValueError:
+                self.invalid += 1
+                continue
+            self.publish(event)
+
+    def publish(self, event: Dict):
+        payload = encode_sse(event)
+        with self.cond:
+            self.seq += 1
+            self.messages.append((self.seq, payload))
+            self.received += 1
+            self.cond.notify_all()
+
+    def subscribe(self) -> int:
+        """Register a client; returns the sequence number to wait from."""
+        with self.cond:
+            self.clients += 1
+            return self.seq
+
+    def unsubscribe(self):
+        with self.cond:
+            self.clients -= 1
+
+    def wait(self, after: int, timeout: float) -> Tuple[List[bytes], int]:
+        """Messages newer than `after` (waiting up to timeout), and the new position."""
+        with self.cond:
+            if self.seq == after:
+                self.cond.wait(timeout)
+            if self.seq == after:
+                return [], after
+            oldest = self.messages[0][0]
+            if after + 1 < oldest:
+                self.missed += oldest - after - 1
+                after = oldest - 1
+            payloads = [payload for _, payload in islice(self.messages, after + 1 - oldest, None)]
+            return payloads, self.seq
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'clients': self.clients,
+            'received': self.received,
+            'invalid': self.invalid,
+            'missed': self.missed
+        }
+
+    def close(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+            self.sock.close()
@@ -0,0 +1,91 @@
+import threading
+from typing import Optional, Tuple
+import numpy as np
+
+FREE = 0
+WRITING = 1
+READY = 2
+LENT = 3
+
+
+class FrameRing:
+    """Fixed pool of preallocated frame slots shared by one writer and one reader.
+
+    The writer fills a slot in place and commits it with a sequence number; the
+    reader borrows the newest ready slot as a view and gives it back when done.
+    Older ready slots are recycled by the writer, so nothing is allocated per frame.
+    """
+
+    def __init__(self, shape: Tuple[int, ...], slots: int = 3, dtype=np.uint8):
+        if slots < 3:
+            raise ValueError("FrameRing needs at least 3 slots (write, ready, lent)")
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.buffers = [np.empty(self.shape, dtype=self.dtype) for _ in range(slots)]
+        self.state = [FREE] * slots
+        self.seq = [0] * slots
+        self.next_seq = 1
+        self.dropped = 0
+        self.cond = threading.Condition()
+
+    def acquire(self) -> Optional[int]:
+        with self.cond:
+            for i, state in enumerate(self.state):
+                if state == FREE:
+                    self.state[i] = WRITING
+                    return i
+
+            oldest = None
+            for i, state in enumerate(self.state):
+                if state == READY and (oldest is None or self.seq[i] < self.seq[oldest]):
+                    oldest = i
+            if oldest is None:
+                return None
+
+            self.dropped += 1
+            self.state[oldest] = WRITING
+            return oldest
+
+    def commit(self, idx: int) -> int:
+        with self.cond:
+            seq = self.next_seq
+            self.next_seq += 1
+            self.seq[idx] = seq
+            self.state[idx] = READY
+            self.cond.notify()
+            return seq
+
+    def abort(self, idx: int):
+        with self.cond:
+            self.state[idx] = FREE
+
+    def borrow(self, timeout: Optional[float] = None) -> Optional[Tuple[int, int, np.ndarray]]:
+        with self.cond:
+            if not self.cond.wait_for(self._has_ready, timeout=timeout):
+                return None
+
+            newest = None
+            for i, state in enumerate(self.state):
+                if state == READY and (newest is None or self.seq[i] > self.seq[newest]):
+                    newest = i
+
+            for i, state in enumerate(self.state):
+                if state == READY and i != newest:
+                    self.state[i] = FREE
+                    self.dropped += 1
+
+            self.state[newest] = LENT
+            return newest, self.seq[newest], self.buffers[newest]
+
+    def give_back(self, idx: int):
+        with self.cond:
+            if self.state[idx] == LENT:
+                self.state[idx] = FREE
+
+    def clear(self):
+        with self.cond:
+            for i in range(len(self.state)):
+                self.state[i] = FREE
+
+    def _has_ready(self) -> bool:
+        return READY in self.state
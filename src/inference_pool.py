@@ -0,0 +1,233 @@
+import time
+import queue
+import signal
+import logging
+import multiprocessing as mp
+from collections import deque, namedtuple
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+
+from src.model import Model, create_interpreter
+
+logger = logging.getLogger(__name__)
+
+PoolResult = namedtuple(
+    'PoolResult',
+    ['seq', 'capture_time', 'class_idx', 'confidence', 'probs', 'worker_id', 'latency_ms']
+)
+
+
+def _worker_main(worker_id, model_path, shm_name, shape, dtype, tasks, results,
+                 num_threads, delegate, profile_path):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    inputs = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    try:
+        model = Model(model_path, num_threads=num_threads, delegate=delegate, profile_path=profile_path)
+    except Exception as e:
+        results.put(('error', worker_id, str(e)))
+        del inputs
+        shm.close()
+        return
+    results.put(('ready', worker_id))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+
+        seq, slot = task
+        start = time.perf_counter()
+        view = model.input_view()
+        np.copyto(view[0], inputs[slot])
+        del view
+        class_idx, confidence = model.predict_in_place()
+        probs = model.probs[0].copy()
+        results.put((seq, slot, worker_id, class_idx, confidence, probs, time.perf_counter() - start))
+
+    del inputs
+    shm.close()
+
+
+class InferencePool:
+    """N worker processes, each with its own Model, fed through shared memory.
+
+    The caller preprocesses straight into a free input slot, submits it, and
+    collects results strictly in submission (capture) order.
+    """
+
+    def __init__(
+        self,
+        model_path: Path,
+        workers: int = 2,
+        slots: Optional[int] = None,
+        num_threads: Optional[int] = 1,
+        delegate: Optional[str] = None,
+        profile_path: Optional[Path] = None,
+        start_timeout: float = 60.0
+    ):
+        if workers < 1:
+            raise ValueError("InferencePool needs at least one worker")
+
+        # Only the tensor metadata is needed here; no tensors are allocated.
+        probe = create_interpreter(model_path)
+        self.input_details = probe.get_input_details()[0]
+        del probe
+
+        self.workers = workers
+        self.slots = slots or workers * 2
+        shape = (self.slots,) + tuple(int(d) for d in self.input_details['shape'][1:])
+        dtype = np.dtype(self.input_details['dtype'])
+
+        self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * dtype.itemsize)
+        self.inputs = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf)
+
+        ctx = mp.get_context('spawn')
+        self.tasks = ctx.Queue()
+        self.results = ctx.Queue()
+        self.processes = []
+        for worker_id in range(workers):
+            process = ctx.Process(
+                target=_worker_main,
+                args=(worker_id, model_path, self.shm.name, shape, dtype.str, self.tasks, self.results,
+                      num_threads, delegate, profile_path),
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+
+        self.free_slots = deque(range(self.slots))
+        self.pending = {}
+        self.completed = {}
+        self.next_seq = 0
+        self.next_emit = 0
+        self.last_prediction = None
+
+        self.busy_time = [0.0] * workers
+        self.inferences = [0] * workers
+        self.max_depth = 0
+        self.window_start = time.time()
+        self.closed = False
+
+        try:
+            self._wait_ready(start_timeout)
+        except Exception:
+            self.close()
+            raise
+        logger.info(f"Inference pool started: {workers} workers, {self.slots} slots")
+
+    def _wait_ready(self, timeout: float):
+        ready = 0
+        deadline = time.time() + timeout
+        while ready < self.workers:
+            try:
+                message = self.results.get(timeout=max(0.1, deadline - time.time()))
+            except queue.Empty:
+                raise RuntimeError("Timed out waiting for inference workers to load the model")
+            if message[0] == 'error':
+                raise RuntimeError(f"Inference worker {message[1]} failed to start: {message[2]}")
+            ready += 1
+
+    def acquire_slot(self) -> Optional[int]:
+        return self.free_slots.popleft() if self.free_slots else None
+
+    def submit(self, slot: int, capture_time: float) -> int:
+        seq = self.next_seq
+        self.next_seq += 1
+        self.pending[seq] = (slot, capture_time)
+        self.tasks.put((seq, slot))
+        self.max_depth = max(self.max_depth, len(self.pending))
+        return seq
+
+    def submit_repeat(self, capture_time: float) -> int:
+        # Ordered placeholder that re-emits the previous result (used when the
+        # motion gate skips a frame).
+        seq = self.next_seq
+        self.next_seq += 1
+        self.pending[seq] = (None, capture_time)
+        return seq
+
+    def collect(self, timeout: float = 0.0) -> List[PoolResult]:
+        try:
+            block = timeout > 0 and self._next_is_inflight()
+            while True:
+                message = self.results.get(block=block, timeout=timeout if block else None)
+                block = False
+                seq, slot, worker_id, class_idx, confidence, probs, busy = message
+                self.free_slots.append(slot)
+                self.busy_time[worker_id] += busy
+                self.inferences[worker_id] += 1
+                self.completed[seq] = (worker_id, class_idx, confidence, probs)
+        except queue.Empty:
+            pass
+
+        self._check_workers()
+
+        ordered = []
+        while self.next_emit in self.pending:
+            seq = self.next_emit
+            slot, capture_time = self.pending[seq]
+            if slot is None:
+                if self.last_prediction is None:
+                    # Nothing to repeat yet
+                    del self.pending[seq]
+                    self.next_emit += 1
+                    continue
+                worker_id, class_idx, confidence, probs = self.last_prediction
+            elif seq in self.completed:
+                worker_id, class_idx, confidence, probs = self.completed.pop(seq)
+                self.last_prediction = (worker_id, class_idx, confidence, probs)
+            else:
+                break
+
+            del self.pending[seq]
+            latency_ms = (time.time() - capture_time) * 1000
+            ordered.append(PoolResult(seq, capture_time, class_idx, confidence, probs, worker_id, latency_ms))
+            self.next_emit += 1
+        return ordered
+
+    def _next_is_inflight(self) -> bool:
+        entry = self.pending.get(self.next_emit)
+        return entry is not None and entry[0] is not None and self.next_emit not in self.completed
+
+    def _check_workers(self):
+        for worker_id, process in enumerate(self.processes):
+            if not process.is_alive():
+                raise RuntimeError(f"Inference worker {worker_id} exited (code {process.exitcode})")
+
+    def metrics(self) -> Dict:
+        # Utilization and counts cover the window since the previous call.
+        now = time.time()
+        elapsed = max(now - self.window_start, 1e-6)
+        metrics = {
+            'utilization': [busy / elapsed for busy in self.busy_time],
+            'inferences': list(self.inferences),
+            'queue_depth': len(self.pending),
+            'max_queue_depth': self.max_depth,
+            'free_slots': len(self.free_slots)
+        }
+        self.busy_time = [0.0] * self.workers
+        self.inferences = [0] * self.workers
+        self.max_depth = len(self.pending)
+        self.window_start = now
+        return metrics
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+
+        for _ in self.processes:
+            self.tasks.put(None)
+        for process in self.processes:
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+
+        del self.inputs
+        self.shm.close()
+        self.shm.unlink()
+        logger.info("Inference pool stopped")
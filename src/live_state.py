@@ -0,0 +1,161 @@
+import os
+import time
+import struct
+import logging
+import threading
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+MAX_CLASSES = 8
+
+# seq, timestamp, pid, class_idx, confidence, fps, latency p50/p95/p99/max,
+# frames, detections, dropped, then per-class detection counts
+HEADER = struct.Struct("<Q")
+BODY = struct.Struct(f"<dii6d3Q{MAX_CLASSES}Q")
+SIZE = HEADER.size + BODY.size
+
+
+class LiveStateWriter:
+    """Publishes the detector's live state into a fixed-layout shared memory
+    segment, seqlock style: the sequence number is odd while the body is
+    being written, so readers never need a lock.
+    """
+
+    def __init__(self, name: str):
+        try:
+            self.shm = SharedMemory(name=name, create=True, size=SIZE)
+        except FileExistsError:
+            # Left behind by a detector that did not shut down cleanly
+            self.shm = SharedMemory(name=name)
+            if self.shm.size < SIZE:
+                self.shm.close()
+                self.shm.unlink()
+                self.shm = SharedMemory(name=name, create=True, size=SIZE)
+        self.buf = self.shm.buf
+        self.seq = HEADER.unpack_from(self.buf, 0)[0] & ~1
+        self.pid = os.getpid()
+
+    def publish(
+        self,
+        class_idx: Optional[int],
+        confidence: float,
+        fps: float,
+        latencies: Sequence[float],
+        frames: int,
+        detections: int,
+        dropped: int,
+        counts: Sequence[int]
+    ):
+        if latencies:
+            ordered = sorted(latencies)
+            last = len(ordered) - 1
+            p50, p95, p99 = (ordered[round(last * q)] for q in (0.5, 0.95, 0.99))
+            latency_max = ordered[-1]
+        else:
+            p50 = p95 = p99 = latency_max = 0.0
+        counts = list(counts[:MAX_CLASSES]) + [0] * (MAX_CLASSES - len(counts))
+
+        HEADER.pack_into(self.buf, 0, self.seq + 1)
+        BODY.pack_into(
+            self.buf, HEADER.size,
+            time.time(), self.pid, -1 if class_idx is None else class_idx,
+            confidence, fps, p50, p95, p99, latency_max,
+            frames, detections, dropped, *counts
+        )
+        self.seq += 2
+        HEADER.pack_into(self.buf, 0, self.seq)
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class LiveStateReader:
+    """Reads the segment written by LiveStateWriter from another process.
+    
+    Reads never wait for the writer; the local lock only protects the mapping
+    itself between request threads.
+    """
+
+    def __init__(self, name: str, classes: Sequence[str], retries: int = 100, reattach_after: float = 2.0):
+        self.name = name
+        self.classes = list(classes)
+        self.retries = retries
+        self.reattach_after = reattach_after
+        self.shm = None
+        self.lock = threading.Lock()
+        self.torn_reads = 0
+
+    def _attach(self) -> bool:
+        try:
+            self.shm = SharedMemory(name=self.name)
+        except FileNotFoundError:
+            return False
+        # The resource tracker would otherwise unlink the detector's segment
+        # when this process exits.
+        resource_tracker.unregister(self.shm._name, "shared_memory")
+        if self.shm.size < SIZE:
+            self.shm.close()
+            self.shm = None
+            return False
+        return True
+
+    def read(self) -> Optional[Dict]:
+        with self.lock:
+            return self._read()
+    
+    def _read(self) -> Optional[Dict]:
+        if self.shm is None and not self._attach():
+            return None
+
+        buf = self.shm.buf
+        for _ in range(self.retries):
+            before = HEADER.unpack_from(buf, 0)[0]
+            if before & 1:
+                self.torn_reads += 1
+                continue
+            body = BODY.unpack_from(buf, HEADER.size)
+            if HEADER.unpack_from(buf, 0)[0] == before:
+                break
+            self.torn_reads += 1
+        else:
+            return None
+        if before == 0:
+            return None
+
+        (timestamp, pid, class_idx, confidence, fps,
+         p50, p95, p99, latency_max, frames, detections, dropped) = body[:12]
+        counts = body[12:12 + len(self.classes)]
+        if time.time() - timestamp > self.reattach_after:
+            # A restarted detector creates a new segment; map it on the next read
+            self._detach()
+        return {
+            'timestamp': timestamp,
+            'age': time.time() - timestamp,
+            'pid': pid,
+            'species': self.classes[class_idx] if 0 <= class_idx < len(self.classes) else None,
+            'confidence': confidence,
+            'fps': fps,
+            'latency_ms': {'p50': p50, 'p95': p95, 'p99': p99, 'max': latency_max},
+            'frames': frames,
+            'detections': detections,
+            'dropped': dropped,
+            'counts': dict(zip(self.classes, counts)),
+            'seq': before
+        }
+
+    def _detach(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm = None
+    
+    def close(self):
+        with self.lock:
+            self._detach()
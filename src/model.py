@@ -1,64 +1,161 @@
+import json
 import numpy as np
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import Dict, Tuple, Optional
 
 try:
     import tensorflow as tf
     tflite = tf.lite
+    load_delegate = tf.lite.experimental.load_delegate
+    OpResolverType = tf.lite.experimental.OpResolverType
 except ImportError:
     try:
         import tflite_runtime.interpreter as tflite
+        from tflite_runtime.interpreter import load_delegate, OpResolverType
     except ImportError:
         raise ImportError("Neither tensorflow nor tflite_runtime is installed. Please install tensorflow-cpu or tflite-runtime.")
 
 
+def load_runtime_profile(profile_path: Optional[Path], model_path: Path) -> Dict:
+    if profile_path is None or not profile_path.exists():
+        return {}
+    try:
+        with open(profile_path) as f:
+            profile = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable runtime profile {profile_path}: {e}")
+        return {}
+    
+    if profile.get('model') != model_path.name or profile.get('model_size') != model_path.stat().st_size:
+        print(f"Ignoring runtime profile {profile_path}: tuned for a different model")
+        return {}
+    return profile
+
+
+def create_interpreter(model_path: Path, num_threads: Optional[int] = None, delegate: Optional[str] = None):
+    # delegate: "xnnpack" (TFLite's default CPU delegate), "none" (plain builtin
+    # kernels) or the path of an external delegate library.
+    kwargs = {'model_path': str(model_path)}
+    if num_threads:
+        kwargs['num_threads'] = num_threads
+    
+    if delegate == "none":
+        kwargs['experimental_op_resolver_type'] = OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+    elif delegate not in (None, "xnnpack"):
+        kwargs['experimental_delegates'] = [load_delegate(delegate)]
+    
+    return tflite.Interpreter(**kwargs)
+
+
 class Model:
-    def __init__(self, model_path: Path):
+    def __init__(
+        self,
+        model_path: Path,
+        num_threads: Optional[int] = None,
+        delegate: Optional[str] = None,
+        profile_path: Optional[Path] = None
+    ):
         if not model_path.exists():
             raise FileNotFoundError(f"Model not found: {model_path}")
         
-        self.interpreter = tflite.Interpreter(model_path=str(model_path))
+        # Explicit settings win over the auto-tuned profile.
+        profile = load_runtime_profile(profile_path, model_path)
+        self.num_threads = num_threads or profile.get('num_threads')
+        self.delegate = delegate or profile.get('delegate') or "xnnpack"
+        
+        self.interpreter = create_interpreter(model_path, self.num_threads, self.delegate)
         self.interpreter.allocate_tensors()
         
         self.input_details = self.interpreter.get_input_details()[0]
         self.output_details = self.interpreter.get_output_details()[0]
         self.is_quantized = self.input_details['dtype'] in [np.int8, np.uint8]
         
+        self.input_tensor = self.interpreter.tensor(self.input_details['index'])
+        self.output_tensor = self.interpreter.tensor(self.output_details['index'])
+        self.probs = np.empty((1, self.output_details['shape'][-1]), dtype=np.float32)
+        self.batch_size = int(self.input_details['shape'][0])
+        if self.output_details['dtype'] in [np.int8, np.uint8]:
+            self.output_dequant = self.output_details['quantization']
+        else:
+            self.output_dequant = None
+        
         print(f"Model loaded: {model_path}")
         print(f"Input: {self.input_details['shape']}, dtype: {self.input_details['dtype']}")
         print(f"Output: {self.output_details['shape']}, dtype: {self.output_details['dtype']}")
         print(f"Quantized: {self.is_quantized}")
+        print(f"Threads: {self.num_threads or 'default'}, delegate: {self.delegate}")
     
-    def _get_output_probs(self, input_data: np.ndarray) -> np.ndarray:
-        input_dtype = self.input_details['dtype']
-        if input_dtype == np.int8:
-            if input_data.dtype == np.uint8:
-                input_data = input_data.astype(np.int8) - 128
-        elif input_dtype == np.uint8:
-            if input_data.dtype != np.uint8:
-                input_data = np.clip(input_data, 0, 255).astype(np.uint8)
-        elif input_dtype == np.float32:
-            if input_data.dtype != np.float32:
-                input_data = input_data.astype(np.float32)
+    def input_view(self) -> np.ndarray:
+        # Zero-copy view of the interpreter's input tensor. Fill it in place and
+        # drop the reference before calling predict_in_place(): TFLite refuses to
+        # invoke while views into its buffers are alive.
+        self._ensure_batch(1)
+        return self.input_tensor()
+    
+    def _ensure_batch(self, batch_size: int):
+        if batch_size == self.batch_size:
+            return
         
-        self.interpreter.set_tensor(self.input_details['index'], input_data)
-        self.interpreter.invoke()
-        output = self.interpreter.get_tensor(self.output_details['index'])[0]
+        shape = list(self.input_details['shape'])
+        shape[0] = batch_size
+        self.interpreter.resize_tensor_input(self.input_details['index'], shape)
+        self.interpreter.allocate_tensors()
         
-        if self.output_details['dtype'] == np.int8:
-            scale = self.output_details['quantization'][0]
-            zero_point = self.output_details['quantization'][1]
-            output = (output.astype(np.float32) - zero_point) * scale
-        elif self.output_details['dtype'] == np.uint8:
-            scale = self.output_details['quantization'][0]
-            zero_point = self.output_details['quantization'][1]
-            output = (output.astype(np.float32) - zero_point) * scale
+        self.input_details = self.interpreter.get_input_details()[0]
+        self.output_details = self.interpreter.get_output_details()[0]
+        self.probs = np.empty((batch_size, self.output_details['shape'][-1]), dtype=np.float32)
+        self.batch_size = batch_size
+    
+    def _write_input(self, input_data: np.ndarray, row: Optional[int] = None):
+        view = self.input_tensor()
+        if row is not None:
+            view = view[row]
+            input_data = input_data.reshape(view.shape)
+        
+        input_dtype = view.dtype
+        if input_data.dtype == input_dtype:
+            np.copyto(view, input_data)
+        elif input_dtype == np.int8 and input_data.dtype == np.uint8:
+            np.subtract(input_data, 128, out=view, dtype=np.int16, casting='unsafe')
+        elif input_dtype == np.uint8:
+            np.copyto(view, np.clip(input_data, 0, 255), casting='unsafe')
+        else:
+            np.copyto(view, input_data, casting='unsafe')
+        del view
+    
+    def _invoke(self) -> np.ndarray:
+        self.interpreter.invoke()
+        return self._read_output()
+    
+    def _read_output(self) -> np.ndarray:
+        # Returns (batch, classes) probabilities in a reused float32 buffer.
+        output = self.output_tensor()
+        probs = self.probs
+        if self.output_dequant is not None:
+            scale, zero_point = self.output_dequant
+            np.subtract(output, zero_point, out=probs, dtype=np.float32)
+            np.multiply(probs, scale, out=probs)
+        else:
+            np.copyto(probs, output, casting='unsafe')
+        del output
         
-        if output.min() < 0 or output.sum() > 1.1:
-            exp_output = np.exp(output - np.max(output))
-            output = exp_output / exp_output.sum()
+        # Rows that are not already probabilities (logits) get a softmax.
+        needs_softmax = (probs.min(axis=1) < 0) | (probs.sum(axis=1) > 1.1)
+        if needs_softmax.all():
+            np.subtract(probs, probs.max(axis=1, keepdims=True), out=probs)
+            np.exp(probs, out=probs)
+            np.divide(probs, probs.sum(axis=1, keepdims=True), out=probs)
+        elif needs_softmax.any():
+            logits = probs[needs_softmax]
+            exp_logits = np.exp(logits - logits.max(axis=1, keepdims=True))
+            probs[needs_softmax] = exp_logits / exp_logits.sum(axis=1, keepdims=True)
         
-        return output
+        return probs
+    
+    def _get_output_probs(self, input_data: np.ndarray) -> np.ndarray:
+        self._ensure_batch(1)
+        self._write_input(input_data)
+        return self._invoke()[0]
     
     def predict(self, input_data: np.ndarray) -> Tuple[int, float]:
         output = self._get_output_probs(input_data)
@@ -66,9 +163,33 @@ class Model:
         confidence = float(output[class_idx])
         return class_idx, confidence
     
+    def predict_in_place(self) -> Tuple[int, float]:
+        output = self._invoke()[0]
+        class_idx = int(np.argmax(output))
+        confidence = float(output[class_idx])
+        return class_idx, confidence
+    
     def predict_with_probs(self, input_data: np.ndarray) -> Tuple[int, float, np.ndarray]:
+        # The returned probabilities live in a reused buffer; copy them to keep them.
         output = self._get_output_probs(input_data)
         class_idx = int(np.argmax(output))
         confidence = float(output[class_idx])
         return class_idx, confidence, output
-
+    
+    def predict_batch(self, frames) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # frames: (N, H, W, 3) array or a sequence of preprocessed frames.
+        # Resizing the input tensor reallocates it, so alternate single and batch
+        # calls sparingly.
+        batch_size = len(frames)
+        self._ensure_batch(batch_size)
+        
+        if isinstance(frames, np.ndarray):
+            self._write_input(frames)
+        else:
+            for row, frame in enumerate(frames):
+                self._write_input(frame, row=row)
+        
+        probs = self._invoke()
+        class_idx = probs.argmax(axis=1)
+        confidence = probs[np.arange(batch_size), class_idx]
+        return class_idx, confidence, probs
@@ -0,0 +1,94 @@
+import time
+from typing import Dict, Tuple
+import cv2
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MotionGate:
+    """Cheap change detector that decides whether a frame is worth a model run.
+
+    Frames are downscaled to a tiny grayscale image and compared against a
+    running background average. If too few pixels changed, the caller can reuse
+    its last prediction instead of invoking the interpreter.
+    """
+
+    def __init__(
+        self,
+        size: Tuple[int, int] = (64, 48),
+        pixel_threshold: int = 12,
+        changed_fraction: float = 0.01,
+        background_alpha: float = 0.05,
+        max_skip_seconds: float = 5.0,
+        rgb_input: bool = False
+    ):
+        self.size = tuple(size)
+        self.pixel_threshold = pixel_threshold
+        self.changed_fraction = changed_fraction
+        self.background_alpha = background_alpha
+        self.max_skip_seconds = max_skip_seconds
+        self.gray_code = cv2.COLOR_RGB2GRAY if rgb_input else cv2.COLOR_BGR2GRAY
+
+        w, h = self.size
+        self.small = np.empty((h, w, 3), dtype=np.uint8)
+        self.gray = np.empty((h, w), dtype=np.uint8)
+        self.background = np.empty((h, w), dtype=np.float32)
+        self.background_u8 = np.empty((h, w), dtype=np.uint8)
+        self.diff = np.empty((h, w), dtype=np.uint8)
+        self.has_background = False
+        self.last_infer_time = 0.0
+        self.last_fraction = 0.0
+
+        self.frames = 0
+        self.skipped = 0
+        self.gate_cpu = 0.0
+        self.inference_cpu = 0.0
+        self.inferences = 0
+
+    def should_infer(self, frame: np.ndarray, now: float) -> bool:
+        start = time.thread_time()
+
+        cv2.resize(frame, self.size, dst=self.small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self.small, self.gray_code, dst=self.gray)
+
+        if not self.has_background:
+            self.background[:] = self.gray
+            self.has_background = True
+            changed = True
+        else:
+            cv2.convertScaleAbs(self.background, dst=self.background_u8)
+            cv2.absdiff(self.gray, self.background_u8, dst=self.diff)
+            cv2.threshold(self.diff, self.pixel_threshold, 255, cv2.THRESH_BINARY, dst=self.diff)
+            self.last_fraction = cv2.countNonZero(self.diff) / self.diff.size
+            changed = self.last_fraction >= self.changed_fraction
+            cv2.accumulateWeighted(self.gray, self.background, self.background_alpha)
+
+        # Re-check periodically even on a static scene so lighting drift or a
+        # slow-moving insect cannot pin a stale prediction forever.
+        stale = now - self.last_infer_time >= self.max_skip_seconds
+        infer = changed or stale
+
+        self.frames += 1
+        if infer:
+            self.last_infer_time = now
+        else:
+            self.skipped += 1
+        self.gate_cpu += time.thread_time() - start
+        return infer
+
+    def record_inference(self, cpu_seconds: float):
+        self.inference_cpu += cpu_seconds
+        self.inferences += 1
+
+    def stats(self) -> Dict[str, float]:
+        avg_inference_cpu = self.inference_cpu / self.inferences if self.inferences else 0.0
+        return {
+            'frames': self.frames,
+            'skipped': self.skipped,
+            'hit_rate': self.skipped / self.frames if self.frames else 0.0,
+            'cpu_saved_s': self.skipped * avg_inference_cpu - self.gate_cpu,
+            'gate_cpu_s': self.gate_cpu,
+            'last_changed_fraction': self.last_fraction
+        }
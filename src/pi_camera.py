@@ -1,11 +1,12 @@
 import cv2
 import threading
 import time
-from queue import Queue, Full, Empty
 from typing import Optional, Tuple
 import numpy as np
 import logging
 
+from src.frame_buffer import FrameRing
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,14 +17,36 @@ class PiCamera:
         width: int = 640,
         height: int = 480,
         target_fps: int = 10,
-        queue_size: int = 2
+        buffer_slots: int = 3,
+        capture_mode: str = "full",
+        model_size: Tuple[int, int] = (224, 224)
     ):
+        if capture_mode not in ("full", "model"):
+            raise ValueError(f"Unknown capture mode: {capture_mode}")
+        
         self.camera_index = camera_index
         self.width = width
         self.height = height
         self.target_fps = target_fps
         self.frame_interval = 1.0 / max(1, target_fps)
-        self.queue = Queue(maxsize=queue_size)
+        self.capture_mode = capture_mode
+        
+        # In "model" mode frames come out already at model size in RGB order,
+        # so preprocessing can skip both the resize and the color conversion.
+        if capture_mode == "model":
+            self.frame_size = tuple(model_size)
+            self.frame_is_rgb = True
+        else:
+            self.frame_size = (width, height)
+            self.frame_is_rgb = False
+        
+        frame_w, frame_h = self.frame_size
+        self.ring = FrameRing((frame_h, frame_w, 3), slots=buffer_slots)
+        self.full_lock = threading.Lock()
+        self.full_frame = None
+        self.yuv_scratch = None
+        self.lent_slot = None
+        self.last_seq = 0
         self.running = False
         self.capture_thread = None
         
@@ -40,7 +63,7 @@ class PiCamera:
             self.use_picamera2 = False
         
         self._init_camera()
-        logger.info(f"Pi Camera initialized: {width}x{height} @ {target_fps} FPS")
+        logger.info(f"Pi Camera initialized: {width}x{height} @ {target_fps} FPS ({capture_mode} mode)")
     
     def _init_camera(self):
         if self.use_picamera2:
@@ -48,11 +71,22 @@ class PiCamera:
                 from picamera2 import Picamera2
                 self.picam2 = Picamera2()
                 
-                camera_config = self.picam2.create_preview_configuration(
-                    main={"size": (self.width, self.height), "format": "RGB888"},
-                    controls={"FrameRate": self.target_fps}
-                )
+                if self.capture_mode == "model":
+                    # The ISP scales into the lores stream; on Pi 4 lores must be YUV420.
+                    camera_config = self.picam2.create_preview_configuration(
+                        main={"size": (self.width, self.height), "format": "RGB888"},
+                        lores={"size": self.frame_size, "format": "YUV420"},
+                        controls={"FrameRate": self.target_fps}
+                    )
+                else:
+                    camera_config = self.picam2.create_preview_configuration(
+                        main={"size": (self.width, self.height), "format": "RGB888"},
+                        controls={"FrameRate": self.target_fps}
+                    )
                 self.picam2.configure(camera_config)
+                if self.capture_mode == "model":
+                    frame_w, frame_h = self.frame_size
+                    self.yuv_scratch = np.empty((frame_h * 3 // 2, frame_w), dtype=np.uint8)
                 self.picam2.start()
                 logger.info("picamera2 initialized successfully")
             except Exception as e:
@@ -74,6 +108,11 @@ class PiCamera:
             self.cap.set(cv2.CAP_PROP_FPS, self.target_fps)
             self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
             
+            if self.capture_mode == "model":
+                frame_w, frame_h = self.frame_size
+                self.full_frame = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+                self.resize_scratch = np.empty((frame_h, frame_w, 3), dtype=np.uint8)
+            
             logger.info("OpenCV camera initialized successfully")
         except Exception as e:
             raise RuntimeError(f"Failed to initialize OpenCV camera: {e}")
@@ -88,29 +127,95 @@ class PiCamera:
                     time.sleep(self.frame_interval - elapsed)
                 last_frame_time = time.time()
                 
+                idx = self.ring.acquire()
+                if idx is None:
+                    time.sleep(0.005)
+                    continue
+                
                 if self.use_picamera2:
-                    frame = self.picam2.capture_array()
-                    frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+                    ok = self._capture_picamera2(self.ring.buffers[idx])
                 else:
-                    ret, frame = self.cap.read()
-                    if not ret:
-                        logger.warning("Failed to read frame from camera")
-                        time.sleep(0.1)
-                        continue
+                    ok = self._capture_opencv(self.ring.buffers[idx])
                 
-                try:
-                    self.queue.put_nowait(frame)
-                except Full:
-                    try:
-                        _ = self.queue.get_nowait()
-                        self.queue.put_nowait(frame)
-                    except Exception:
-                        pass
+                if ok:
+                    self.ring.commit(idx)
+                else:
+                    self.ring.abort(idx)
+                    logger.warning("Failed to read frame from camera")
+                    time.sleep(0.1)
                         
             except Exception as e:
                 logger.error(f"Error in capture loop: {e}")
                 time.sleep(0.1)
     
+    def _capture_picamera2(self, slot: np.ndarray) -> bool:
+        from picamera2 import MappedArray
+        
+        request = self.picam2.capture_request()
+        try:
+            if self.capture_mode == "model":
+                with MappedArray(request, "lores") as m:
+                    self._yuv420_to_rgb(m.array, slot)
+            else:
+                with MappedArray(request, "main") as m:
+                    cv2.cvtColor(m.array, cv2.COLOR_RGB2BGR, dst=slot)
+        finally:
+            request.release()
+        return True
+    
+    def _yuv420_to_rgb(self, yuv: np.ndarray, slot: np.ndarray):
+        frame_w, frame_h = self.frame_size
+        stride = yuv.shape[1]
+        if stride == frame_w:
+            cv2.cvtColor(yuv, cv2.COLOR_YUV2RGB_I420, dst=slot)
+            return
+        
+        # Padded rows: repack the three planes into the contiguous I420 scratch.
+        flat = yuv.reshape(-1)
+        scratch = self.yuv_scratch.reshape(-1)
+        y_size = frame_w * frame_h
+        c_w, c_h = frame_w // 2, frame_h // 2
+        scratch[:y_size].reshape(frame_h, frame_w)[:] = yuv[:frame_h, :frame_w]
+        for plane in range(2):
+            src_offset = stride * frame_h + plane * (stride // 2) * c_h
+            src = flat[src_offset:src_offset + (stride // 2) * c_h].reshape(c_h, stride // 2)
+            dst_offset = y_size + plane * c_w * c_h
+            scratch[dst_offset:dst_offset + c_w * c_h].reshape(c_h, c_w)[:] = src[:, :c_w]
+        cv2.cvtColor(self.yuv_scratch, cv2.COLOR_YUV2RGB_I420, dst=slot)
+    
+    def _capture_opencv(self, slot: np.ndarray) -> bool:
+        if self.capture_mode == "model":
+            with self.full_lock:
+                ret, frame = self.cap.read(self.full_frame)
+                if not ret:
+                    return False
+                cv2.resize(frame, self.frame_size, dst=self.resize_scratch, interpolation=cv2.INTER_LINEAR)
+            cv2.cvtColor(self.resize_scratch, cv2.COLOR_BGR2RGB, dst=slot)
+            return True
+        
+        ret, frame = self.cap.read(slot)
+        if not ret:
+            return False
+        if frame is not slot:
+            # Driver ignored the requested size; scale into the slot instead.
+            cv2.resize(frame, (self.width, self.height), dst=slot, interpolation=cv2.INTER_LINEAR)
+        return True
+    
+    def capture_full(self) -> Optional[np.ndarray]:
+        """Return a full-resolution BGR frame on demand (allocates a copy)."""
+        if self.use_picamera2 and self.picam2:
+            frame = self.picam2.capture_array("main")
+            return cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+        
+        if self.capture_mode == "model":
+            with self.full_lock:
+                return self.full_frame.copy()
+        
+        # Frames from read() are already full resolution in this mode.
+        if self.lent_slot is None:
+            return None
+        return self.ring.buffers[self.lent_slot].copy()
+    
     def start(self):
         if self.running:
             return
@@ -124,11 +229,25 @@ class PiCamera:
         if not self.running:
             self.start()
         
-        try:
-            frame = self.queue.get(timeout=1.0)
-            return True, frame
-        except Empty:
+        # The returned frame is a view into the ring; it stays valid until
+        # release_frame() or the next read().
+        self.release_frame()
+        
+        borrowed = self.ring.borrow(timeout=1.0)
+        if borrowed is None:
             return False, None
+        
+        self.lent_slot, self.last_seq, frame = borrowed
+        return True, frame
+    
+    def release_frame(self):
+        if self.lent_slot is not None:
+            self.ring.give_back(self.lent_slot)
+            self.lent_slot = None
+    
+    @property
+    def dropped_frames(self) -> int:
+        return self.ring.dropped
     
     def release(self):
         logger.info("Releasing camera...")
@@ -149,11 +268,8 @@ class PiCamera:
             except Exception as e:
                 logger.warning(f"Error releasing OpenCV camera: {e}")
         
-        while not self.queue.empty():
-            try:
-                self.queue.get_nowait()
-            except Empty:
-                break
+        self.lent_slot = None
+        self.ring.clear()
         
         logger.info("Camera released")
     
@@ -0,0 +1,151 @@
+import time
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("drop_oldest", "block", "skip")
+
+
+class StageQueue:
+    """Bounded hand-off between two stages with a backpressure policy.
+
+    drop_oldest: a full queue discards its oldest item to make room.
+    block:       the producer waits for space (pressure propagates upstream).
+    skip:        a full queue rejects the new item.
+    Dropped items are passed to on_drop so they can release their buffers.
+    """
+
+    def __init__(self, maxsize: int = 2, policy: str = "drop_oldest",
+                 on_drop: Optional[Callable[[Any], None]] = None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.on_drop = on_drop
+        self.items = deque()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item: Any, timeout: float = 0.1) -> bool:
+        dropped = None
+        with self.cond:
+            if len(self.items) >= self.maxsize:
+                if self.policy == "drop_oldest":
+                    dropped = self.items.popleft()
+                elif self.policy == "skip":
+                    dropped = item
+                else:
+                    while len(self.items) >= self.maxsize and not self.closed:
+                        self.cond.wait(timeout)
+                    if self.closed:
+                        dropped = item
+
+            if dropped is not item:
+                self.items.append(item)
+                self.cond.notify_all()
+            if dropped is not None:
+                self.dropped += 1
+
+        if dropped is not None and self.on_drop:
+            self.on_drop(dropped)
+        return dropped is not item
+
+    def get(self, timeout: float = 0.1) -> Optional[Any]:
+        with self.cond:
+            if not self.items:
+                self.cond.wait(timeout)
+            if not self.items:
+                return None
+            item = self.items.popleft()
+            self.cond.notify_all()
+            return item
+
+    def depth(self) -> int:
+        return len(self.items)
+
+    def close(self) -> list:
+        with self.cond:
+            self.closed = True
+            leftover = list(self.items)
+            self.items.clear()
+            self.cond.notify_all()
+        return leftover
+
+
+class Stage:
+    """Worker thread that pulls from an inbox, runs fn and pushes its outputs.
+
+    fn returns an iterable of output items (possibly empty). Service time per
+    item is accumulated so each stage's cost can be reported separately.
+    """
+
+    def __init__(self, name: str, fn: Callable[[Any], Iterable[Any]],
+                 inbox: Optional[StageQueue] = None, outbox: Optional[StageQueue] = None):
+        self.name = name
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._loop, name=f"stage-{name}", daemon=True)
+        self.error = None
+
+        self.lock = threading.Lock()
+        self.count = 0
+        self.busy = 0.0
+        self.max_time = 0.0
+
+    def start(self):
+        self.thread.start()
+
+    def _loop(self):
+        try:
+            while not self.stop_event.is_set():
+                if self.inbox is not None:
+                    item = self.inbox.get(timeout=0.1)
+                    if item is None:
+                        continue
+                else:
+                    item = None
+
+                start = time.perf_counter()
+                outputs = self.fn(item)
+                elapsed = time.perf_counter() - start
+
+                with self.lock:
+                    self.count += 1
+                    self.busy += elapsed
+                    self.max_time = max(self.max_time, elapsed)
+
+                if self.outbox is not None:
+                    for output in outputs or ():
+                        self.outbox.put(output)
+        except Exception as e:
+            self.error = e
+            logger.error(f"Pipeline stage '{self.name}' failed: {e}", exc_info=True)
+
+    def stop(self, timeout: float = 2.0):
+        self.stop_event.set()
+        if self.outbox is not None:
+            self.outbox.close()
+        if self.thread.is_alive():
+            self.thread.join(timeout=timeout)
+
+    def stats(self) -> Dict[str, float]:
+        # Covers the window since the previous call.
+        with self.lock:
+            stats = {
+                'count': self.count,
+                'avg_ms': self.busy / self.count * 1000 if self.count else 0.0,
+                'max_ms': self.max_time * 1000,
+                'busy_s': self.busy,
+                'queue_depth': self.inbox.depth() if self.inbox else 0,
+                'dropped': self.inbox.dropped if self.inbox else 0
+            }
+            self.count = 0
+            self.busy = 0.0
+            self.max_time = 0.0
+        return stats
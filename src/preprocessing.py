@@ -6,10 +6,14 @@ from typing import Tuple, Optional
 def preprocess(
     frame: np.ndarray, 
     target_size: Tuple[int, int] = (224, 224),
-    quantized: Optional[bool] = None
+    quantized: Optional[bool] = None,
+    rgb_input: bool = False
 ) -> np.ndarray:
-    resized = cv2.resize(frame, target_size, interpolation=cv2.INTER_LINEAR)
-    rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+    if frame.shape[1::-1] != tuple(target_size):
+        resized = cv2.resize(frame, target_size, interpolation=cv2.INTER_LINEAR)
+    else:
+        resized = frame
+    rgb = resized if rgb_input else cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
     
     if quantized is True:
         output = rgb.astype(np.uint8)
@@ -28,3 +32,108 @@ def preprocess_mobilenetv2(frame: np.ndarray, target_size: Tuple[int, int] = (22
     return np.expand_dims(normalized, axis=0)
 
 
+class Preprocessor:
+    """Fused resize / color / quantize into a preallocated (1, H, W, 3) buffer.
+
+    The output dtype and quantization match the interpreter input exactly, so
+    the result can be handed to the model without any further conversion.
+    Pixel values are mapped in one pass: an affine transform for float32
+    (MobileNetV2 [-1, 1]), a sign-bit flip for the usual int8 shift by 128, or a
+    256-entry lookup table built from the input tensor's scale and zero point.
+    """
+    
+    def __init__(
+        self,
+        target_size: Tuple[int, int] = (224, 224),
+        input_dtype=np.uint8,
+        quantization: Tuple[float, int] = (0.0, 0),
+        normalization: str = "mobilenetv2",
+        rgb_input: bool = False
+    ):
+        if normalization not in ("mobilenetv2", "none"):
+            raise ValueError(f"Unknown normalization: {normalization}")
+        
+        self.target_size = tuple(target_size)
+        self.dtype = np.dtype(input_dtype)
+        self.rgb_input = rgb_input
+        
+        w, h = self.target_size
+        self.output = np.empty((1, h, w, 3), dtype=self.dtype)
+        self.resized = np.empty((h, w, 3), dtype=np.uint8)
+        self.rgb = np.empty((h, w, 3), dtype=np.uint8)
+        
+        self.affine = None
+        self.sign_flip = False
+        self.lut = build_input_lut(self.dtype, quantization, normalization)
+        if self.dtype == np.float32:
+            self.affine = (1 / 127.5, -1.0) if normalization == "mobilenetv2" else (1.0, 0.0)
+            self.lut = None
+        elif self.dtype == np.int8 and np.array_equal(self.lut, np.arange(-128, 128)):
+            self.sign_flip = True
+            self.lut = None
+        self.needs_mapping = self.affine is not None or self.sign_flip or self.lut is not None
+    
+    def __call__(self, frame: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        out = self.output if out is None else out
+        target = out[0]
+        
+        # Each step writes either into a scratch buffer or, if it is the last
+        # step, straight into the output.
+        src = frame
+        if frame.shape[1::-1] != self.target_size:
+            dst = target if (self.rgb_input and not self.needs_mapping) else self.resized
+            cv2.resize(src, self.target_size, dst=dst, interpolation=cv2.INTER_LINEAR)
+            src = dst
+        
+        if not self.rgb_input:
+            dst = self.rgb if self.needs_mapping else target
+            cv2.cvtColor(src, cv2.COLOR_BGR2RGB, dst=dst)
+            src = dst
+        
+        if self.affine is not None:
+            alpha, beta = self.affine
+            cv2.addWeighted(src, alpha, src, 0.0, beta, dst=target, dtype=cv2.CV_32F)
+        elif self.sign_flip:
+            np.bitwise_xor(src, 0x80, out=target.view(np.uint8))
+        elif self.lut is not None:
+            cv2.LUT(src, self.lut, dst=target)
+        elif src is not target:
+            np.copyto(target, src)
+        
+        return out
+
+
+def build_input_lut(
+    input_dtype,
+    quantization: Tuple[float, int] = (0.0, 0),
+    normalization: str = "mobilenetv2"
+) -> Optional[np.ndarray]:
+    dtype = np.dtype(input_dtype)
+    pixels = np.arange(256, dtype=np.float64)
+    scale, zero_point = quantization
+    
+    if dtype == np.float32:
+        if normalization == "none":
+            return pixels.astype(np.float32)
+        return ((pixels - 127.5) / 127.5).astype(np.float32)
+    
+    if dtype not in (np.uint8, np.int8):
+        raise ValueError(f"Unsupported input dtype: {dtype}")
+    
+    if not scale:
+        # No quantization parameters: uint8 takes raw pixels, int8 is shifted by 128.
+        if dtype == np.uint8:
+            return None
+        return (pixels - 128).astype(np.int8)
+    
+    real = pixels if normalization == "none" else (pixels - 127.5) / 127.5
+    exact = real / scale + zero_point
+    
+    # Prefer the conventional raw / shifted-by-128 mapping whenever it is within
+    # half a quantization step, so ties do not zig-zag with round-half-to-even.
+    conventional = pixels if dtype == np.uint8 else pixels - 128
+    if np.all(np.abs(exact - conventional) <= 0.5 + 1e-6):
+        return None if dtype == np.uint8 else conventional.astype(np.int8)
+    
+    info = np.iinfo(dtype)
+    return np.clip(np.round(exact), info.min, info.max).astype(dtype)
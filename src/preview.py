@@ -0,0 +1,269 @@
+import os
+import time
+import struct
+import logging
+import threading
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Slot layout: seq (seqlock, detector), viewer heartbeat (dashboard),
+# frame timestamp and JPEG length (detector), then the JPEG bytes.
+SEQ = struct.Struct("<Q")
+HEARTBEAT = struct.Struct("<d")
+FRAME = struct.Struct("<dI")
+SEQ_OFFSET = 0
+HEARTBEAT_OFFSET = 8
+FRAME_OFFSET = 16
+DATA_OFFSET = 32
+
+
+class PreviewPublisher:
+    """Detector side of the live preview.
+
+    offer() is called with every captured frame but only copies one when a
+    dashboard viewer has sent a heartbeat recently and the preview interval
+    has passed. A low-priority thread downsizes and JPEG-encodes the copy
+    into a shared memory slot; the interval adapts so encoding stays within
+    cpu_budget of one core.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        width: int = 320,
+        max_fps: float = 5.0,
+        quality: int = 70,
+        cpu_budget: float = 0.1,
+        viewer_timeout: float = 3.0,
+        max_bytes: int = 256 * 1024
+    ):
+        size = DATA_OFFSET + max_bytes
+        try:
+            self.shm = SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a detector that did not shut down cleanly
+            stale = SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = SharedMemory(name=name, create=True, size=size)
+        self.buf = self.shm.buf
+        self.max_bytes = max_bytes
+
+        self.width = width
+        self.min_interval = 1.0 / max_fps
+        self.interval = self.min_interval
+        self.quality = quality
+        self.cpu_budget = cpu_budget
+        self.viewer_timeout = viewer_timeout
+
+        self.cond = threading.Condition()
+        self.scratch = None
+        self.scratch_rgb = False
+        self.scratch_time = 0.0
+        self.pending = False
+        self.busy = False
+        self.closed = False
+        self.last_offer = 0.0
+        self.seq = 0
+
+        self.encoded = 0
+        self.too_large = 0
+        self.encode_time = 0.0
+
+        self.thread = threading.Thread(target=self._loop, name="preview", daemon=True)
+        self.thread.start()
+
+    def viewer_active(self, now: float) -> bool:
+        return now - HEARTBEAT.unpack_from(self.buf, HEARTBEAT_OFFSET)[0] < self.viewer_timeout
+
+    def offer(self, frame: np.ndarray, rgb: bool, now: float) -> bool:
+        if now - self.last_offer < self.interval or not self.viewer_active(now):
+            return False
+        with self.cond:
+            if self.busy or self.pending:
+                return False
+            if self.scratch is None or self.scratch.shape != frame.shape:
+                self.scratch = np.empty_like(frame)
+            # Only a copy here; resizing and encoding happen on the preview thread
+            np.copyto(self.scratch, frame)
+            self.scratch_rgb = rgb
+            self.scratch_time = now
+            self.pending = True
+            self.cond.notify()
+        self.last_offer = now
+        return True
+
+    def _loop(self):
+        try:
+            # Lowest scheduling priority (Linux): inference always wins the CPU
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
+
+        while True:
+            with self.cond:
+                while not self.pending and not self.closed:
+                    self.cond.wait()
+                if self.closed:
+                    return
+                self.pending = False
+                self.busy = True
+                frame, rgb, timestamp = self.scratch, self.scratch_rgb, self.scratch_time
+
+            try:
+                cpu_start = time.thread_time()
+                jpeg = self._encode(frame, rgb)
+                cost = time.thread_time() - cpu_start
+                self.encode_time += cost
+                self.interval = max(self.min_interval, cost / self.cpu_budget)
+                if jpeg is not None:
+                    self._write(jpeg, timestamp)
+            except Exception as e:
+                logger.error(f"Preview encode failed: {e}")
+            finally:
+                with self.cond:
+                    self.busy = False
+
+    def _encode(self, frame: np.ndarray, rgb: bool) -> Optional[bytes]:
+        h, w = frame.shape[:2]
+        if w > self.width:
+            frame = cv2.resize(frame, (self.width, round(h * self.width / w)), interpolation=cv2.INTER_AREA)
+        if rgb:
+            frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+        ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return None
+        if len(jpeg) > self.max_bytes:
+            self.too_large += 1
+            return None
+        return jpeg.tobytes()
+
+    def _write(self, jpeg: bytes, timestamp: float):
+        SEQ.pack_into(self.buf, SEQ_OFFSET, self.seq + 1)
+        FRAME.pack_into(self.buf, FRAME_OFFSET, timestamp, len(jpeg))
+        self.buf[DATA_OFFSET:DATA_OFFSET + len(jpeg)] = jpeg
+        self.seq += 2
+        SEQ.pack_into(self.buf, SEQ_OFFSET, self.seq)
+        self.encoded += 1
+
+    def stats(self) -> dict:
+        return {
+            'encoded': self.encoded,
+            'fps_limit': 1.0 / self.interval,
+            'avg_encode_ms': self.encode_time / self.encoded * 1000 if self.encoded else 0.0,
+            'too_large': self.too_large
+        }
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+        self.thread.join(timeout=2.0)
+        self.buf = None
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class PreviewHub:
+    """Dashboard side: one thread copies each new JPEG out of the slot and
+    hands the same bytes to every connected viewer. While viewers are
+    connected it keeps the heartbeat fresh, which is what makes the detector
+    encode at all.
+    """
+
+    def __init__(self, name: str, poll_interval: float = 0.05):
+        self.name = name
+        self.poll_interval = poll_interval
+        self.cond = threading.Condition()
+        self.viewers = 0
+        self.frame = None
+        self.frame_seq = 0
+        self.shm = None
+        self.thread = None
+        self.torn_reads = 0
+
+    def subscribe(self) -> int:
+        with self.cond:
+            self.viewers += 1
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._loop, name="preview-hub", daemon=True)
+                self.thread.start()
+            return self.frame_seq
+
+    def unsubscribe(self):
+        with self.cond:
+            self.viewers -= 1
+
+    def wait(self, after: int, timeout: float) -> Tuple[Optional[bytes], int]:
+        with self.cond:
+            if self.frame_seq == after:
+                self.cond.wait(timeout)
+            if self.frame_seq == after:
+                return None, after
+            return self.frame, self.frame_seq
+
+    def _attach(self) -> bool:
+        try:
+            self.shm = SharedMemory(name=self.name)
+        except FileNotFoundError:
+            return False
+        # The resource tracker would otherwise unlink the detector's segment
+        # when this process exits.
+        resource_tracker.unregister(self.shm._name, "shared_memory")
+        return True
+
+    def _detach(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm = None
+
+    def _loop(self):
+        last_seq = 0
+        last_frame_at = time.time()
+        while True:
+            with self.cond:
+                if self.viewers == 0:
+                    # Stop heartbeating; the detector stops encoding shortly after
+                    self.thread = None
+                    self._detach()
+                    return
+
+            if self.shm is None and not self._attach():
+                time.sleep(1.0)
+                continue
+
+            now = time.time()
+            buf = self.shm.buf
+            HEARTBEAT.pack_into(buf, HEARTBEAT_OFFSET, now)
+            seq = SEQ.unpack_from(buf, SEQ_OFFSET)[0]
+            if seq != last_seq and not seq & 1:
+                _, length = FRAME.unpack_from(buf, FRAME_OFFSET)
+                jpeg = bytes(buf[DATA_OFFSET:DATA_OFFSET + length])
+                if SEQ.unpack_from(buf, SEQ_OFFSET)[0] == seq:
+                    last_seq = seq
+                    last_frame_at = now
+                    with self.cond:
+                        self.frame = jpeg
+                        self.frame_seq += 1
+                        self.cond.notify_all()
+                else:
+                    self.torn_reads += 1
+                    continue
+            elif now - last_frame_at > 5.0:
+                # A restarted detector creates a new segment
+                del buf
+                self._detach()
+                last_seq = 0
+                last_frame_at = now
+                continue
+            del buf
+            time.sleep(self.poll_interval)
@@ -0,0 +1,231 @@
+import json
+import time
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ENCODINGS = {
+    # uint8 stores round(p * 255): 1/510 worst-case error, 1 byte per class
+    "uint8": np.dtype(np.uint8),
+    "float16": np.dtype("<f2")
+}
+
+# (day, timestamps, probs) of one filled write block
+Block = Tuple[str, np.ndarray, np.ndarray]
+
+
+def merge_blocks(pending: List[Block], blocks: List[Block]) -> List[Block]:
+    # Queued blocks are concatenated, never dropped: each one is archive data
+    return pending + blocks
+
+
+class ProbArchive:
+    """Append-only archive of per-frame class probabilities.
+
+    Data is kept in one pair of columnar files per local day: <day>.ts holds
+    float64 capture times and <day>.probs holds an (N, classes) block of
+    uint8 or float16 probabilities. Frames are buffered in a small block and
+    written in one go, and reads memory-map the files, so replaying days of
+    frames needs no parsing.
+
+    Filled blocks go to `submit` (a list of blocks) when given, e.g. a sink
+    worker that calls write(), so file I/O and pruning stay off the caller's
+    thread; otherwise they are written immediately.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        classes: Sequence[str],
+        encoding: str = "uint8",
+        block_frames: int = 256,
+        retention_days: Optional[float] = None,
+        submit: Optional[Callable[[List[Block]], None]] = None
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.classes = list(classes)
+        self.retention_days = retention_days
+        self.submit = submit or self.write
+
+        meta_path = self.directory / "archive.json"
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+            if meta['classes'] != self.classes:
+                raise ValueError(f"Archive {self.directory} was written for classes {meta['classes']}")
+            encoding = meta['encoding']
+        else:
+            if encoding not in ENCODINGS:
+                raise ValueError(f"Unknown archive encoding: {encoding}")
+            meta_path.write_text(json.dumps({'classes': self.classes, 'encoding': encoding}))
+        self.encoding = encoding
+        self.dtype = ENCODINGS[encoding]
+
+        self.block_ts = np.empty(block_frames, dtype="<f8")
+        self.block_probs = np.empty((block_frames, len(self.classes)), dtype=self.dtype)
+        self.scratch = np.empty(len(self.classes), dtype=np.float32)
+        self.block_day = None
+        self.count = 0
+        self.written_day = None
+        self.frames_written = 0
+
+    def _paths(self, day: str) -> Tuple[Path, Path]:
+        return self.directory / f"{day}.ts", self.directory / f"{day}.probs"
+
+    def append(self, timestamp: float, probs: np.ndarray):
+        day = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
+        if day != self.block_day:
+            self.flush()
+            self.block_day = day
+
+        self.block_ts[self.count] = timestamp
+        if self.encoding == "uint8":
+            np.multiply(probs, 255.0, out=self.scratch)
+            np.rint(self.scratch, out=self.scratch)
+            self.block_probs[self.count] = self.scratch
+        else:
+            self.block_probs[self.count] = probs
+        self.count += 1
+        if self.count == len(self.block_ts):
+            self.flush()
+
+    def flush(self):
+        """Hand the current block to submit (copied, the buffer is reused)."""
+        if self.count == 0:
+            return
+        block = (self.block_day, self.block_ts[:self.count].copy(), self.block_probs[:self.count].copy())
+        self.count = 0
+        self.submit([block])
+
+    def write(self, blocks: List[Block]):
+        for day, timestamps, probs in blocks:
+            if day != self.written_day:
+                if self.written_day is not None and self.retention_days:
+                    self.prune(self.retention_days)
+                self.written_day = day
+                self._align(day)
+            ts_path, probs_path = self._paths(day)
+            # A crash between the two writes leaves the columns uneven; readers
+            # use the shorter one and _align trims the rest before the next write.
+            with open(probs_path, "ab") as f:
+                f.write(probs.tobytes())
+            with open(ts_path, "ab") as f:
+                f.write(timestamps.tobytes())
+            self.frames_written += len(timestamps)
+
+    def _align(self, day: str):
+        # Trim a half-written block left by a crash so both columns line up again
+        ts_path, probs_path = self._paths(day)
+        if not ts_path.exists() or not probs_path.exists():
+            return
+        row_bytes = len(self.classes) * self.dtype.itemsize
+        rows = min(ts_path.stat().st_size // 8, probs_path.stat().st_size // row_bytes)
+        for path, size in ((ts_path, rows * 8), (probs_path, rows * row_bytes)):
+            if path.stat().st_size != size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+    
+    def close(self):
+        # With a sink, the caller still has to let it drain
+        self.flush()
+
+    def days(self) -> List[str]:
+        return sorted(path.stem for path in self.directory.glob("*.ts"))
+
+    def prune(self, max_age_days: float) -> int:
+        cutoff = (datetime.now() - timedelta(days=max_age_days)).strftime("%Y-%m-%d")
+        removed = 0
+        for day in self.days():
+            if day < cutoff:
+                for path in self._paths(day):
+                    path.unlink(missing_ok=True)
+                removed += 1
+        if removed:
+            logger.info(f"Pruned {removed} days from the probability archive")
+        return removed
+
+    def load(self, start: float, end: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (timestamps, probs as float32) for frames in [start, end)."""
+        end = end if end is not None else time.time()
+        first = datetime.fromtimestamp(start).strftime("%Y-%m-%d")
+        last = datetime.fromtimestamp(end).strftime("%Y-%m-%d")
+
+        ts_parts, prob_parts = [], []
+        n_classes = len(self.classes)
+        for day in self.days():
+            if day < first or day > last:
+                continue
+            ts_path, probs_path = self._paths(day)
+            ts = np.memmap(ts_path, dtype="<f8", mode="r") if ts_path.stat().st_size else np.empty(0)
+            probs_size = probs_path.stat().st_size if probs_path.exists() else 0
+            rows = min(len(ts), probs_size // (n_classes * self.dtype.itemsize))
+            if rows == 0:
+                continue
+            probs = np.memmap(probs_path, dtype=self.dtype, mode="r", shape=(rows, n_classes))
+            ts = ts[:rows]
+            lo, hi = np.searchsorted(ts, [start, end])
+            ts_parts.append(np.asarray(ts[lo:hi]))
+            prob_parts.append(probs[lo:hi])
+
+        # Include frames still in the write block
+        if self.count and self.block_day is not None and first <= self.block_day <= last:
+            mask = (self.block_ts[:self.count] >= start) & (self.block_ts[:self.count] < end)
+            ts_parts.append(self.block_ts[:self.count][mask])
+            prob_parts.append(self.block_probs[:self.count][mask])
+
+        if not ts_parts:
+            return np.empty(0), np.empty((0, n_classes), dtype=np.float32)
+
+        timestamps = np.concatenate(ts_parts)
+        probs = np.concatenate(prob_parts).astype(np.float32)
+        if self.encoding == "uint8":
+            probs *= 1.0 / 255.0
+        return timestamps, probs
+
+    def replay(
+        self,
+        start: float,
+        end: Optional[float] = None,
+        confidence_threshold: float = 0.72,
+        min_detection_interval: float = 3.0,
+        no_detection_idx: Optional[int] = None
+    ) -> Dict[str, Dict]:
+        """Re-run the counting policy of DetectionSystem over archived frames.
+
+        A frame counts for its top class when the class is not the
+        no-detection class, its probability clears the threshold, and at
+        least min_detection_interval seconds passed since the last counted
+        detection of that species.
+        """
+        timestamps, probs = self.load(start, end)
+        class_idx = np.argmax(probs, axis=1)
+        confidence = probs[np.arange(len(probs)), class_idx]
+        candidate = confidence >= confidence_threshold
+        if no_detection_idx is not None:
+            candidate &= class_idx != no_detection_idx
+
+        results = {}
+        for idx, species in enumerate(self.classes):
+            if idx == no_detection_idx:
+                continue
+            frames = np.flatnonzero(candidate & (class_idx == idx))
+            times = timestamps[frames]
+            # Greedy debounce: jump straight to the first candidate at least one
+            # interval after the last counted one (iterations = detections, not frames)
+            counted = []
+            pos = 0
+            while pos < len(times):
+                counted.append(pos)
+                pos = int(np.searchsorted(times, times[pos] + min_detection_interval, side="left"))
+            counted = frames[counted] if counted else np.empty(0, dtype=np.int64)
+            results[species] = {
+                'count': len(counted),
+                'timestamps': timestamps[counted],
+                'confidence': confidence[counted],
+                'avg_confidence': float(confidence[counted].mean()) if len(counted) else 0.0
+            }
+        return results
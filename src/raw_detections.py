@@ -0,0 +1,127 @@
+import io
+import csv
+import json
+import sqlite3
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.read_pool import ReadPool
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('id', 'timestamp', 'species', 'confidence', 'fps')
+
+# Keyset pagination on (timestamp, id): the index on (timestamp, ...) serves
+# the range, only rows sharing one timestamp need sorting by id.
+PAGE_QUERY = """
+    SELECT id, timestamp, species, confidence, fps FROM detections
+    WHERE timestamp >= ? AND (timestamp > ? OR id > ?) AND timestamp < ? {species}
+    ORDER BY timestamp, id
+    LIMIT ?
+"""
+
+Cursor = Tuple[int, int]
+
+
+def quote_csv(value: str) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="").writerow([value])
+    return buffer.getvalue()
+
+
+def encode_cursor(cursor: Optional[Cursor]) -> Optional[str]:
+    return None if cursor is None else f"{cursor[0]}:{cursor[1]}"
+
+
+def decode_cursor(token: Optional[str]) -> Optional[Cursor]:
+    if not token:
+        return None
+    timestamp, row_id = (int(part) for part in token.split(":"))
+    # SQLite integers are signed 64-bit
+    if not (0 <= timestamp < 2 ** 63 and 0 <= row_id < 2 ** 63):
+        raise ValueError(f"Invalid cursor: {token}")
+    return timestamp, row_id
+
+
+class RawDetections:
+    """Raw detection rows for analysts, read without disturbing the detector.
+
+    Every page is one short query on a read-only pooled connection, so no read
+    transaction stays open across pages: the detector's commits and WAL
+    checkpoints go through between pages, and an export of months of rows
+    only ever holds page_size rows in memory.
+    """
+
+    def __init__(self, db_path: Path, page_size: int = 5000, pool: Optional[ReadPool] = None):
+        self.db_path = db_path
+        self.page_size = page_size
+        self.pool = pool or ReadPool(db_path)
+
+    def _page(
+        self,
+        conn: sqlite3.Connection,
+        start: int,
+        end: int,
+        after: Optional[Cursor],
+        limit: int,
+        species: Sequence[str]
+    ) -> List[tuple]:
+        after_ts, after_id = after if after is not None else (start - 1, 0)
+        clause = f"AND species IN ({','.join('?' * len(species))})" if species else ""
+        return conn.execute(
+            PAGE_QUERY.format(species=clause),
+            (max(start, after_ts), after_ts, after_id, end, *species, limit)
+        ).fetchall()
+
+    def page(
+        self,
+        start: int,
+        end: int,
+        after: Optional[Cursor] = None,
+        limit: int = 100,
+        species: Sequence[str] = ()
+    ) -> Tuple[List[Dict], Optional[Cursor]]:
+        """Rows in [start, end) after the cursor, plus the cursor of the
+        next page (None on the last page)."""
+        rows = self._page(self.pool.connection(), start, end, after, limit, species)
+        following = (rows[-1][1], rows[-1][0]) if len(rows) == limit else None
+        return [dict(zip(COLUMNS, row)) for row in rows], following
+
+    def iter_pages(self, start: int, end: int, species: Sequence[str] = ()) -> Iterator[List[tuple]]:
+        # Each page is fetched completely before it is yielded, so no statement
+        # stays open on the connection while the client reads.
+        after = None
+        while True:
+            rows = self._page(self.pool.connection(), start, end, after, self.page_size, species)
+            if rows:
+                yield rows
+            if len(rows) < self.page_size:
+                return
+            after = rows[-1][1], rows[-1][0]
+
+    def export_csv(self, start: int, end: int, species: Sequence[str] = ()) -> Iterator[bytes]:
+        # csv.writer and json.dumps per row dominate at millions of rows; the
+        # row layout is fixed, so only species names go through them (once).
+        names = {}
+        yield (",".join(COLUMNS) + "\n").encode()
+        for rows in self.iter_pages(start, end, species):
+            lines = []
+            for row_id, timestamp, name, confidence, fps in rows:
+                if name not in names:
+                    names[name] = quote_csv(name)
+                lines.append(f'{row_id},{timestamp},{names[name]},{confidence!r},{"" if fps is None else repr(fps)}\n')
+            yield "".join(lines).encode()
+
+    def export_ndjson(self, start: int, end: int, species: Sequence[str] = ()) -> Iterator[bytes]:
+        names = {}
+        for rows in self.iter_pages(start, end, species):
+            lines = []
+            for row_id, timestamp, name, confidence, fps in rows:
+                if name not in names:
+                    names[name] = json.dumps(name)
+                lines.append(
+                    f'{{"id":{row_id},"timestamp":{timestamp},"species":{names[name]},'
+                    f'"confidence":{confidence!r},"fps":{"null" if fps is None else repr(fps)}}}\n'
+                )
+            yield "".join(lines).encode()
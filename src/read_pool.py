@@ -0,0 +1,57 @@
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+class ReadPool:
+    """One read-only SQLite connection per request thread.
+
+    Connections are opened with mode=ro, so the dashboard can never take
+    the write lock from the detector, and each thread reads on its own
+    connection, so concurrent requests do not queue behind one shared
+    connection. With a fixed pool of server threads they are opened once;
+    connections of threads that have exited are closed on the next open.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.connections = {}
+        self.generation = 0
+        self.opened = 0
+
+    def connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is not None and self.local.generation == self.generation:
+            return conn
+
+        conn = self.connect()
+        with self.lock:
+            alive = {thread.ident for thread in threading.enumerate()}
+            for ident in [ident for ident in self.connections if ident not in alive]:
+                self.connections.pop(ident).close()
+            self.connections[threading.get_ident()] = conn
+            self.opened += 1
+            self.local.conn = conn
+            self.local.generation = self.generation
+        return conn
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {'open': len(self.connections), 'opened': self.opened}
+
+    def close(self):
+        # Threads reopen lazily on their next query
+        with self.lock:
+            for conn in self.connections.values():
+                conn.close()
+            self.connections.clear()
+            self.generation += 1
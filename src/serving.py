@@ -0,0 +1,159 @@
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+from flask import Flask, g, request
+from werkzeug.serving import BaseWSGIServer
+
+logger = logging.getLogger(__name__)
+
+try:
+    import waitress
+    WAITRESS_AVAILABLE = True
+except ImportError:
+    WAITRESS_AVAILABLE = False
+
+
+class RequestTimings:
+    """Per-endpoint request counts and latency percentiles over the last
+    `window` requests, plus a Server-Timing header on every response.
+
+    For streamed responses (live stream, preview, export) the time covers
+    the handler up to the first byte, not the whole stream.
+    """
+
+    def __init__(self, app: Flask, window: int = 1024, slow_ms: float = 500.0):
+        self.window = window
+        self.slow_ms = slow_ms
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    def _start(self):
+        g.request_start = time.perf_counter()
+
+    def _finish(self, response):
+        start = g.pop('request_start', None)
+        if start is None:
+            return response
+        elapsed = (time.perf_counter() - start) * 1000
+        response.headers['Server-Timing'] = f"app;dur={elapsed:.1f}"
+        if elapsed > self.slow_ms:
+            logger.warning(f"Slow request: {request.method} {request.full_path} took {elapsed:.0f} ms")
+
+        with self.lock:
+            entry = self.endpoints.get(request.endpoint)
+            if entry is None:
+                entry = self.endpoints[request.endpoint] = {
+                    'count': 0, 'errors': 0, 'slow': 0, 'recent': deque(maxlen=self.window)
+                }
+            entry['count'] += 1
+            entry['errors'] += response.status_code >= 500
+            entry['slow'] += elapsed > self.slow_ms
+            entry['recent'].append(elapsed)
+        return response
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self.lock:
+            snapshot = {name: (dict(entry), sorted(entry['recent'])) for name, entry in self.endpoints.items()}
+        stats = {}
+        for name, (entry, recent) in snapshot.items():
+            last = len(recent) - 1
+            stats[str(name)] = {
+                'count': entry['count'],
+                'errors': entry['errors'],
+                'slow': entry['slow'],
+                **{f"p{q}_ms": recent[round(last * q / 100)] for q in (50, 95, 99)},
+                'max_ms': recent[-1]
+            }
+        return stats
+
+
+class StreamSlots:
+    """Caps concurrent long-lived streaming responses (server-sent events,
+    MJPEG). Each open stream holds a server thread until the client goes
+    away, so serve() adds `limit` threads on top of the request pool and
+    streams past the limit are turned away instead of starving it.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.lock = threading.Lock()
+        self.active = 0
+        self.rejected = 0
+
+    def acquire(self) -> bool:
+        with self.lock:
+            if self.active >= self.limit:
+                self.rejected += 1
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self.lock:
+            self.active -= 1
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {'active': self.active, 'limit': self.limit, 'rejected': self.rejected}
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """werkzeug's WSGI server with a fixed pool of worker threads instead of
+    a new thread per request, so per-thread database connections are reused
+    and concurrency stays bounded on the Pi.
+    """
+
+    multithread = True
+
+    def __init__(self, host: str, port: int, app, threads: int = 16):
+        super().__init__(host, port, app)
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="dashboard")
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def serve(app: Flask, host: str, port: int, server: str = "auto", threads: int = 16, streams: int = 0):
+    """Run the dashboard with "waitress", "werkzeug" (PooledWSGIServer),
+    "development" (Flask's app.run) or "auto" (waitress if installed).
+
+    `streams` extra threads are added for long-lived responses capped by a
+    StreamSlots of the same limit, so `threads` stay free for everything else.
+    """
+    if server == "auto":
+        server = "waitress" if WAITRESS_AVAILABLE else "werkzeug"
+    logger.info(f"Serving on http://{host}:{port} ({server}, {threads} threads + {streams} for streams)")
+    threads += streams
+
+    if server == "waitress":
+        if not WAITRESS_AVAILABLE:
+            raise ImportError("waitress is not installed (pip install waitress)")
+        waitress.serve(app, host=host, port=port, threads=threads)
+    elif server == "werkzeug":
+        httpd = PooledWSGIServer(host, port, app, threads=threads)
+        try:
+            httpd.serve_forever()
+        finally:
+            httpd.server_close()
+    elif server == "development":
+        app.run(host=host, port=port, debug=False, threaded=True)
+    else:
+        raise ValueError(f"Unknown dashboard server: {server}")
@@ -0,0 +1,207 @@
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def keep_latest(pending: Any, item: Any) -> Any:
+    return item
+
+
+class SinkWorker:
+    """Runs a side effect (DB write, display refresh) on a background thread.
+
+    submit() never blocks. When the queue is full the new item is folded into
+    the newest pending one with merge(); without a merge function the oldest
+    pending item is dropped. Items that wait longer than late_after seconds
+    before being handled are counted as late.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], None],
+        maxsize: int = 8,
+        merge: Optional[Callable[[Any, Any], Any]] = None,
+        late_after: float = 2.0
+    ):
+        self.name = name
+        self.handler = handler
+        self.maxsize = max(1, maxsize)
+        self.merge = merge
+        self.late_after = late_after
+
+        self.items = deque()
+        self.cond = threading.Condition()
+        self.busy = False
+        self.closed = False
+        self.thread = threading.Thread(target=self._loop, name=f"sink-{name}", daemon=True)
+
+        self.processed = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.late = 0
+        self.errors = 0
+        self.service_time = 0.0
+        self.max_service_time = 0.0
+        self.window_count = 0
+
+        self.thread.start()
+
+    def submit(self, item: Any) -> bool:
+        with self.cond:
+            if self.closed:
+                self.dropped += 1
+                return False
+
+            if len(self.items) >= self.maxsize:
+                if self.merge is not None:
+                    # Keep the oldest enqueue time so lateness stays honest
+                    enqueued, pending = self.items[-1]
+                    self.items[-1] = (enqueued, self.merge(pending, item))
+                    self.coalesced += 1
+                    return True
+                self.items.popleft()
+                self.dropped += 1
+
+            self.items.append((time.time(), item))
+            self.cond.notify_all()
+            return True
+
+    def _loop(self):
+        while True:
+            with self.cond:
+                while not self.items and not self.closed:
+                    self.cond.wait()
+                if not self.items:
+                    return
+                enqueued, item = self.items.popleft()
+                self.busy = True
+
+            start = time.perf_counter()
+            try:
+                self.handler(item)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Sink '{self.name}' failed: {e}", exc_info=True)
+            elapsed = time.perf_counter() - start
+
+            with self.cond:
+                self.busy = False
+                self.processed += 1
+                self.window_count += 1
+                self.service_time += elapsed
+                self.max_service_time = max(self.max_service_time, elapsed)
+                if time.time() - enqueued > self.late_after:
+                    self.late += 1
+                self.cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        with self.cond:
+            return self.cond.wait_for(lambda: not self.items and not self.busy, timeout=timeout)
+
+    def close(self, timeout: float = 5.0) -> bool:
+        flushed = self.flush(timeout)
+        with self.cond:
+            self.closed = True
+            if not flushed:
+                self.dropped += len(self.items)
+                self.items.clear()
+            self.cond.notify_all()
+        self.thread.join(timeout=1.0)
+        if not flushed:
+            logger.warning(f"Sink '{self.name}' did not flush within {timeout:.1f}s")
+        return flushed
+
+    def stats(self) -> Dict[str, float]:
+        # Service times cover the window since the previous call; counters are totals.
+        with self.cond:
+            stats = {
+                'processed': self.processed,
+                'pending': len(self.items),
+                'coalesced': self.coalesced,
+                'dropped': self.dropped,
+                'late': self.late,
+                'errors': self.errors,
+                'avg_ms': self.service_time / self.window_count * 1000 if self.window_count else 0.0,
+                'max_ms': self.max_service_time * 1000
+            }
+            self.service_time = 0.0
+            self.max_service_time = 0.0
+            self.window_count = 0
+        return stats
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SinkManager:
+    """Owns the sink workers and the background log listener."""
+
+    def __init__(self, late_after: float = 2.0, flush_timeout: float = 5.0):
+        self.late_after = late_after
+        self.flush_timeout = flush_timeout
+        self.sinks: Dict[str, SinkWorker] = {}
+        self.log_handler = None
+        self.log_listener = None
+        self.log_handlers: List[logging.Handler] = []
+
+    def add(self, name: str, handler: Callable[[Any], None], maxsize: int = 8,
+            merge: Optional[Callable[[Any, Any], Any]] = None) -> SinkWorker:
+        sink = SinkWorker(name, handler, maxsize=maxsize, merge=merge, late_after=self.late_after)
+        self.sinks[name] = sink
+        return sink
+
+    def submit(self, name: str, item: Any) -> bool:
+        sink = self.sinks.get(name)
+        return sink.submit(item) if sink else False
+
+    def capture_logging(self, queue_size: int = 1000):
+        # Move the root handlers (file, console) behind a queue so log writes
+        # happen on the listener thread instead of the caller's.
+        root = logging.getLogger()
+        self.log_handlers = list(root.handlers)
+        log_queue = queue.Queue(maxsize=queue_size)
+        self.log_handler = DroppingQueueHandler(log_queue)
+        self.log_listener = QueueListener(log_queue, *self.log_handlers, respect_handler_level=True)
+        for handler in self.log_handlers:
+            root.removeHandler(handler)
+        root.addHandler(self.log_handler)
+        self.log_listener.start()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        stats = {name: sink.stats() for name, sink in self.sinks.items()}
+        if self.log_handler:
+            stats['log'] = {
+                'pending': self.log_handler.queue.qsize(),
+                'dropped': self.log_handler.dropped
+            }
+        return stats
+
+    def close(self):
+        for sink in self.sinks.values():
+            sink.close(self.flush_timeout)
+
+        if self.log_listener:
+            self.log_listener.stop()
+            root = logging.getLogger()
+            root.removeHandler(self.log_handler)
+            for handler in self.log_handlers:
+                root.addHandler(handler)
+            self.log_listener = None
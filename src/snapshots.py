@@ -0,0 +1,121 @@
+import gzip
+import json
+import time
+import zlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+
+class Snapshot(NamedTuple):
+    version: Hashable
+    etag: str
+    last_modified: float
+    body: bytes
+    gzipped: bytes
+
+
+class SnapshotCache:
+    """Serialized and gzip-compressed JSON responses, one per parameter set.
+
+    A background thread compares version() (database data version plus
+    anything else the payload depends on) every refresh_interval seconds and
+    rebuilds stale snapshots, so requests only pick up ready-made bytes.
+    The ETag is a checksum of the body: a rebuild with unchanged content
+    keeps it, and clients keep getting 304s.
+    """
+
+    def __init__(
+        self,
+        build: Callable[[Hashable], Any],
+        version: Callable[[], Hashable],
+        refresh_interval: float = 1.0,
+        max_entries: int = 8,
+        compresslevel: int = 6
+    ):
+        self.build = build
+        self.version = version
+        self.refresh_interval = refresh_interval
+        self.max_entries = max_entries
+        self.compresslevel = compresslevel
+
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.thread = None
+        self.stop_event = threading.Event()
+
+        self.builds = 0
+        self.build_time = 0.0
+        self.served = 0
+        self.not_modified = 0
+
+    def get(self, params: Hashable) -> Snapshot:
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._loop, name="snapshots", daemon=True)
+                self.thread.start()
+            snapshot = self.entries.get(params)
+            if snapshot is not None:
+                self.entries.move_to_end(params)
+                return snapshot
+        # First request for these parameters
+        return self._rebuild(params, self.version())
+
+    def _rebuild(self, params: Hashable, version: Hashable) -> Snapshot:
+        start = time.perf_counter()
+        body = json.dumps(self.build(params), separators=(",", ":")).encode()
+        etag = f"{zlib.crc32(body):08x}{len(body):x}"
+
+        with self.lock:
+            previous = self.entries.get(params)
+            if previous is not None and previous.etag == etag:
+                snapshot = previous._replace(version=version)
+            else:
+                snapshot = Snapshot(
+                    version, etag, time.time(), body, gzip.compress(body, compresslevel=self.compresslevel)
+                )
+            self.entries[params] = snapshot
+            self.entries.move_to_end(params)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.builds += 1
+            self.build_time += time.perf_counter() - start
+        return snapshot
+
+    def _loop(self):
+        while not self.stop_event.wait(self.refresh_interval):
+            try:
+                with self.lock:
+                    if not self.entries:
+                        continue
+                version = self.version()
+                with self.lock:
+                    stale = [params for params, snapshot in self.entries.items() if snapshot.version != version]
+                for params in stale:
+                    self._rebuild(params, version)
+            except Exception as e:
+                logger.error(f"Snapshot refresh failed: {e}", exc_info=True)
+
+    def record(self, status_code: int):
+        with self.lock:
+            self.served += 1
+            if status_code == 304:
+                self.not_modified += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'builds': self.builds,
+                'avg_build_ms': self.build_time / self.builds * 1000 if self.builds else 0.0,
+                'served': self.served,
+                'not_modified': self.not_modified
+            }
+
+    def close(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
@@ -1,33 +1,252 @@
-import sqlite3
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from src.read_pool import ReadPool
+
+SPECIES = ('Aedes', 'Culex')
+
+# granularity -> (source table, SQL step, label format, bucket key over the source's bucket)
+GRANULARITIES = {
+    'hour': ('rollup_hour', '+1 hour', '%Y-%m-%d %H:00', 'bucket'),
+    'day': ('rollup_day', '+1 day', '%Y-%m-%d', 'bucket'),
+    'week': ('rollup_week', '+7 days', '%Y-%m-%d', 'bucket'),
+    'month': (
+        'rollup_day', '+1 month', '%Y-%m',
+        "CAST(strftime('%s', date(bucket, 'unixepoch', 'localtime', 'start of month'), 'utc') AS INTEGER)"
+    )
+}
+
+# One row per (bucket, species) from the first to the last bucket, zero-filled.
+# Buckets are generated in local time, the same way the rollups are keyed.
+BUCKETED_QUERY = """
+    WITH RECURSIVE series(t) AS (
+        SELECT ?
+        UNION ALL
+        SELECT datetime(t, '{step}') FROM series WHERE datetime(t, '{step}') <= ?
+    ),
+    slots AS (
+        SELECT t, CAST(strftime('%s', t, 'utc') AS INTEGER) AS bucket FROM series
+    ),
+    species(name) AS (VALUES {species}),
+    data AS (
+        SELECT {key} AS bucket, species, SUM(count) AS count
+        FROM {table}
+        WHERE bucket >= (SELECT MIN(bucket) FROM slots)
+          AND bucket < CAST(strftime('%s', datetime(?, '{step}'), 'utc') AS INTEGER)
+        GROUP BY 1, 2
+    )
+    SELECT strftime('{label}', slots.t), slots.bucket, species.name, COALESCE(data.count, 0)
+    FROM slots
+    CROSS JOIN species
+    LEFT JOIN data ON data.bucket = slots.bucket AND data.species = species.name
+    ORDER BY slots.bucket
+"""
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'hour':
+        return moment
+    moment = moment.replace(hour=0)
+    if granularity == 'week':
+        return moment - timedelta(days=moment.weekday())
+    if granularity == 'month':
+        return moment.replace(day=1)
+    return moment
+
+
+class QueryCache:
+    """LRU cache of query results, valid for a single database version.
+    
+    Bounded both by entry count and by the total number of cached rows.
+    """
+    
+    def __init__(self, max_entries: int = 64, max_rows: int = 50000):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.entries = OrderedDict()
+        self.rows = 0
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    def validate(self, version: Hashable):
+        # Any commit to the database changes the version and drops every entry
+        if version != self.version:
+            if self.entries:
+                self.invalidations += 1
+            self.entries.clear()
+            self.rows = 0
+            self.version = version
+    
+    def get(self, key: Hashable) -> Optional[List[tuple]]:
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return result
+    
+    def put(self, key: Hashable, result: List[tuple]):
+        if self.max_entries <= 0 or len(result) > self.max_rows:
+            return
+        if key in self.entries:
+            self.rows -= len(self.entries.pop(key))
+        self.entries[key] = result
+        self.rows += len(result)
+        while len(self.entries) > self.max_entries or self.rows > self.max_rows:
+            _, evicted = self.entries.popitem(last=False)
+            self.rows -= len(evicted)
+    
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self.entries),
+            'rows': self.rows,
+            'invalidations': self.invalidations
+        }
 
 
 class DensityAnalyzer:
-    def __init__(self, db_path: Path):
+    def __init__(
+        self,
+        db_path: Path,
+        cache_entries: int = 64,
+        cache_rows: int = 50000,
+        pool: Optional[ReadPool] = None
+    ):
         self.db_path = db_path
+        self.pool = pool or ReadPool(db_path)
+        # Guards the cache and the connection used only for data_version
+        self.lock = threading.Lock()
+        self.conn = None
+        self.generation = 0
+        self.cache = QueryCache(cache_entries, cache_rows)
     
-    def get_weekly_data(self, days: int = 7) -> Dict[str, List[Tuple[str, int]]]:
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        key = (sql, params)
+        with self.lock:
+            # data_version changes whenever another connection commits, and
+            # reading it costs no I/O, so polling tabs stay off the SD card
+            # until the detector writes something new.
+            version = self._data_version()
+            self.cache.validate(version)
+            result = self.cache.get(key)
+        if result is not None:
+            return result
         
+        # Misses run on the request thread's own read-only connection, in
+        # parallel with other requests. The query starts after the version
+        # was read, so its result is at least that fresh.
+        result = self.pool.connection().execute(sql, params).fetchall()
+        with self.lock:
+            if self.cache.version == version:
+                self.cache.put(key, result)
+        return result
+    
+    def _data_version(self) -> Tuple[int, int]:
+        if self.conn is None:
+            self.conn = self.pool.connect()
+        # The pragma's numbering is per connection; the generation tells
+        # versions from a reopened connection apart.
+        return self.generation, self.conn.execute("PRAGMA data_version").fetchone()[0]
+    
+    def data_version(self) -> Tuple[int, int]:
+        with self.lock:
+            return self._data_version()
+    
+    def cache_stats(self) -> Dict[str, float]:
+        with self.lock:
+            return self.cache.stats()
+    
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+                self.generation += 1
+            self.cache.validate(None)
+        self.pool.close()
+    
+    def bucketed(
+        self,
+        start: datetime,
+        end: datetime,
+        granularity: str = 'day',
+        species: Sequence[str] = SPECIES
+    ) -> List[Dict]:
+        """Counts per local-time bucket, from the bucket containing start to
+        the one containing end, with empty buckets filled with zeros.
+        
+        Returns [{'bucket': label, 'start': epoch, <species>: count, ..., 'total': count}].
+        Weeks start on Monday.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+        table, step, label, key = GRANULARITIES[granularity]
+        first = bucket_start(start, granularity).strftime('%Y-%m-%d %H:%M:%S')
+        last = bucket_start(end, granularity).strftime('%Y-%m-%d %H:%M:%S')
+        
+        sql = BUCKETED_QUERY.format(
+            step=step, label=label, key=key, table=table,
+            species=", ".join("(?)" for _ in species)
+        )
+        rows = self._query(sql, (first, last, *species, last))
+        
+        series = []
+        for label_str, bucket, name, count in rows:
+            if not series or series[-1]['start'] != bucket:
+                series.append({'bucket': label_str, 'start': bucket, **dict.fromkeys(species, 0), 'total': 0})
+            series[-1][name] = count
+            series[-1]['total'] += count
+        return series
+    
+    def activity_heatmap(self, species: Sequence[str] = SPECIES) -> Dict:
+        """All-time counts by local weekday and hour, from the materialized
+        rollup_heatmap table (at most 7 * 24 rows per species).
+        
+        Returns {'days': [...], 'hours': [0..23], 'species': {name: 7x24},
+        'total': 7x24}; rows start on Monday.
+        """
+        rows = self._query(f"""
+            SELECT dow, hour, species, count FROM rollup_heatmap
+            WHERE species IN ({", ".join("?" for _ in species)})
+        """, tuple(species))
+        
+        grids = {name: [[0] * 24 for _ in range(7)] for name in species}
+        total = [[0] * 24 for _ in range(7)]
+        for dow, hour, name, count in rows:
+            day = (dow - 1) % 7  # strftime %w counts from Sunday
+            grids[name][day][hour] = count
+            total[day][hour] += count
+        return {
+            'days': ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'],
+            'hours': list(range(24)),
+            'species': grids,
+            'total': total
+        }
+    
+    def get_weekly_data(self, days: int = 7) -> Dict[str, List[Tuple[str, int]]]:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        cursor.execute("""
+        results = self._query("""
             SELECT 
-                DATE(timestamp) as date,
+                DATE(bucket, 'unixepoch', 'localtime') as date,
                 species,
-                COUNT(*) as count
-            FROM detections
-            WHERE datetime(timestamp) >= datetime(?)
-            GROUP BY DATE(timestamp), species
-            ORDER BY date ASC
-        """, (start_date.strftime("%Y-%m-%d %H:%M:%S"),))
-        
-        results = cursor.fetchall()
-        conn.close()
+                count
+            FROM rollup_day
+            WHERE bucket >= ?
+            ORDER BY bucket ASC
+        """, (int(start_date.replace(hour=0, minute=0, second=0, microsecond=0).timestamp()),))
         
         data = {
             'Aedes': [],
@@ -51,26 +270,20 @@ class DensityAnalyzer:
         return data
     
     def get_statistics(self, days: int = 7) -> Dict[str, Dict]:
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        cursor.execute("""
+        results = self._query("""
             SELECT 
                 species,
-                COUNT(*) as total_count,
-                AVG(confidence) as avg_confidence,
-                MIN(confidence) as min_confidence,
-                MAX(confidence) as max_confidence
-            FROM detections
-            WHERE datetime(timestamp) >= datetime(?)
+                SUM(count) as total_count,
+                SUM(confidence_sum) / SUM(count) as avg_confidence,
+                MIN(confidence_min) as min_confidence,
+                MAX(confidence_max) as max_confidence
+            FROM rollup_hour
+            WHERE bucket >= ?
             GROUP BY species
-        """, (start_date.strftime("%Y-%m-%d %H:%M:%S"),))
-        
-        results = cursor.fetchall()
-        conn.close()
+        """, (int(start_date.replace(minute=0, second=0, microsecond=0).timestamp()),))
         
         stats = {}
         for species, count, avg_conf, min_conf, max_conf in results:
@@ -0,0 +1,218 @@
+import os
+import time
+import zlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.database import Database
+
+logger = logging.getLogger(__name__)
+
+# (seq, timestamp, species, confidence, fps)
+Record = Tuple[int, int, str, float, float]
+
+
+def read_proc_write_bytes() -> Optional[int]:
+    # Bytes this process caused to be sent to the storage layer (Linux only)
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("write_bytes:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def encode_record(record: Record) -> bytes:
+    payload = f"{record[0]},{record[1]},{record[2]},{record[3]!r},{record[4]!r}"
+    return f"{payload}\t{zlib.crc32(payload.encode()):08x}\n".encode()
+
+
+def read_journal(path: Path) -> List[Record]:
+    """Parse a journal file, stopping at the first torn or corrupt record."""
+    records = []
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                payload, crc = line.decode().rstrip("\n").rsplit("\t", 1)
+                if int(crc, 16) != zlib.crc32(payload.encode()):
+                    break
+                seq, timestamp, species, confidence, fps = payload.split(",")
+                records.append((int(seq), int(timestamp), species, float(confidence), float(fps)))
+            except ValueError:
+                break
+    return records
+
+
+class WriteBehindBuffer:
+    """Collects detections in memory and an append-only journal, then writes
+    them to SQLite in large, infrequent transactions.
+
+    Every record carries a sequence number. The last flushed sequence is
+    committed with the rows (meta.journal_seq), so replaying a journal after a
+    crash skips whatever already reached the database.
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        journal_path: Path,
+        flush_interval: float = 300.0,
+        flush_events: int = 500,
+        fsync: bool = True
+    ):
+        self.database = database
+        self.journal_path = Path(journal_path)
+        self.flushing_path = self.journal_path.with_name(self.journal_path.name + ".flushing")
+        self.flush_interval = flush_interval
+        self.flush_events = flush_events
+        self.fsync = fsync
+
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stop_event = threading.Event()
+        self.pending: List[Record] = []
+
+        self.events = 0
+        self.flushes = 0
+        self.logical_bytes = 0
+        self.journal_bytes = 0
+        self.io_start = read_proc_write_bytes()
+
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        self.next_seq = self.replay() + 1
+        self.journal = open(self.journal_path, "ab")
+
+        self.thread = threading.Thread(target=self._loop, name="write-behind", daemon=True)
+        self.thread.start()
+
+    def replay(self) -> int:
+        """Insert journal records that never reached the database; return the last seq."""
+        committed = self.database.get_meta("journal_seq")
+        records = {}
+        for path in (self.flushing_path, self.journal_path):
+            if path.exists():
+                for record in read_journal(path):
+                    records[record[0]] = record
+
+        unflushed = [records[seq] for seq in sorted(records) if seq > committed]
+        last_seq = max([committed] + list(records))
+        if unflushed:
+            self.database.insert_rows([record[1:] for record in unflushed], journal_seq=last_seq, durable=True)
+            logger.info(f"Replayed {len(unflushed)} detections from {self.journal_path.name}")
+
+        for path in (self.flushing_path, self.journal_path):
+            if path.exists():
+                path.unlink()
+        return last_seq
+
+    def log(self, detections: Dict[str, Dict], fps: float, timestamp: Optional[float] = None):
+        # Same call shape as Database.log
+        timestamp = int(timestamp if timestamp is not None else time.time())
+        with self.lock:
+            records = []
+            for species, data in detections.items():
+                for _ in range(data.get('quantity', 0)):
+                    records.append((self.next_seq, timestamp, species, data.get('confidence', 0.0), fps))
+                    self.next_seq += 1
+            if not records:
+                return
+            self.logical_bytes += self._append(records)
+            self.pending.extend(records)
+            self.events += len(records)
+            full = len(self.pending) >= self.flush_events
+        if full:
+            self.wake.set()
+
+    def _append(self, records: List[Record]) -> int:
+        data = b"".join(encode_record(record) for record in records)
+        self.journal.write(data)
+        self.journal.flush()
+        if self.fsync:
+            os.fsync(self.journal.fileno())
+        self.journal_bytes += len(data)
+        return len(data)
+
+    def _loop(self):
+        while not self.stop_event.is_set():
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush failed: {e}", exc_info=True)
+
+    def flush(self) -> int:
+        with self.flush_lock:
+            with self.lock:
+                if not self.pending:
+                    return 0
+                records = self.pending
+                self.pending = []
+                # New records go to a fresh journal while this batch is written
+                self.journal.close()
+                os.replace(self.journal_path, self.flushing_path)
+                self.journal = open(self.journal_path, "ab")
+                if self.fsync:
+                    self._sync_directory()
+
+            try:
+                self._commit(records)
+            except Exception:
+                with self.lock:
+                    self._append(records)
+                    self.pending = records + self.pending
+                    self.flushing_path.unlink()
+                raise
+
+            self._discard_flushed()
+            self.flushes += 1
+            return len(records)
+
+    def _sync_directory(self):
+        # Make the rename itself survive a power cut
+        fd = os.open(self.journal_path.parent, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _commit(self, records: List[Record]):
+        self.database.insert_rows(
+            [record[1:] for record in records], journal_seq=records[-1][0], durable=self.fsync
+        )
+
+    def _discard_flushed(self):
+        self.flushing_path.unlink()
+
+    def stats(self) -> Dict[str, float]:
+        io_now = read_proc_write_bytes()
+        io_bytes = io_now - self.io_start if io_now is not None and self.io_start is not None else None
+        return {
+            'events': self.events,
+            'pending': len(self.pending),
+            'flushes': self.flushes,
+            'journal_bytes': self.journal_bytes,
+            'io_write_bytes': io_bytes,
+            # Bytes that reached storage per byte of detection data; process-wide,
+            # so it also includes log files written by this process.
+            'write_amplification': (
+                io_bytes / self.logical_bytes if io_bytes is not None and self.logical_bytes else None
+            )
+        }
+
+    def close(self):
+        self.stop_event.set()
+        self.wake.set()
+        self.thread.join(timeout=5.0)
+        self.flush()
+        with self.lock:
+            self.journal.close()
+            if self.journal_path.exists() and self.journal_path.stat().st_size == 0:
+                self.journal_path.unlink()
@@ -0,0 +1,163 @@
+import sys
+import time
+import random
+import sqlite3
+from pathlib import Path
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import dashboard
+from src.database import Database
+from src.visualization import DensityAnalyzer, GRANULARITIES, bucket_start
+
+WINDOWS = (7, 30, 90)
+HISTORY_DAYS = 120
+
+
+def window_start_dates(windows=WINDOWS) -> set:
+    # The old row-level queries counted the first day of a window from
+    # now - days; the rollups count it whole. Leaving it empty keeps the
+    # comparison about bucketing.
+    now = datetime.now()
+    return {(now - timedelta(days=days)).date() for days in windows}
+
+
+@pytest.fixture(scope="module")
+def db_path(tmp_path_factory):
+    random.seed(0)
+    path = tmp_path_factory.mktemp("bucketing") / "detections.db"
+    skip = window_start_dates()
+    # Some empty days so zero-filling is exercised
+    empty = set(random.sample(range(HISTORY_DAYS), HISTORY_DAYS // 10))
+    now = int(time.time())
+    rows = []
+    for _ in range(20000):
+        timestamp = now - random.randint(0, HISTORY_DAYS * 86400)
+        if (now - timestamp) // 86400 in empty or datetime.fromtimestamp(timestamp).date() in skip:
+            continue
+        rows.append((timestamp, random.choice(("Aedes", "Culex")), random.uniform(0.72, 1.0), 10.0))
+    db = Database(path)
+    db.insert_rows(rows)
+    db.close()
+    return path
+
+
+@pytest.fixture
+def analyzer(db_path, monkeypatch):
+    analyzer = DensityAnalyzer(db_path, cache_entries=0)
+    monkeypatch.setattr(dashboard, 'analyzer', analyzer)
+    yield analyzer
+    analyzer.close()
+
+
+def baseline_api_data(db_path: Path, days: int) -> dict:
+    # /api/data before rollups and bucketed(): the original row-level queries
+    # (on epoch timestamps) and the per-week strptime loop, unchanged
+    conn = sqlite3.connect(str(db_path))
+    start_ts = int((datetime.now() - timedelta(days=days)).timestamp())
+
+    stats = {}
+    for species, count, avg_conf, min_conf, max_conf in conn.execute("""
+        SELECT species, COUNT(*), AVG(confidence), MIN(confidence), MAX(confidence)
+        FROM detections
+        WHERE timestamp >= ?
+        GROUP BY species
+    """, (start_ts,)):
+        stats[species] = {
+            'total_count': count,
+            'avg_confidence': avg_conf or 0.0,
+            'min_confidence': min_conf or 0.0,
+            'max_confidence': max_conf or 0.0
+        }
+
+    weekly_data = {'Aedes': [], 'Culex': [], 'Total': []}
+    daily_totals = {}
+    for date_str, species, count in conn.execute("""
+        SELECT DATE(timestamp, 'unixepoch', 'localtime') as date, species, COUNT(*) as count
+        FROM detections
+        WHERE timestamp >= ?
+        GROUP BY date, species
+        ORDER BY date ASC
+    """, (start_ts,)):
+        if species in weekly_data:
+            weekly_data[species].append((date_str, count))
+        if date_str not in daily_totals:
+            daily_totals[date_str] = 0
+        daily_totals[date_str] += count
+    for date_str, total in sorted(daily_totals.items()):
+        weekly_data['Total'].append((date_str, total))
+    conn.close()
+
+    daily = []
+    aedes_dict = dict(weekly_data['Aedes'])
+    culex_dict = dict(weekly_data['Culex'])
+    total_dict = dict(weekly_data['Total'])
+    for date_str in sorted(aedes_dict.keys() | culex_dict.keys() | total_dict.keys()):
+        daily.append({
+            'date': date_str,
+            'aedes': aedes_dict.get(date_str, 0),
+            'culex': culex_dict.get(date_str, 0),
+            'total': total_dict.get(date_str, 0)
+        })
+
+    weekly = []
+    end_date = datetime.now()
+    current_date = end_date - timedelta(days=days)
+    week_num = 1
+    while current_date < end_date:
+        week_end = min(current_date + timedelta(days=7), end_date)
+        week_aedes = 0
+        week_culex = 0
+        for date_str, count in weekly_data['Aedes']:
+            if current_date <= datetime.strptime(date_str, "%Y-%m-%d") < week_end:
+                week_aedes += count
+        for date_str, count in weekly_data['Culex']:
+            if current_date <= datetime.strptime(date_str, "%Y-%m-%d") < week_end:
+                week_culex += count
+        weekly.append({
+            'week': f"Week {week_num}",
+            'aedes': week_aedes,
+            'culex': week_culex,
+            'total': week_aedes + week_culex
+        })
+        current_date = week_end
+        week_num += 1
+
+    return {'stats': stats, 'daily': daily, 'weekly': weekly}
+
+
+@pytest.mark.parametrize("days", WINDOWS)
+def test_build_data_matches_baseline(db_path, analyzer, days):
+    expected = baseline_api_data(db_path, days)
+    data = dashboard.build_data(days)
+
+    assert data['stats'].keys() == expected['stats'].keys()
+    for species, stats in expected['stats'].items():
+        assert data['stats'][species] == pytest.approx(stats)
+    assert data['weekly'] == expected['weekly']
+
+    # Same days, plus the zero days the old output left out
+    daily = {day['date']: day for day in data['daily']}
+    assert [daily.get(day['date']) for day in expected['daily']] == expected['daily']
+    returned = {day['date'] for day in expected['daily']}
+    assert all(day['total'] == 0 for date_str, day in daily.items() if date_str not in returned)
+    dates = [day['date'] for day in data['daily']]
+    assert dates == sorted(dates) and len(dates) == len(set(dates))
+
+
+@pytest.mark.parametrize("granularity", GRANULARITIES)
+def test_buckets_add_up_to_raw_rows(db_path, analyzer, granularity):
+    end = datetime.now()
+    start = end - timedelta(days=HISTORY_DAYS)
+    series = analyzer.bucketed(start, end, granularity)
+    conn = sqlite3.connect(str(db_path))
+    raw = conn.execute(
+        "SELECT COUNT(*) FROM detections WHERE timestamp >= ?",
+        (int(bucket_start(start, granularity).timestamp()),)
+    ).fetchone()[0]
+    conn.close()
+    assert sum(row['total'] for row in series) == raw
+    assert all(a['start'] < b['start'] for a, b in zip(series, series[1:]))
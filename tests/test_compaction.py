@@ -0,0 +1,56 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.database import Database
+
+DAY = 86400
+
+
+@pytest.fixture
+def db(tmp_path):
+    # One detection a day for 200 days
+    db = Database(tmp_path / "detections.db")
+    now = int(time.time())
+    db.insert_rows([(now - i * DAY, "Aedes", 0.9, 10.0) for i in range(200)])
+    yield db
+    db.close()
+
+
+def totals(db: Database) -> list:
+    return [
+        db.conn.execute(f"SELECT COALESCE(SUM(count), 0) FROM {table}").fetchone()[0]
+        for table in ("rollup_hour", "rollup_day", "rollup_week", "rollup_heatmap")
+    ]
+
+
+@pytest.mark.parametrize("since_days", [None, 120, 30])
+def test_rebuild_keeps_compacted_rollups(db, since_days):
+    db.compact(max_age_seconds=90 * DAY)
+    assert db.compacted_before() > 0
+    since = None if since_days is None else time.time() - since_days * DAY
+    db.rebuild_rollups(since=since)
+    assert totals(db) == [200] * 4
+
+
+def test_watermark_inferred_for_older_files(db):
+    db.compact(max_age_seconds=90 * DAY)
+    watermark = db.compacted_before()
+    db.conn.execute("DELETE FROM meta WHERE key = 'compacted_before'")
+    db.conn.commit()
+    assert db.compacted_before() == watermark
+    db.rebuild_rollups()
+    assert totals(db) == [200] * 4
+
+
+def test_size_limit_keeps_retention_floor(db):
+    report = db.compact(max_size_bytes=1, min_age_seconds=7 * DAY)
+    assert report['size_floor_reached']
+    newest = db.conn.execute("SELECT COUNT(*) FROM detections WHERE timestamp > ?",
+                             (time.time() - 7 * DAY,)).fetchone()[0]
+    assert newest == 7
+    assert totals(db) == [200] * 4
@@ -0,0 +1,72 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import DASHBOARD_MAX_DAYS
+from src import dashboard
+from src.database import Database
+from src.events import EventHub
+from src.serving import StreamSlots
+from src.visualization import DensityAnalyzer
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Port 0: the hub binds any free UDP port instead of the detector's
+    monkeypatch.setattr(dashboard, 'events', EventHub("127.0.0.1", 0))
+    yield dashboard.app.test_client()
+    dashboard.events.close()
+
+
+def test_streams_past_limit_get_503(client, monkeypatch):
+    monkeypatch.setattr(dashboard, 'streams', StreamSlots(2))
+    open_streams = [client.get('/api/stream', buffered=False) for _ in range(2)]
+    assert [response.status_code for response in open_streams] == [200, 200]
+
+    rejected = client.get('/api/stream')
+    assert rejected.status_code == 503
+    assert rejected.headers['Retry-After']
+
+    # Closing a stream frees its slot, even one that never sent a byte
+    open_streams[0].close()
+    assert dashboard.streams.stats()['active'] == 1
+    reopened = client.get('/api/stream', buffered=False)
+    assert reopened.status_code == 200
+    reopened.close()
+    open_streams[1].close()
+    assert dashboard.streams.stats() == {'active': 0, 'limit': 2, 'rejected': 1}
+
+
+BAD_TIMES = [
+    "start=inf", "end=-inf", "start=nan", "start=1e300", "end=99999999999999999999",
+    "start=-1", "start=0001-01-01", "start=yesterday"
+]
+
+
+@pytest.mark.parametrize("path", ["/api/detections", "/api/detections/export"])
+@pytest.mark.parametrize("query", BAD_TIMES)
+def test_bad_times_get_400(client, path, query):
+    assert client.get(f"{path}?{query}").status_code == 400
+
+
+@pytest.mark.parametrize("cursor", ["99999999999999999999:1", "1:99999999999999999999", "1:2:3", "x"])
+def test_bad_cursors_get_400(client, cursor):
+    assert client.get(f"/api/detections?after={cursor}").status_code == 400
+
+
+@pytest.mark.parametrize("days", ["abc", "1.5", "0", "-3"])
+def test_bad_days_get_400(client, days):
+    assert client.get(f"/api/data?days={days}").status_code == 400
+
+
+def test_days_clamped_to_retention(client, tmp_path, monkeypatch):
+    Database(tmp_path / "detections.db").close()
+    analyzer = DensityAnalyzer(tmp_path / "detections.db")
+    monkeypatch.setattr(dashboard, 'analyzer', analyzer)
+    response = client.get("/api/data?days=1000000")
+    assert response.status_code == 200
+    assert len(response.get_json()['daily']) == DASHBOARD_MAX_DAYS + 1
+    analyzer.close()
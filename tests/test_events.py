@@ -0,0 +1,54 @@
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.events import EventHub, encode_sse
+
+
+def collect(hub: EventHub, position: int, expected: int, received: list, ready: threading.Barrier):
+    ready.wait()
+    while len(received) < expected:
+        payloads, position = hub.wait(position, timeout=5.0)
+        if not payloads:
+            break
+        received.extend(payloads)
+
+
+def test_every_subscriber_gets_every_event():
+    clients, events = 50, 200
+    hub = EventHub("127.0.0.1", 0, backlog=256)
+    received = [[] for _ in range(clients)]
+    ready = threading.Barrier(clients + 1)
+    threads = [
+        threading.Thread(target=collect, args=(hub, hub.subscribe(), events, received[i], ready))
+        for i in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+
+    published = [{'type': 'detection', 'seq': i} for i in range(events)]
+    for event in published:
+        hub.publish(event)
+    for thread in threads:
+        thread.join(timeout=10.0)
+
+    expected = [encode_sse(event) for event in published]
+    assert all(messages == expected for messages in received)
+    assert hub.stats()['clients'] == clients
+    assert hub.stats()['missed'] == 0
+
+
+def test_slow_subscriber_skips_ahead_and_counts_missed():
+    hub = EventHub("127.0.0.1", 0, backlog=8)
+    position = hub.subscribe()
+    for i in range(20):
+        hub.publish({'type': 'stats', 'seq': i})
+
+    payloads, position = hub.wait(position, timeout=0.1)
+    assert payloads == [encode_sse({'type': 'stats', 'seq': i}) for i in range(12, 20)]
+    assert hub.stats()['missed'] == 12
+    assert hub.wait(position, timeout=0.01) == ([], position)
+    hub.unsubscribe()
@@ -0,0 +1,87 @@
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.preprocessing import Preprocessor, preprocess_mobilenetv2
+
+TARGET = (224, 224)
+
+# (input dtype, (scale, zero point)); the int8 cases cover the sign-flip
+# shortcut (zero point 0 and -1 at scale 1/127.5) and the lookup table path.
+QUANTIZED = [
+    (np.uint8, (1 / 127.5, 128)),
+    (np.uint8, (1 / 128, 127)),
+    (np.int8, (1 / 127.5, 0)),
+    (np.int8, (1 / 127.5, -1)),
+    (np.int8, (1 / 128, -1)),
+]
+
+
+def frames():
+    rng = np.random.default_rng(0)
+    # Camera-sized (resized on the way in) and model-sized (no resize)
+    return [
+        rng.integers(0, 256, (480, 640, 3), dtype=np.uint8),
+        rng.integers(0, 256, (TARGET[1], TARGET[0], 3), dtype=np.uint8),
+    ]
+
+
+def training_reference(frame: np.ndarray) -> np.ndarray:
+    # Resize and BGR -> RGB as the camera path does, then the training
+    # pipeline's own normalization
+    training = pytest.importorskip("src.training.preprocessing")
+    resized = cv2.resize(frame, TARGET, interpolation=cv2.INTER_LINEAR)
+    rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+    return np.asarray(training.preprocess_mobilenetv2(rgb))[None]
+
+
+def run(preprocessor: Preprocessor, frame: np.ndarray, rgb_input: bool) -> np.ndarray:
+    return preprocessor(np.ascontiguousarray(frame[..., ::-1]) if rgb_input else frame)
+
+
+@pytest.mark.parametrize("rgb_input", [False, True])
+@pytest.mark.parametrize("frame", frames(), ids=["640x480", "224x224"])
+def test_float32_matches_mobilenetv2(frame, rgb_input):
+    preprocessor = Preprocessor(TARGET, input_dtype=np.float32, rgb_input=rgb_input)
+    out = run(preprocessor, frame, rgb_input)
+    assert out.dtype == np.float32
+    np.testing.assert_allclose(out, preprocess_mobilenetv2(frame, TARGET), atol=1e-6)
+
+
+@pytest.mark.parametrize("frame", frames(), ids=["640x480", "224x224"])
+def test_float32_matches_training(frame):
+    out = Preprocessor(TARGET, input_dtype=np.float32)(frame)
+    np.testing.assert_allclose(out, training_reference(frame), atol=1e-6)
+
+
+@pytest.mark.parametrize("rgb_input", [False, True])
+@pytest.mark.parametrize("frame", frames(), ids=["640x480", "224x224"])
+@pytest.mark.parametrize("dtype, quantization", QUANTIZED)
+def test_quantized_within_one_step(frame, rgb_input, dtype, quantization):
+    scale, zero_point = quantization
+    preprocessor = Preprocessor(TARGET, input_dtype=dtype, quantization=quantization, rgb_input=rgb_input)
+    out = run(preprocessor, frame, rgb_input)
+    assert out.dtype == dtype
+    dequantized = (out.astype(np.float64) - zero_point) * scale
+    expected = preprocess_mobilenetv2(frame, TARGET)
+    assert np.max(np.abs(dequantized - expected)) <= scale + 1e-6
+
+
+@pytest.mark.parametrize("rgb_input", [False, True])
+def test_uint8_without_quantization_is_raw_rgb(rgb_input):
+    frame = frames()[0]
+    out = run(Preprocessor(TARGET, input_dtype=np.uint8, rgb_input=rgb_input), frame, rgb_input)
+    resized = cv2.resize(frame, TARGET, interpolation=cv2.INTER_LINEAR)
+    np.testing.assert_array_equal(out[0], cv2.cvtColor(resized, cv2.COLOR_BGR2RGB))
+
+
+def test_int8_without_quantization_is_shifted_rgb():
+    frame = frames()[1]
+    out = Preprocessor(TARGET, input_dtype=np.int8)(frame)
+    expected = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB).astype(np.int16) - 128
+    np.testing.assert_array_equal(out[0], expected)
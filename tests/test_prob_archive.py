@@ -0,0 +1,51 @@
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.prob_archive import ProbArchive, merge_blocks
+
+CLASSES = ["Aedes", "Culex", "No_mosquito"]
+
+
+def frames(count: int):
+    rng = np.random.default_rng(0)
+    # Noon today, so every frame falls on one day
+    start = time.mktime(time.localtime()[:3] + (12, 0, 0, 0, 0, -1))
+    probs = rng.dirichlet(np.ones(len(CLASSES)), count).astype(np.float32)
+    return start + np.arange(count) * 0.1, probs
+
+
+def test_filled_blocks_go_to_submit_without_file_io(tmp_path):
+    submitted = []
+    archive = ProbArchive(tmp_path, CLASSES, block_frames=256, submit=submitted.append)
+    timestamps, probs = frames(600)
+    for ts, p in zip(timestamps, probs):
+        archive.append(float(ts), p)
+
+    assert [len(block[1]) for blocks in submitted for block in blocks] == [256, 256]
+    assert not list(tmp_path.glob("*.ts"))
+
+    archive.close()
+    queued = merge_blocks(merge_blocks(submitted[0], submitted[1]), submitted[2])
+    archive.write(queued)
+    assert archive.frames_written == 600
+    loaded_ts, loaded_probs = archive.load(timestamps[0], timestamps[-1] + 1)
+    np.testing.assert_array_equal(loaded_ts, timestamps)
+    np.testing.assert_allclose(loaded_probs, probs, atol=1 / 510 + 1e-6)
+
+
+def test_without_submit_blocks_are_written_immediately(tmp_path):
+    archive = ProbArchive(tmp_path, CLASSES, encoding="float16", block_frames=64)
+    timestamps, probs = frames(100)
+    for ts, p in zip(timestamps, probs):
+        archive.append(float(ts), p)
+    assert archive.frames_written == 64
+    archive.close()
+
+    loaded_ts, loaded_probs = ProbArchive(tmp_path, CLASSES).load(timestamps[0], timestamps[-1] + 1)
+    np.testing.assert_array_equal(loaded_ts, timestamps)
+    np.testing.assert_allclose(loaded_probs, probs, atol=1e-3)